@@ -1,64 +1,77 @@
+import time
+
+# Start of the cold start measured by --measure-startup (see benchmark.py --startup)
+STARTED = time.perf_counter()
+
 import os
-import shutil
 import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
-import time
+import queue
 import json
-import sv_ttk
-import darkdetect
-import pywinstyles
-
-# Default file type categories (basic - for typical Windows users)
-DEFAULT_FILE_CATEGORIES = {
-    "DOCUMENTS": [".pdf", ".doc", ".docx", ".txt", ".rtf"],
-    "SPREADSHEETS": [".xls", ".xlsx", ".csv"],
-    "PRESENTATIONS": [".ppt", ".pptx"],
-    "IMAGES": [".jpg", ".jpeg", ".png", ".gif", ".bmp"],
-    "VIDEOS": [".mp4", ".avi", ".mkv", ".mov", ".wmv"],
-    "AUDIO": [".mp3", ".wav", ".m4a", ".wma"],
-    "PROGRAMS": [".exe", ".msi"],
-    "COMPRESSED": [".zip", ".rar", ".7z"]
-}
 
-def load_file_categories(json_path=None):
-    """Load file categories from JSON file or return defaults."""
-    try:
-        if json_path and os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf-8') as f:
-                categories = json.load(f)
-                return categories
-        else:
-            # Return hardcoded defaults without creating files
-            return DEFAULT_FILE_CATEGORIES.copy()
-    except Exception as e:
-        print(f"Error loading file categories from {json_path}: {e}")
-        return DEFAULT_FILE_CATEGORIES.copy()
+import organizer
+from organizer import (DEFAULT_FILE_CATEGORIES, DEFAULT_POLL_SECONDS, DEFAULT_SETTLE_SECONDS,
+                       FileOrganizer, get_category, load_file_categories, organize_downloads,
+                       save_file_categories)
+from mover import DEFAULT_COPY_WORKERS, DEFAULT_MOVE_WORKERS, VERIFY_MODES
+from sniffer import DEFAULT_SNIFF_CACHE
+from dedupe import DEFAULT_HASH_CACHE, DUPLICATE_ACTIONS
+from destinations import CONFLICT_POLICIES
+from metrics import format_bytes, format_metrics
+from activitylog import DEFAULT_LOG_DIR, ActivityLog
+from scheduler import DEFAULT_DEVICE_WORKERS, DeviceScheduler
+from defaults import DEFAULT_ARCHIVE_DAYS, DEFAULT_DIR_INDEX, DEFAULT_MAX_IN_FLIGHT
+from journal import (DEFAULT_JOURNAL_DIR, JournalState, MoveJournal, find_unfinished,
+                     latest_journal, undo_run)
 
-def save_file_categories(categories, json_path="file_categories.json"):
-    """Save file categories to JSON file."""
-    try:
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(categories, f, indent=4)
-        return True
-    except Exception as e:
-        print(f"Error saving file categories: {e}")
-        return False
-
-# Global variable for file categories (starts with defaults)
-FILE_CATEGORIES = DEFAULT_FILE_CATEGORIES.copy()
 
 # Default configuration settings
 DEFAULT_CONFIG = {
     "theme": "auto",
+    "detected_theme": "light",  # Last result of "auto", applied at startup before detecting again
     "categories_file": "",  # Empty means use built-in defaults
     "window_geometry": "600x600",
-    "last_selected_folder": ""
+    "last_selected_folder": "",
+    "move_workers": DEFAULT_MOVE_WORKERS,
+    "copy_workers": DEFAULT_COPY_WORKERS,
+    "device_workers": DEFAULT_DEVICE_WORKERS,  # Queued folders organized at once per disk
+    "verify_copies": "none",  # "none", "size" or "hash" for copies across drives
+    "recursive": False,
+    "max_depth": None,  # None means no depth limit in recursive mode
+    "exclude_patterns": [],  # Glob patterns of file/folder names to leave alone
+    "journal_dir": DEFAULT_JOURNAL_DIR,  # Move journals used for resume and undo
+    "log_dir": DEFAULT_LOG_DIR,  # Rotating structured log of every run, see activitylog.py
+    "watch_settle_seconds": DEFAULT_SETTLE_SECONDS,  # Quiet time before a new file is moved
+    "watch_poll_seconds": DEFAULT_POLL_SECONDS,  # Polling interval where inotify is unavailable
+    "sniff_content": False,  # Identify files with unknown extensions by their content
+    "sniff_cache": DEFAULT_SNIFF_CACHE,
+    "duplicates": "off",  # "off", "skip", "collect" or "hardlink" files with identical content
+    "hash_cache": DEFAULT_HASH_CACHE,
+    "conflict_policy": "skip",  # What to do when a destination name is taken, see destinations.py
+    "collect_metrics": False,  # Time every stage and show it in the completion summary
+    "network_mode": False,  # Many calls in flight at once, for high-latency network shares
+    "max_in_flight": DEFAULT_MAX_IN_FLIGHT,
+    "archive_cold_files": False,  # Pack old files of the category folders into ARCHIVE/ after organizing
+    "archive_days": DEFAULT_ARCHIVE_DAYS,
+    "archive_category_days": {},  # {category: days} overriding archive_days; 0 never archives
+    "archive_format": "zip",  # "zip" or "tar.zst" (needs the zstandard package)
+    "incremental_scan": False,  # Only list folders that changed since the last run, see dirindex.py
+    "dir_index": DEFAULT_DIR_INDEX
 }
 
-def load_config(config_path="config.json"):
-    """Load configuration from JSON file."""
+CONFIG_PATH = "config.json"
+
+# Config changes are written this many seconds after the last one
+CONFIG_SAVE_DELAY = 0.5
+
+def load_config(config_path=CONFIG_PATH):
+    """Load configuration from JSON file.
+
+    A missing file is not created here; the defaults are written with the
+    first change.
+    """
     try:
         if os.path.exists(config_path):
             with open(config_path, 'r', encoding='utf-8') as f:
@@ -69,28 +82,101 @@ def load_config(config_path="config.json"):
                         config[key] = default_value
                 return config
         else:
-            # Create default config file if it doesn't exist
-            save_config(DEFAULT_CONFIG, config_path)
             return DEFAULT_CONFIG.copy()
     except Exception as e:
         print(f"Error loading config: {e}")
         return DEFAULT_CONFIG.copy()
 
-def save_config(config, config_path="config.json"):
-    """Save configuration to JSON file."""
+def write_config_text(text, config_path=CONFIG_PATH):
+    """Replace the config file with ``text`` atomically."""
+    temp_path = config_path + ".tmp"
     try:
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, config_path)
         return True
     except Exception as e:
         print(f"Error saving config: {e}")
         return False
 
-# Global variable for configuration
-APP_CONFIG = load_config()
+def save_config(config, config_path=CONFIG_PATH):
+    """Save configuration to JSON file."""
+    return write_config_text(json.dumps(config, indent=4), config_path)
+
+
+class ConfigSaver:
+    """Write the configuration on a background thread, debounced.
+
+    save() only serializes a snapshot; the file is written once no further
+    change has come in for ``delay`` seconds, so a burst of changes (a
+    dragged spinbox, several settings in a row) costs a single write and
+    the Tk thread never waits for the disk. close() writes anything still
+    pending.
+    """
+
+    def __init__(self, config_path=CONFIG_PATH, delay=CONFIG_SAVE_DELAY):
+        """Create the saver; its thread starts with the first save."""
+        self.config_path = config_path
+        self.delay = delay
+        self.pending = None
+        self.due = 0.0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def save(self, config):
+        """Schedule a write of the current state of ``config``."""
+        text = json.dumps(config, indent=4)
+        with self.condition:
+            self.pending = text
+            self.due = time.monotonic() + self.delay
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="springclean-config",
+                                               daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def run(self):
+        """Write snapshots once they have been quiet for the delay."""
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                while not self.closed:
+                    remaining = self.due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                text = self.pending
+                self.pending = None
+            write_config_text(text, self.config_path)
+
+    def close(self):
+        """Write any pending change now and stop the thread."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+
+# How often (ms) the Tk main loop drains updates posted by worker threads
+UI_UPDATE_INTERVAL_MS = 100
+
+# Queued updates applied per pass, so a flood of them cannot freeze the window
+MAX_UI_UPDATES_PER_TICK = 2000
+
+# Lines kept in the on-screen log; the full history is in the log files
+MAX_LOG_LINES = 5000
+
+# Global variable for configuration, loaded when the main window is created
+APP_CONFIG = None
 
 def apply_theme_to_titlebar(root, mode):
     """Apply theme to the title bar for Windows systems."""
+    import pywinstyles
     version = sys.getwindowsversion()
     if version.major == 10 and version.build >= 22000:
         # Windows 11: Set title bar color to match background
@@ -102,27 +188,33 @@ def apply_theme_to_titlebar(root, mode):
         root.wm_attributes("-alpha", 1)
 
 
-def set_theme(root, mode="auto"):
-    """Set the theme for the application."""
+def detect_theme():
+    """Return the system theme, "dark" or "light"."""
+    import darkdetect
+    return "dark" if darkdetect.isDark() else "light"
+
+
+def set_theme(root, mode="auto", titlebar=True):
+    """Set the theme for the application and return the mode applied.
+
+    With ``titlebar=False`` the Windows title bar is left for later, as
+    at startup before the window is shown.
+    """
+    import sv_ttk
     if mode == "auto":
-        mode = "dark" if darkdetect.isDark() else "light"
-    if sys.platform == "win32":
+        mode = detect_theme()
+    if titlebar and sys.platform == "win32":
         apply_theme_to_titlebar(root, mode)
     sv_ttk.set_theme(mode)
+    return mode
 
 def toggle_theme(root):
     """Toggle the theme between light and dark."""
+    import sv_ttk
     current_theme = sv_ttk.get_theme()
     new_theme = "dark" if current_theme == "light" else "light"
     set_theme(root, new_theme)
 
-def get_category(extension):
-    """Get the category of a file based on its extension."""
-    for category, extensions in FILE_CATEGORIES.items():
-        if extension.lower() in extensions:
-            return category
-    return "OTHERS"
-
 # Settings window class
 class SettingsWindow:
     """Settings window for theme and file categories configuration."""
@@ -137,7 +229,7 @@ class SettingsWindow:
         self.window = tk.Toplevel(parent)
         self.window.title("Settings")
         self.window.iconbitmap("icon.ico")
-        self.window.geometry("500x400")
+        self.window.geometry("500x760")
         self.window.resizable(False, False)
         self.window.transient(parent)
         self.window.grab_set()
@@ -218,9 +310,86 @@ class SettingsWindow:
         defaults_btn.pack(pady=(5, 0))
         
         # Current categories info
-        info_label = ttk.Label(categories_frame, text=f"Current categories: {len(FILE_CATEGORIES)} loaded")
+        info_label = ttk.Label(categories_frame, text=f"Current categories: {len(organizer.FILE_CATEGORIES)} loaded")
         info_label.pack(pady=(10, 0))
         
+        # Performance settings
+        performance_frame = ttk.LabelFrame(main_frame, text="Performance", padding="10")
+        performance_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        ttk.Label(performance_frame, text="Parallel moves:").grid(row=0, column=0, sticky=tk.W)
+        self.move_workers_var = tk.IntVar(
+            value=self.main_app.config.get("move_workers", DEFAULT_MOVE_WORKERS))
+        move_spinbox = ttk.Spinbox(performance_frame, from_=1, to=64, width=5,
+                                   textvariable=self.move_workers_var, command=self.on_performance_change)
+        move_spinbox.grid(row=0, column=1, padx=(10, 20))
+        move_spinbox.bind("<FocusOut>", lambda e: self.on_performance_change())
+        
+        ttk.Label(performance_frame, text="Parallel copies (other drives):").grid(row=0, column=2, sticky=tk.W)
+        self.copy_workers_var = tk.IntVar(
+            value=self.main_app.config.get("copy_workers", DEFAULT_COPY_WORKERS))
+        copy_spinbox = ttk.Spinbox(performance_frame, from_=1, to=16, width=5,
+                                   textvariable=self.copy_workers_var, command=self.on_performance_change)
+        copy_spinbox.grid(row=0, column=3, padx=(10, 0))
+        copy_spinbox.bind("<FocusOut>", lambda e: self.on_performance_change())
+        
+        ttk.Label(performance_frame, text="Verify copies:").grid(row=1, column=0, sticky=tk.W, pady=(10, 0))
+        self.verify_var = tk.StringVar(value=self.main_app.config.get("verify_copies", "none"))
+        verify_combo = ttk.Combobox(performance_frame, textvariable=self.verify_var,
+                                    values=list(VERIFY_MODES), state="readonly", width=8)
+        verify_combo.grid(row=1, column=1, columnspan=2, sticky=tk.W, padx=(10, 0), pady=(10, 0))
+        verify_combo.bind("<<ComboboxSelected>>", lambda e: self.on_performance_change())
+        
+        self.sniff_var = tk.BooleanVar(value=self.main_app.config.get("sniff_content", False))
+        ttk.Checkbutton(performance_frame, text="Identify unknown files by their content",
+                        variable=self.sniff_var, command=self.on_performance_change).grid(
+            row=2, column=0, columnspan=4, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(performance_frame, text="Duplicate files:").grid(row=3, column=0, sticky=tk.W, pady=(10, 0))
+        self.duplicates_var = tk.StringVar(value=self.main_app.config.get("duplicates", "off"))
+        duplicates_combo = ttk.Combobox(performance_frame, textvariable=self.duplicates_var,
+                                        values=list(DUPLICATE_ACTIONS), state="readonly", width=8)
+        duplicates_combo.grid(row=3, column=1, columnspan=2, sticky=tk.W, padx=(10, 0), pady=(10, 0))
+        duplicates_combo.bind("<<ComboboxSelected>>", lambda e: self.on_performance_change())
+        
+        ttk.Label(performance_frame, text="Name conflicts:").grid(row=4, column=0, sticky=tk.W, pady=(10, 0))
+        self.conflict_var = tk.StringVar(value=self.main_app.config.get("conflict_policy", "skip"))
+        conflict_combo = ttk.Combobox(performance_frame, textvariable=self.conflict_var,
+                                      values=list(CONFLICT_POLICIES), state="readonly", width=18)
+        conflict_combo.grid(row=4, column=1, columnspan=3, sticky=tk.W, padx=(10, 0), pady=(10, 0))
+        conflict_combo.bind("<<ComboboxSelected>>", lambda e: self.on_performance_change())
+        
+        self.metrics_var = tk.BooleanVar(value=self.main_app.config.get("collect_metrics", False))
+        ttk.Checkbutton(performance_frame, text="Collect timing metrics",
+                        variable=self.metrics_var, command=self.on_performance_change).grid(
+            row=5, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        self.export_metrics_btn = ttk.Button(
+            performance_frame, text="Export Last Metrics...", command=self.export_metrics,
+            state="normal" if self.main_app.last_metrics else "disabled")
+        self.export_metrics_btn.grid(row=5, column=2, columnspan=2, sticky=tk.E, pady=(10, 0))
+        
+        self.network_var = tk.BooleanVar(value=self.main_app.config.get("network_mode", False))
+        ttk.Checkbutton(performance_frame, text="Network share mode (for slow network folders)",
+                        variable=self.network_var, command=self.on_performance_change).grid(
+            row=6, column=0, columnspan=4, sticky=tk.W, pady=(10, 0))
+        
+        self.archive_var = tk.BooleanVar(value=self.main_app.config.get("archive_cold_files", False))
+        ttk.Checkbutton(performance_frame, text="Archive files not modified for (days):",
+                        variable=self.archive_var, command=self.on_performance_change).grid(
+            row=7, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        self.archive_days_var = tk.IntVar(
+            value=self.main_app.config.get("archive_days", DEFAULT_ARCHIVE_DAYS))
+        archive_spinbox = ttk.Spinbox(performance_frame, from_=1, to=3650, width=5,
+                                      textvariable=self.archive_days_var,
+                                      command=self.on_performance_change)
+        archive_spinbox.grid(row=7, column=2, sticky=tk.W, padx=(10, 0), pady=(10, 0))
+        archive_spinbox.bind("<FocusOut>", lambda e: self.on_performance_change())
+        
+        self.incremental_var = tk.BooleanVar(value=self.main_app.config.get("incremental_scan", False))
+        ttk.Checkbutton(performance_frame, text="Skip folders unchanged since the last run",
+                        variable=self.incremental_var, command=self.on_performance_change).grid(
+            row=8, column=0, columnspan=4, sticky=tk.W, pady=(10, 0))
+        
         # Configuration info
         config_info_frame = ttk.LabelFrame(main_frame, text="Configuration", padding="10")
         config_info_frame.pack(fill=tk.X, pady=(0, 20))
@@ -253,15 +422,52 @@ class SettingsWindow:
         
         # Save theme to config
         self.main_app.config["theme"] = new_theme
-        self.main_app.save_current_config()
         
-        set_theme(self.parent, new_theme)
-        set_theme(self.window, new_theme)
+        mode = set_theme(self.parent, new_theme)
+        set_theme(self.window, mode)
+        if new_theme == "auto":
+            self.main_app.config["detected_theme"] = mode
+        self.main_app.save_current_config()
         
         # Update theme button in main window
         if hasattr(self.main_app, 'update_theme_button'):
             self.main_app.update_theme_button()
     
+    def on_performance_change(self):
+        """Save the settings of the Performance section."""
+        try:
+            self.main_app.config["move_workers"] = max(1, self.move_workers_var.get())
+            self.main_app.config["copy_workers"] = max(1, self.copy_workers_var.get())
+            self.main_app.config["verify_copies"] = self.verify_var.get()
+            self.main_app.config["sniff_content"] = self.sniff_var.get()
+            self.main_app.config["duplicates"] = self.duplicates_var.get()
+            self.main_app.config["conflict_policy"] = self.conflict_var.get()
+            self.main_app.config["collect_metrics"] = self.metrics_var.get()
+            self.main_app.config["network_mode"] = self.network_var.get()
+            self.main_app.config["archive_cold_files"] = self.archive_var.get()
+            self.main_app.config["archive_days"] = max(1, self.archive_days_var.get())
+            self.main_app.config["incremental_scan"] = self.incremental_var.get()
+        except tk.TclError:
+            # Spinbox holds a non-numeric value while the user is typing
+            return
+        self.main_app.save_current_config()
+    
+    def export_metrics(self):
+        """Save the metrics of the last organize run as JSON."""
+        file_path = filedialog.asksaveasfilename(
+            title="Export Metrics",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")]
+        )
+        if not file_path:
+            return
+        try:
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(self.main_app.last_metrics, f, indent=4)
+            messagebox.showinfo("Success", f"Metrics exported to {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export metrics: {e}")
+    
     def browse_categories_file(self):
         """Browse for a JSON file containing file categories."""
         file_path = filedialog.askopenfilename(
@@ -285,9 +491,8 @@ class SettingsWindow:
             return
         
         try:
-            global FILE_CATEGORIES
             new_categories = load_file_categories(file_path)
-            FILE_CATEGORIES = new_categories
+            category_index = organizer.set_file_categories(new_categories)
             
             # Save categories file path to config
             self.main_app.config["categories_file"] = file_path
@@ -296,7 +501,8 @@ class SettingsWindow:
             # Update the main app's category display
             self.main_app.refresh_categories_display()
             
-            messagebox.showinfo("Success", f"Loaded {len(FILE_CATEGORIES)} categories from {os.path.basename(file_path)}")
+            messagebox.showinfo("Success", f"Loaded {len(organizer.FILE_CATEGORIES)} categories from {os.path.basename(file_path)}")
+            self.main_app.report_category_conflicts(category_index)
             
             # Update the file entry to show the loaded file
             self.categories_file_var.set(file_path)
@@ -308,7 +514,7 @@ class SettingsWindow:
                         if isinstance(child, ttk.LabelFrame) and "File Categories" in child.cget("text"):
                             for subchild in child.winfo_children():
                                 if isinstance(subchild, ttk.Label) and "Current categories:" in subchild.cget("text"):
-                                    subchild.config(text=f"Current categories: {len(FILE_CATEGORIES)} loaded")
+                                    subchild.config(text=f"Current categories: {len(organizer.FILE_CATEGORIES)} loaded")
                                     break
             
         except Exception as e:
@@ -316,8 +522,7 @@ class SettingsWindow:
     
     def use_builtin_defaults(self):
         """Switch to using built-in default categories."""
-        global FILE_CATEGORIES
-        FILE_CATEGORIES = DEFAULT_FILE_CATEGORIES.copy()
+        organizer.set_file_categories(DEFAULT_FILE_CATEGORIES.copy())
         
         # Clear categories file from config
         self.main_app.config["categories_file"] = ""
@@ -334,10 +539,10 @@ class SettingsWindow:
                     if isinstance(child, ttk.LabelFrame) and "File Categories" in child.cget("text"):
                         for subchild in child.winfo_children():
                             if isinstance(subchild, ttk.Label) and "Current categories:" in subchild.cget("text"):
-                                subchild.config(text=f"Current categories: {len(FILE_CATEGORIES)} loaded")
+                                subchild.config(text=f"Current categories: {len(organizer.FILE_CATEGORIES)} loaded")
                                 break
         
-        messagebox.showinfo("Success", f"Switched to built-in default categories ({len(FILE_CATEGORIES)} categories)")
+        messagebox.showinfo("Success", f"Switched to built-in default categories ({len(organizer.FILE_CATEGORIES)} categories)")
     
     def reset_to_defaults(self):
         """Reset all settings to default values."""
@@ -346,6 +551,19 @@ class SettingsWindow:
             self.theme_var.set("auto")
             self.on_theme_change()
             
+            # Reset move concurrency
+            self.move_workers_var.set(DEFAULT_MOVE_WORKERS)
+            self.copy_workers_var.set(DEFAULT_COPY_WORKERS)
+            self.verify_var.set("none")
+            self.sniff_var.set(False)
+            self.duplicates_var.set("off")
+            self.conflict_var.set("skip")
+            self.metrics_var.set(False)
+            self.network_var.set(False)
+            self.archive_var.set(False)
+            self.archive_days_var.set(DEFAULT_ARCHIVE_DAYS)
+            self.incremental_var.set(False)
+            
             # Reset categories file to built-in defaults
             self.categories_file_var.set("[Built-in Defaults]")
             
@@ -354,9 +572,9 @@ class SettingsWindow:
             self.main_app.save_current_config()
             
             # Reload default categories
-            global FILE_CATEGORIES
-            FILE_CATEGORIES = DEFAULT_FILE_CATEGORIES.copy()
+            organizer.set_file_categories(DEFAULT_FILE_CATEGORIES.copy())
             self.main_app.refresh_categories_display()
+            self.main_app.recursive_var.set(False)
             
             # Update info label
             for widget in self.window.winfo_children():
@@ -365,43 +583,413 @@ class SettingsWindow:
                         if isinstance(child, ttk.LabelFrame) and "File Categories" in child.cget("text"):
                             for subchild in child.winfo_children():
                                 if isinstance(subchild, ttk.Label) and "Current categories:" in subchild.cget("text"):
-                                    subchild.config(text=f"Current categories: {len(FILE_CATEGORIES)} loaded")
+                                    subchild.config(text=f"Current categories: {len(organizer.FILE_CATEGORIES)} loaded")
                                     break
             
             messagebox.showinfo("Settings Reset", "All settings have been reset to defaults.")
 
+# Move plan preview window class
+class PlanWindow:
+    """Window showing a move plan, with export and execute actions."""
+    
+    # Rows shown in the table; the full plan is always available via Export
+    MAX_ROWS = 5000
+    
+    def __init__(self, parent, main_app, plan):
+        """Initialize the plan window."""
+        self.parent = parent
+        self.main_app = main_app
+        self.plan = plan
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Move Plan")
+        self.window.iconbitmap("icon.ico")
+        self.window.geometry("800x500")
+        self.window.transient(parent)
+        
+        self.create_widgets()
+        set_theme(self.window, self.main_app.current_theme)
+    
+    def create_widgets(self):
+        """Create the summary, table and buttons."""
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        counts = self.plan.counts()
+        statuses = ", ".join(f"{status}: {count}" for status, count in counts["statuses"].items())
+        summary = (f"{counts['files']} files, {counts['bytes'] / 1048576:.1f} MB "
+                   f"in {len(counts['categories'])} categories ({statuses or 'nothing to do'})")
+        if len(self.plan) > self.MAX_ROWS:
+            summary += f"\nShowing the first {self.MAX_ROWS} entries; export the plan to see all of them."
+        ttk.Label(main_frame, text=summary).pack(anchor=tk.W, pady=(0, 10))
+        
+        table_frame = ttk.Frame(main_frame)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        columns = ("source", "destination", "size", "status")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        for column, width in zip(columns, (280, 280, 90, 80)):
+            tree.heading(column, text=column.capitalize())
+            tree.column(column, width=width, anchor=tk.E if column == "size" else tk.W)
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        for row, (source, destination, category, size, status) in enumerate(self.plan.entries()):
+            if row >= self.MAX_ROWS:
+                break
+            tree.insert("", tk.END, values=(source, destination, f"{size:,}", status))
+        
+        buttons_frame = ttk.Frame(main_frame)
+        buttons_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(buttons_frame, text="Export...", command=self.export_plan).pack(side=tk.LEFT)
+        ttk.Button(buttons_frame, text="Close", command=self.window.destroy).pack(side=tk.RIGHT)
+        ttk.Button(buttons_frame, text="Organize Using This Plan",
+                   command=self.execute_plan).pack(side=tk.RIGHT, padx=(0, 10))
+    
+    def export_plan(self):
+        """Save the plan as JSON (replayable) or CSV."""
+        file_path = filedialog.asksaveasfilename(
+            title="Export Move Plan",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("CSV files", "*.csv")]
+        )
+        if not file_path:
+            return
+        try:
+            self.plan.export(file_path)
+            messagebox.showinfo("Success", f"Plan exported to {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export plan: {e}")
+    
+    def execute_plan(self):
+        """Close the window and organize the folder according to the plan."""
+        self.window.destroy()
+        self.main_app.start_organizing(self.plan)
+
+class AnalyticsWindow:
+    """Window showing where the space of a folder goes, with an export action."""
+    
+    def __init__(self, parent, main_app, report):
+        """Initialize the analytics window."""
+        self.parent = parent
+        self.main_app = main_app
+        self.report = report
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Folder Analysis")
+        self.window.iconbitmap("icon.ico")
+        self.window.geometry("700x500")
+        self.window.transient(parent)
+        
+        self.create_widgets()
+        set_theme(self.window, self.main_app.current_theme)
+    
+    def create_widgets(self):
+        """Create the summary, one table per breakdown and the buttons."""
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        report = self.report
+        summary = f"{report['files']:,} files, {format_bytes(report['bytes'])} in {report['folder']}"
+        if report["unreadable"]:
+            summary += f" ({report['unreadable']} unreadable)"
+        ttk.Label(main_frame, text=summary).pack(anchor=tk.W, pady=(0, 10))
+        
+        notebook = ttk.Notebook(main_frame)
+        notebook.pack(fill=tk.BOTH, expand=True)
+        folder = os.path.join(report["folder"], "")
+        tables = (
+            ("By Category", "Category", [(row["name"], row["files"], row["bytes"])
+                                         for row in report["categories"]]),
+            ("By Age", "Last modified", [(row["age"], row["files"], row["bytes"])
+                                         for row in report["ages"]]),
+            ("OTHERS by Extension", "Extension", [(row["name"], row["files"], row["bytes"])
+                                                  for row in report["others"]]),
+            ("Largest Files", "File", [(row["path"][len(folder):] if row["path"].startswith(folder)
+                                        else row["path"], row["category"], row["bytes"])
+                                       for row in report["largest"]]),
+        )
+        for title, first_column, rows in tables:
+            notebook.add(self.create_table(notebook, first_column, rows), text=title)
+        
+        buttons_frame = ttk.Frame(main_frame)
+        buttons_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(buttons_frame, text="Export...", command=self.export_report).pack(side=tk.LEFT)
+        ttk.Button(buttons_frame, text="Close", command=self.window.destroy).pack(side=tk.RIGHT)
+    
+    def create_table(self, parent, first_column, rows):
+        """Return a frame with a table of (name, files or category, bytes) rows."""
+        frame = ttk.Frame(parent, padding="5")
+        second_column = "Category" if first_column == "File" else "Files"
+        columns = ("name", "second", "size")
+        tree = ttk.Treeview(frame, columns=columns, show="headings")
+        for column, text, width in zip(columns, (first_column, second_column, "Size"),
+                                       (400, 110, 110)):
+            tree.heading(column, text=text)
+            tree.column(column, width=width, anchor=tk.W if column == "name" else tk.E)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        for name, second, size in rows:
+            tree.insert("", tk.END, values=(name, f"{second:,}" if isinstance(second, int) else second,
+                                            format_bytes(size)))
+        return frame
+    
+    def export_report(self):
+        """Save the report as JSON or CSV."""
+        file_path = filedialog.asksaveasfilename(
+            title="Export Folder Analysis",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("CSV files", "*.csv")]
+        )
+        if not file_path:
+            return
+        from analytics import export_report
+        try:
+            export_report(self.report, file_path)
+            messagebox.showinfo("Success", f"Analysis exported to {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export analysis: {e}")
+
+# Searchable category browser shown in the main window
+class CategoryBrowser:
+    """Tree of categories with their extensions, filtered by a search box.
+
+    Categories are the rows of a ttk.Treeview, which only draws the rows in
+    view. Extension rows are inserted when a category is opened (or when a
+    search matches them), a chunk per Tk idle pass, so sets with thousands
+    of extensions load without a pause. update() only touches the rows of
+    categories that changed, and searching detaches and reattaches rows
+    instead of rebuilding them.
+    """
+    
+    # Extension rows inserted per pass when a category is filled
+    ROWS_PER_PASS = 500
+    # Search runs this long (ms) after the last keystroke
+    SEARCH_DELAY_MS = 150
+    # Extensions listed next to a category before "+N more"
+    PREVIEW_EXTENSIONS = 8
+    
+    def __init__(self, parent, height=6):
+        """Create the search box and the tree inside ``parent``."""
+        self.categories = {}
+        # Category -> the extensions its rows show (None while only the placeholder is there)
+        self.filled = {}
+        # Bumped when a category's rows are replaced, so stale fill passes stop
+        self.generation = {}
+        self.query = ""
+        self.search_job = None
+        
+        search_frame = ttk.Frame(parent)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.search_var).pack(
+            side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 5))
+        self.match_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=self.match_var).pack(side=tk.RIGHT)
+        self.search_var.trace_add("write", self.on_search_typed)
+        
+        tree_frame = ttk.Frame(parent)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=("extensions",), height=height,
+                                 selectmode="browse")
+        self.tree.heading("#0", text="Category", anchor=tk.W)
+        self.tree.heading("extensions", text="Extensions", anchor=tk.W)
+        self.tree.column("#0", width=180, stretch=False)
+        self.tree.column("extensions", width=300)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+    
+    @staticmethod
+    def row_id(category):
+        """Return the tree item id of a category row."""
+        return "category:" + category
+    
+    def summary(self, extensions):
+        """Return the text shown next to a category."""
+        shown = ", ".join(extensions[:self.PREVIEW_EXTENSIONS])
+        if len(extensions) > self.PREVIEW_EXTENSIONS:
+            shown += f" (+{len(extensions) - self.PREVIEW_EXTENSIONS} more)"
+        return shown
+    
+    def update(self, categories):
+        """Show a new {category: [extensions]} mapping, changing only what differs."""
+        new = {category: tuple(extensions) for category, extensions in categories.items()}
+        for category in self.categories:
+            if category not in new:
+                self.tree.delete(self.row_id(category))
+                self.filled.pop(category, None)
+                self.generation.pop(category, None)
+        for category, extensions in new.items():
+            old = self.categories.get(category)
+            if old is None:
+                self.tree.insert("", tk.END, iid=self.row_id(category), text=category,
+                                 values=(self.summary(extensions),))
+                self.clear_rows(category)
+            elif old != extensions:
+                self.tree.item(self.row_id(category), values=(self.summary(extensions),))
+                self.clear_rows(category)
+        self.categories = new
+        self.apply_filter()
+    
+    def clear_rows(self, category):
+        """Drop a category's extension rows, leaving a placeholder so it can be opened."""
+        row = self.row_id(category)
+        self.generation[category] = self.generation.get(category, 0) + 1
+        children = self.tree.get_children(row)
+        if children:
+            self.tree.delete(*children)
+        self.tree.insert(row, tk.END, text="…")
+        self.filled[category] = None
+    
+    def fill_rows(self, category, extensions):
+        """Replace a category's rows with ``extensions``, a chunk per idle pass."""
+        row = self.row_id(category)
+        self.generation[category] = generation = self.generation.get(category, 0) + 1
+        children = self.tree.get_children(row)
+        if children:
+            self.tree.delete(*children)
+        self.filled[category] = extensions
+        by_extension = organizer.CATEGORY_INDEX.by_extension
+        
+        def insert_from(start):
+            if self.generation.get(category) != generation:
+                return
+            for extension in extensions[start:start + self.ROWS_PER_PASS]:
+                owner = by_extension.get(extension.strip().lower())
+                note = f"used by {owner}" if owner not in (None, category) else ""
+                self.tree.insert(row, tk.END, text=extension, values=(note,))
+            if start + self.ROWS_PER_PASS < len(extensions):
+                self.tree.after_idle(insert_from, start + self.ROWS_PER_PASS)
+        insert_from(0)
+    
+    def on_open(self, event=None):
+        """Insert the extension rows of a category when it is opened."""
+        row = self.tree.focus()
+        if not row.startswith("category:"):
+            return
+        category = row[len("category:"):]
+        if category in self.categories and self.filled.get(category) is None:
+            self.fill_rows(category, self.matching(category)[1] or self.categories[category])
+    
+    def on_search_typed(self, *args):
+        """Search once typing pauses."""
+        if self.search_job is not None:
+            self.tree.after_cancel(self.search_job)
+        self.search_job = self.tree.after(self.SEARCH_DELAY_MS, self.search)
+    
+    def search(self):
+        """Filter the rows by the text in the search box."""
+        self.search_job = None
+        query = self.search_var.get().strip().lower()
+        if query != self.query:
+            self.query = query
+            self.apply_filter()
+    
+    def matching(self, category):
+        """Return (shown, extensions) for a category under the current search.
+
+        ``extensions`` is the matching subset when only some extensions
+        match, otherwise None (all of them are shown).
+        """
+        query = self.query
+        if not query or query in category.lower():
+            return True, None
+        hits = tuple(extension for extension in self.categories[category]
+                     if query in extension.lower())
+        return bool(hits), hits or None
+    
+    def apply_filter(self):
+        """Attach the categories the search matches, in order, and detach the rest."""
+        position = 0
+        for category in self.categories:
+            row = self.row_id(category)
+            shown, hits = self.matching(category)
+            if not shown:
+                self.tree.detach(row)
+                continue
+            self.tree.move(row, "", position)
+            position += 1
+            if hits is not None:
+                # Show just the matching extensions, opened
+                if self.filled.get(category) != hits:
+                    self.fill_rows(category, hits)
+                self.tree.item(row, open=True)
+            elif self.filled.get(category) not in (None, self.categories[category]):
+                # A previous search left a subset; fill again when opened
+                self.clear_rows(category)
+                self.tree.item(row, open=False)
+        if self.query:
+            self.match_var.set(f"{position} of {len(self.categories)}")
+        else:
+            self.match_var.set("")
+
+
 # Main class for the GUI application
 class FileOrganizerGUI:
     """GUI class for the SpringClean file organizer application."""
     
-    def __init__(self, root):
-        """Initialize the GUI application."""
+    def __init__(self, root, measure_startup=False):
+        """Initialize the GUI application.
+
+        Only what the first paint needs happens here; loading the categories
+        file, filling the categories display, the Windows title bar and
+        theme detection wait for finish_startup(). With ``measure_startup``
+        the startup times are printed as JSON and the window closes.
+        """
+        self.startup_times = {"imports": time.perf_counter() - STARTED}
+        self.measure_startup = measure_startup
         self.root = root
         self.root.title("SpringClean")
         self.root.iconbitmap("icon.ico")
         
         # Load configuration
         global APP_CONFIG
+        if APP_CONFIG is None:
+            APP_CONFIG = load_config()
         self.config = APP_CONFIG
+        self.config_saver = ConfigSaver()
+        # Errors writing the log file are only shown, as logging them would fail again
+        self.activity_log = ActivityLog(self.config.get("log_dir", DEFAULT_LOG_DIR),
+                                        on_error=lambda message: self.ui_queue.put(("log", message)))
         
         # Set window geometry from config
         geometry = self.config.get("window_geometry", "600x600")
         self.root.geometry(geometry)
         self.root.resizable(True, True)
         
-        # Load categories file from config if specified
-        categories_file = self.config.get("categories_file", "")
-        if categories_file and os.path.exists(categories_file):
-            global FILE_CATEGORIES
-            FILE_CATEGORIES = load_file_categories(categories_file)
-        # Otherwise, FILE_CATEGORIES already contains the defaults
-        
-        # Theme setting from config
+        # Theme setting from config; "auto" starts with the last detected
+        # theme and is checked again once the window is up
         self.current_theme = self.config.get("theme", "auto")
-        set_theme(self.root, self.current_theme)
+        if self.current_theme == "auto":
+            set_theme(self.root, self.config.get("detected_theme", "light"), titlebar=False)
+        else:
+            set_theme(self.root, self.current_theme, titlebar=False)
         
         self.selected_folder = tk.StringVar()
         
+        # More folders organized together with the selected one (see scheduler.py)
+        self.extra_folders = []
+        
+        # Worker threads never touch Tk directly: they post log lines and
+        # callbacks to this queue and store the latest progress value, and
+        # the main loop applies them in batches (see process_ui_updates)
+        self.ui_queue = queue.Queue()
+        self.pending_progress = None
+        self.pending_status = None
+        
+        # Set while watch mode runs; setting it stops the watcher thread
+        self.watch_stop = None
+        
+        # Metrics of the most recent run, when collecting them is enabled
+        self.last_metrics = None
+        
         # Set last selected folder from config if it exists
         last_folder = self.config.get("last_selected_folder", "")
         if last_folder and os.path.exists(last_folder):
@@ -411,11 +999,60 @@ class FileOrganizerGUI:
         
         # Update organize button state based on folder selection
         if self.selected_folder.get():
-            self.organize_btn.config(state="normal")
+            self.set_run_buttons_state("normal")
             self.log_message(f"Restored folder selection: {self.selected_folder.get()}")
         
+        self.process_ui_updates()
+        self.root.after_idle(self.finish_startup)
+        
         # Bind window close event to save config
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+    
+    def finish_startup(self):
+        """Do the startup work that can wait until the window is painted."""
+        # Map and draw the window before anything else
+        self.root.update_idletasks()
+        self.startup_times["first_paint"] = time.perf_counter() - STARTED
+        
+        # Load categories file from config if specified
+        categories_file = self.config.get("categories_file", "")
+        if categories_file and os.path.exists(categories_file):
+            organizer.set_file_categories(load_file_categories(categories_file))
+        # Otherwise, FILE_CATEGORIES already contains the defaults
+        self.create_categories_display()
+        self.report_category_conflicts(organizer.CATEGORY_INDEX)
+        
+        if self.current_theme == "auto":
+            # Detection may start a subprocess (Linux), so it runs off the Tk thread
+            threading.Thread(target=self.detect_theme_threaded, daemon=True).start()
+        elif sys.platform == "win32":
+            apply_theme_to_titlebar(self.root, self.current_theme)
+        self.startup_times["ready"] = time.perf_counter() - STARTED
+        
+        if self.measure_startup:
+            print(json.dumps(self.startup_times), flush=True)
+            self.root.after(0, self.root.destroy)
+            return
+        self.root.after(500, self.check_interrupted_runs)
+    
+    def detect_theme_threaded(self):
+        """Detect the system theme and switch to it if it changed since last time."""
+        try:
+            mode = detect_theme()
+        except Exception as e:
+            print(f"Error detecting theme: {e}")
+            return
+        
+        def apply():
+            if self.current_theme != "auto":
+                return
+            if sys.platform == "win32":
+                apply_theme_to_titlebar(self.root, mode)
+            if mode != self.config.get("detected_theme"):
+                set_theme(self.root, mode, titlebar=False)
+                self.config["detected_theme"] = mode
+                self.save_current_config()
+        self.call_in_ui(apply)
 
     def create_widgets(self):
         """Create and configure all GUI widgets."""
@@ -445,12 +1082,20 @@ class FileOrganizerGUI:
         browse_btn = ttk.Button(folder_frame, text="Browse", command=self.browse_folder)
         browse_btn.grid(row=0, column=1)
         
+        # Queue more folders; they are organized in the same run, in
+        # parallel when they are on different drives
+        add_folder_btn = ttk.Button(folder_frame, text="Add Folder", command=self.add_folder)
+        add_folder_btn.grid(row=0, column=2, padx=(10, 0))
+        self.extra_folders_var = tk.StringVar()
+        ttk.Label(folder_frame, textvariable=self.extra_folders_var,
+                  wraplength=450).grid(row=1, column=0, columnspan=3, sticky=tk.W)
+        
         # File categories display frame
         self.categories_frame = ttk.LabelFrame(main_frame, text="File Categories", padding="10")
         self.categories_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 20))
         
-        # Create scrollable categories display
-        self.create_categories_display()
+        # The categories browser is created by finish_startup()
+        self.category_browser = None
         
         # Control buttons frame
         buttons_frame = ttk.Frame(main_frame)
@@ -461,13 +1106,43 @@ class FileOrganizerGUI:
                                       command=self.start_organizing, state="disabled")
         self.organize_btn.grid(row=0, column=0, padx=(0, 10))
         
-        # Clear selection button
-        clear_btn = ttk.Button(buttons_frame, text="Clear", command=self.clear_selection)
-        clear_btn.grid(row=0, column=1)
+        # Preview button: build the move plan without touching any file
+        self.preview_btn = ttk.Button(buttons_frame, text="Preview",
+                                      command=self.start_preview, state="disabled")
+        self.preview_btn.grid(row=0, column=1, padx=(0, 10))
         
-        # Progress bar for organization process
-        self.progress = ttk.Progressbar(main_frame, mode='determinate')
-        self.progress.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        # Analyze button: report where the space goes without moving anything
+        self.analyze_btn = ttk.Button(buttons_frame, text="Analyze",
+                                      command=self.start_analysis, state="disabled")
+        self.analyze_btn.grid(row=0, column=2, padx=(0, 10))
+        
+        # Undo last run button
+        self.undo_btn = ttk.Button(buttons_frame, text="Undo Last Run", command=self.undo_last_run)
+        self.undo_btn.grid(row=0, column=3, padx=(0, 10))
+        
+        # Watch button: keep organizing new arrivals until stopped
+        self.watch_btn = ttk.Button(buttons_frame, text="Watch", command=self.toggle_watch,
+                                    state="disabled")
+        self.watch_btn.grid(row=0, column=4, padx=(0, 10))
+        
+        # Clear selection button
+        self.clear_btn = ttk.Button(buttons_frame, text="Clear", command=self.clear_selection)
+        self.clear_btn.grid(row=0, column=5)
+        
+        # Recursive mode toggle
+        self.recursive_var = tk.BooleanVar(value=self.config.get("recursive", False))
+        recursive_check = ttk.Checkbutton(buttons_frame, text="Include subfolders",
+                                          variable=self.recursive_var, command=self.on_recursive_change)
+        recursive_check.grid(row=0, column=6, padx=(10, 0))
+        
+        # Progress bar for organization process, with a status line for large copies
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        progress_frame.columnconfigure(0, weight=1)
+        self.progress = ttk.Progressbar(progress_frame, mode='determinate')
+        self.progress.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.status_var = tk.StringVar()
+        ttk.Label(progress_frame, textvariable=self.status_var).grid(row=1, column=0, sticky=tk.W)
         
         # Log display frame
         log_frame = ttk.LabelFrame(main_frame, text="Log", padding="10")
@@ -480,6 +1155,17 @@ class FileOrganizerGUI:
         
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.log_line_count = 0
+        
+        # Complete history, kept in the log files
+        log_buttons_frame = ttk.Frame(log_frame)
+        log_buttons_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        ttk.Label(log_buttons_frame,
+                  text=f"Showing the last {MAX_LOG_LINES:,} lines").pack(side=tk.LEFT)
+        ttk.Button(log_buttons_frame, text="Open Log Folder",
+                   command=self.open_log_folder).pack(side=tk.RIGHT)
+        ttk.Button(log_buttons_frame, text="Export Full Log...",
+                   command=self.export_log).pack(side=tk.RIGHT, padx=(0, 10))
         
         # Configure grid weights for responsive resizing
         self.root.columnconfigure(0, weight=1)
@@ -491,67 +1177,22 @@ class FileOrganizerGUI:
         log_frame.rowconfigure(0, weight=1)
     
     def create_categories_display(self):
-        """Create the scrollable display for file categories."""
-        # Clear existing widgets
-        for widget in self.categories_frame.winfo_children():
-            widget.destroy()
-        
-        # Create a frame to contain canvas and scrollbar
-        container_frame = ttk.Frame(self.categories_frame)
-        container_frame.pack(fill="both", expand=True)
-        
-        # Create a canvas and scrollbar for scrolling
-        canvas = tk.Canvas(container_frame, height=120)
-        scrollbar = ttk.Scrollbar(container_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        # Configure scrolling
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Display supported file categories and extensions
-        row = 0
-        for category, extensions in FILE_CATEGORIES.items():
-            category_label = ttk.Label(scrollable_frame, text=f"{category}:", 
-                                     font=("Segoe UI", 10, "bold"))
-            category_label.grid(row=row, column=0, sticky=tk.W, padx=(0, 10), pady=1)
-            
-            # Truncate extensions list if too long for better display
-            ext_text = ", ".join(extensions)
-            if len(ext_text) > 70:
-                ext_text = ext_text[:67] + "..."
-            
-            ext_label = ttk.Label(scrollable_frame, text=ext_text)
-            ext_label.grid(row=row, column=1, sticky=tk.W, pady=1)
-            row += 1
-        
-        # Pack canvas and scrollbar
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Bind mouse wheel to canvas for scrolling
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        
-        # Only bind mousewheel when mouse is over the canvas
-        def _bind_mousewheel(event):
-            canvas.bind_all("<MouseWheel>", _on_mousewheel)
-        
-        def _unbind_mousewheel(event):
-            canvas.unbind_all("<MouseWheel>")
-        
-        canvas.bind('<Enter>', _bind_mousewheel)
-        canvas.bind('<Leave>', _unbind_mousewheel)
+        """Create the searchable categories browser and show the current categories."""
+        if self.category_browser is None:
+            self.category_browser = CategoryBrowser(self.categories_frame)
+        self.category_browser.update(organizer.FILE_CATEGORIES)
     
     def refresh_categories_display(self):
         """Refresh the categories display after loading new categories."""
         self.create_categories_display()
     
+    def report_category_conflicts(self, category_index):
+        """Log extensions that more than one category claims and rules that cannot be used."""
+        for line in category_index.describe_conflicts():
+            self.log_message(f"⚠ Extension conflict: {line}")
+        for line in category_index.describe_rule_errors():
+            self.log_message(f"⚠ Rule ignored: {line}")
+    
     def open_settings(self):
         """Open the settings window."""
         SettingsWindow(self.root, self)
@@ -569,13 +1210,17 @@ class FileOrganizerGUI:
             
             global APP_CONFIG
             APP_CONFIG = self.config
-            save_config(self.config)
+            self.config_saver.save(self.config)
         except Exception as e:
             print(f"Error saving configuration: {e}")
     
     def on_closing(self):
         """Handle application closing event."""
+        if self.watch_stop is not None:
+            self.watch_stop.set()
         self.save_current_config()
+        self.config_saver.close()
+        self.activity_log.close()
         self.root.destroy()
     
     def browse_folder(self):
@@ -583,145 +1228,481 @@ class FileOrganizerGUI:
         folder_path = filedialog.askdirectory(title="Select folder to organize")
         if folder_path:
             self.selected_folder.set(folder_path)
-            self.organize_btn.config(state="normal")
+            self.set_run_buttons_state("normal")
             self.log_message(f"Selected folder: {folder_path}")
             
             # Save the selected folder to config
             self.config["last_selected_folder"] = folder_path
             self.save_current_config()
     
+    def add_folder(self):
+        """Queue one more folder for the next Organize run."""
+        if not self.selected_folder.get():
+            self.browse_folder()
+            return
+        folder_path = filedialog.askdirectory(title="Add a folder to organize")
+        if not folder_path or folder_path == self.selected_folder.get():
+            return
+        if folder_path not in self.extra_folders:
+            self.extra_folders.append(folder_path)
+            self.log_message(f"Added folder: {folder_path}")
+        self.extra_folders_var.set(
+            "Also organizing: " + ", ".join(os.path.basename(folder) or folder
+                                            for folder in self.extra_folders))
+    
+    def on_recursive_change(self):
+        """Save the recursive mode toggle."""
+        self.config["recursive"] = self.recursive_var.get()
+        self.save_current_config()
+    
     def clear_selection(self):
         """Clear the selected folder and reset UI elements."""
         self.selected_folder.set("")
-        self.organize_btn.config(state="disabled")
+        self.extra_folders = []
+        self.extra_folders_var.set("")
+        self.set_run_buttons_state("disabled", include_undo=False)
+        self.process_ui_updates(reschedule=False)
         self.log_text.delete(1.0, tk.END)
+        self.log_line_count = 0
     
     def log_message(self, message):
-        """Log messages to the text widget and auto-scroll to bottom."""
-        self.log_text.insert(tk.END, f"{message}\n")
+        """Queue a log line; it is shown by the next UI update pass and saved to the log file."""
+        self.ui_queue.put(("log", message))
+        self.activity_log.message(message)
+    
+    def show_log_lines(self, lines):
+        """Append lines to the on-screen log, dropping the oldest beyond MAX_LOG_LINES."""
+        if len(lines) > MAX_LOG_LINES:
+            lines = lines[-MAX_LOG_LINES:]
+        text = "\n".join(lines) + "\n"
+        self.log_text.insert(tk.END, text)
+        self.log_line_count += text.count("\n")
+        excess = self.log_line_count - MAX_LOG_LINES
+        if excess > 0:
+            # Deleting whole lines from the front is cheap for the Text B-tree
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_line_count -= excess
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
     
-    def start_organizing(self):
-        """Start the file organization process in a separate thread."""
+    def export_log(self):
+        """Save the complete log history (all rotated files) as one JSON-lines file."""
+        file_path = filedialog.asksaveasfilename(
+            title="Export Full Log",
+            defaultextension=".jsonl",
+            filetypes=[("JSON lines", "*.jsonl"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            self.activity_log.export(file_path)
+            messagebox.showinfo("Success", f"Log exported to {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export log: {e}")
+    
+    def open_log_folder(self):
+        """Show the folder holding the log files in the file manager."""
+        self.activity_log.flush()
+        log_dir = os.path.abspath(self.activity_log.log_dir)
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            if sys.platform == "win32":
+                os.startfile(log_dir)
+            else:
+                import subprocess
+                subprocess.Popen(["open" if sys.platform == "darwin" else "xdg-open", log_dir])
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open log folder: {e}")
+    
+    def call_in_ui(self, callback):
+        """Queue a callable to run on the Tk main thread."""
+        self.ui_queue.put(("call", callback))
+    
+    def process_ui_updates(self, reschedule=True):
+        """Apply queued log lines, progress and callbacks in one batch.
+
+        The next pass is scheduled first, so the updates go on whatever a
+        callback does. Scheduled passes apply at most MAX_UI_UPDATES_PER_TICK
+        queued items and leave the rest for the next one.
+        """
+        if reschedule:
+            self.root.after(UI_UPDATE_INTERVAL_MS, self.process_ui_updates)
+            remaining = MAX_UI_UPDATES_PER_TICK
+        else:
+            remaining = None
+        lines = []
+        callbacks = []
+        while remaining is None or remaining > 0:
+            try:
+                kind, payload = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            if remaining is not None:
+                remaining -= 1
+            if kind == "log":
+                lines.append(payload)
+            else:
+                if lines:
+                    callbacks.append(("log", lines))
+                    lines = []
+                callbacks.append(("call", payload))
+        if lines:
+            callbacks.append(("log", lines))
+        
+        progress = self.pending_progress
+        if progress is not None:
+            self.pending_progress = None
+            maximum, value = progress
+            self.progress.config(maximum=maximum, value=value)
+        
+        status = self.pending_status
+        if status is not None:
+            self.pending_status = None
+            self.status_var.set(status)
+        
+        for kind, payload in callbacks:
+            try:
+                if kind == "log":
+                    self.show_log_lines(payload)
+                else:
+                    payload()
+            except Exception:
+                # Report it like Tk does, but keep applying the rest of the batch
+                self.root.report_callback_exception(*sys.exc_info())
+    
+    def set_run_buttons_state(self, state, include_undo=True):
+        """Enable or disable the Organize, Preview, Analyze, Watch (and Undo) buttons together."""
+        self.organize_btn.config(state=state)
+        self.preview_btn.config(state=state)
+        self.analyze_btn.config(state=state)
+        self.watch_btn.config(state=state)
+        if include_undo:
+            self.undo_btn.config(state=state)
+    
+    def restore_run_buttons(self):
+        """Re-enable the buttons after a background job, as far as they apply."""
+        self.set_run_buttons_state("normal" if self.selected_folder.get() else "disabled",
+                                   include_undo=False)
+        self.undo_btn.config(state="normal")
+    
+    def set_progress(self, processed, total_files):
+        """Store the latest progress of a worker thread for the UI."""
+        # A single tuple assignment is atomic; the UI picks up the latest value
+        self.pending_progress = (total_files, processed)
+    
+    def create_engine(self, progress=None):
+        """Create an organizer engine configured from the current settings."""
+        def update_copy_status(filename, copied, total):
+            if copied >= total:
+                self.pending_status = ""
+            else:
+                self.pending_status = (f"Copying {filename}: "
+                                       f"{copied / 1048576:.0f} / {total / 1048576:.0f} MB")
+
+        return FileOrganizer(log=self.log_message, progress=progress or self.set_progress,
+                             workers=self.config.get("move_workers", DEFAULT_MOVE_WORKERS),
+                             copy_workers=self.config.get("copy_workers", DEFAULT_COPY_WORKERS),
+                             verify=self.config.get("verify_copies", "none"),
+                             byte_progress=update_copy_status,
+                             recursive=self.config.get("recursive", False),
+                             max_depth=self.config.get("max_depth"),
+                             exclude=self.config.get("exclude_patterns", []),
+                             sniff=self.config.get("sniff_content", False),
+                             sniff_cache=self.config.get("sniff_cache", DEFAULT_SNIFF_CACHE),
+                             duplicates=self.config.get("duplicates", "off"),
+                             hash_cache=self.config.get("hash_cache", DEFAULT_HASH_CACHE),
+                             metrics=self.config.get("collect_metrics", False),
+                             conflicts=self.config.get("conflict_policy", "skip"),
+                             network=self.config.get("network_mode", False),
+                             max_in_flight=self.config.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT),
+                             dir_index=(self.config.get("dir_index", DEFAULT_DIR_INDEX)
+                                        if self.config.get("incremental_scan", False) else None),
+                             on_record=self.activity_log.write)
+    
+    def start_preview(self):
+        """Build the move plan in a separate thread and show it."""
+        if not self.selected_folder.get():
+            messagebox.showwarning("Warning", "Please select a folder first!")
+            return
+        
+        self.set_run_buttons_state("disabled")
+        thread = threading.Thread(target=self.preview_threaded)
+        thread.daemon = True
+        thread.start()
+    
+    def preview_threaded(self):
+        """Plan the organization of the selected folder (runs in separate thread)."""
+        try:
+            self.log_message("Building move plan...")
+            plan = self.create_engine().plan(self.selected_folder.get())
+            self.log_message(f"Plan ready: {len(plan)} files")
+            self.call_in_ui(lambda: PlanWindow(self.root, self, plan))
+        except Exception as e:
+            self.log_message(f"✗ Fatal error: {e}")
+            self.call_in_ui(lambda e=e: messagebox.showerror("Error", f"An error occurred: {e}"))
+        finally:
+            self.call_in_ui(self.restore_run_buttons)
+    
+    def start_analysis(self):
+        """Analyze the selected folder in a separate thread and show the report."""
         if not self.selected_folder.get():
             messagebox.showwarning("Warning", "Please select a folder first!")
             return
         
+        self.set_run_buttons_state("disabled")
+        thread = threading.Thread(target=self.analysis_threaded)
+        thread.daemon = True
+        thread.start()
+    
+    def analysis_threaded(self):
+        """Build the inventory and report of the selected folder (runs in separate thread)."""
+        try:
+            self.log_message("Analyzing folder...")
+            folder = self.selected_folder.get()
+            report = self.create_engine().inventory(folder).report()
+            self.log_message(f"Analysis ready: {report['files']} files, "
+                             f"{format_bytes(report['bytes'])}")
+            self.call_in_ui(lambda: AnalyticsWindow(self.root, self, report))
+        except Exception as e:
+            self.log_message(f"✗ Fatal error: {e}")
+            self.call_in_ui(lambda e=e: messagebox.showerror("Error", f"An error occurred: {e}"))
+        finally:
+            self.call_in_ui(self.restore_run_buttons)
+    
+    def start_organizing(self, plan=None):
+        """Start the file organization process in a separate thread.
+        
+        When a plan from the preview window is given it is executed as is
+        instead of scanning the folder again.
+        """
+        if plan is None and not self.selected_folder.get():
+            messagebox.showwarning("Warning", "Please select a folder first!")
+            return
+        
         # Disable organize button and reset progress bar
-        self.organize_btn.config(state="disabled")
+        self.set_run_buttons_state("disabled")
         self.progress['value'] = 0
         
         # Run organization in separate thread to prevent GUI freezing
-        thread = threading.Thread(target=self.organize_files_threaded)
+        thread = threading.Thread(target=self.organize_files_threaded, args=(plan,))
         thread.daemon = True
         thread.start()
     
-    def organize_files_threaded(self):
+    def organize_files_threaded(self, plan=None, resume_journal=None):
         """Organize files in the selected folder (runs in separate thread)."""
         try:
-            folder_path = self.selected_folder.get()
-            self.log_message("Starting file organization...")
-            
-            # First, count the total number of files to process
-            total_files = 0
-            for filename in os.listdir(folder_path):
-                file_path = os.path.join(folder_path, filename)
-                if os.path.isfile(file_path):
-                    total_files += 1
-            
-            if total_files == 0:
-                self.log_message("No files found to organize.")
-                self.root.after(0, lambda: messagebox.showinfo("Info", "No files found to organize in the selected folder."))
+            engine = self.create_engine()
+            journal_dir = self.config.get("journal_dir", DEFAULT_JOURNAL_DIR)
+            if resume_journal is not None:
+                summary = engine.resume(resume_journal)
+            elif plan is None and self.extra_folders:
+                self.log_message("Starting file organization...")
+                scheduler = DeviceScheduler(
+                    lambda folder, progress: self.create_engine(progress),
+                    device_workers=self.config.get("device_workers", DEFAULT_DEVICE_WORKERS),
+                    log=self.log_message, progress=self.set_progress)
+                summary = scheduler.run([self.selected_folder.get()] + self.extra_folders,
+                                        journal_dir=journal_dir)
+                for folder_summary in summary["folders"]:
+                    if "error" not in folder_summary:
+                        self.log_message(f"{folder_summary['folder']}: "
+                                         f"{folder_summary['files_moved']} moved, "
+                                         f"{folder_summary['errors']} errors")
+            else:
+                self.log_message("Starting file organization...")
+                # A preview plan is rechecked: the folder may have changed since
+                recheck = plan is not None
+                if plan is None:
+                    plan = engine.plan(self.selected_folder.get())
+                journal = None
+                if len(plan):
+                    journal = MoveJournal.create(plan, journal_dir)
+                summary = engine.execute(plan, recheck=recheck, journal=journal)
+
+            if resume_journal is None and self.config.get("archive_cold_files", False):
+                folders = [self.selected_folder.get()]
+                if "folders" in summary:
+                    folders = [folder_summary["folder"] for folder_summary in summary["folders"]
+                               if "error" not in folder_summary]
+                self.archive_cold_files(folders)
+
+            if summary["total_files"] == 0:
+                self.call_in_ui(lambda: messagebox.showinfo("Info", "No files found to organize in the selected folder."))
                 return
-            
-            # Set progress bar maximum
-            self.root.after(0, lambda: self.progress.config(maximum=total_files))
-            self.log_message(f"Found {total_files} files to organize...")
-            
-            files_moved = 0
-            errors = 0
-            processed = 0
-            
-            # Process each file in the selected folder
-            for filename in os.listdir(folder_path):
-                file_path = os.path.join(folder_path, filename)
-                
-                # Only process files, skip directories
-                if os.path.isfile(file_path):
-                    processed += 1
-                    ext = os.path.splitext(filename)[1]
-                    category = get_category(ext)
-                    
-                    target_dir = os.path.join(folder_path, category)
-                    os.makedirs(target_dir, exist_ok=True)
-                    
-                    # Move file to appropriate category folder
-                    try:
-                        shutil.move(file_path, os.path.join(target_dir, filename))
-                        self.log_message(f"✓ Moved: {filename} → {category}")
-                        files_moved += 1
-                    except Exception as e:
-                        self.log_message(f"✗ Error moving {filename}: {e}")
-                        errors += 1
-                    
-                    # Update progress bar smoothly
-                    def update_progress(value):
-                        self.progress['value'] = value
-                        self.root.update_idletasks()
-                    
-                    self.root.after(0, lambda v=processed: update_progress(v))
-                    
-                    # Small delay for smooth visual feedback (only for larger operations)
-                    if total_files > 10:
-                        import time
-                        time.sleep(0.05)  # 50ms delay for smoother animation
-            
+
+            files_moved = summary["files_moved"]
+            errors = summary["errors"]
+
             # Display completion summary
+            self.activity_log.write({"event": "summary", **summary})
             self.log_message(f"\n=== Organization Complete ===")
             self.log_message(f"Files moved: {files_moved}")
+            if summary["renamed"]:
+                self.log_message(f"Renamed to avoid a conflict: {summary['renamed']}")
+            if summary["replaced"]:
+                self.log_message(f"Replaced older files: {summary['replaced']}")
+            if summary["skipped"]:
+                self.log_message(f"Skipped (vanished since scan): {summary['skipped']}")
+            if summary["conflicts"]:
+                self.log_message(f"Not moved (name conflicts): {summary['conflicts']}")
+            if summary["already_done"]:
+                self.log_message(f"Already moved before the interruption: {summary['already_done']}")
+            if summary.get("duplicates"):
+                self.log_message(f"Duplicates found: {summary['duplicates']}")
             self.log_message(f"Errors: {errors}")
+            if "metrics" in summary:
+                self.last_metrics = summary["metrics"]
+                self.log_message("\n=== Metrics ===")
+                for line in format_metrics(summary["metrics"]):
+                    self.log_message(line)
             
             # Show success dialog in main thread
-            self.root.after(0, lambda: messagebox.showinfo(
+            self.call_in_ui(lambda: messagebox.showinfo(
                 "Complete", 
                 f"File organization completed!\n\nFiles moved: {files_moved}\nErrors: {errors}"
             ))
             
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {e}"))
             self.log_message(f"✗ Fatal error: {e}")
+            self.call_in_ui(lambda e=e: messagebox.showerror("Error", f"An error occurred: {e}"))
         
         finally:
             # Re-enable UI elements in main thread
-            self.root.after(0, self.finish_organizing)
+            self.call_in_ui(self.finish_organizing)
+    
+    def archive_cold_files(self, folders):
+        """Archive the old files of the category folders (runs in the worker thread)."""
+        archive_format = self.config.get("archive_format", "zip")
+        from archiver import ColdFileArchiver, format_available
+        if not format_available(archive_format):
+            self.log_message(f"✗ Not archiving: {archive_format} archives need the zstandard package")
+            return
+        archiver = ColdFileArchiver(days=self.config.get("archive_days", DEFAULT_ARCHIVE_DAYS),
+                                    category_days=self.config.get("archive_category_days", {}),
+                                    archive_format=archive_format, log=self.log_message,
+                                    progress=self.set_progress)
+        for folder in folders:
+            summary = archiver.run(folder, organizer.category_folders())
+            self.activity_log.write({"event": "archive", **summary})
+            if summary["archives"]:
+                self.log_message(f"Files archived: {summary['files_archived']} into "
+                                 f"{summary['archives']} archives "
+                                 f"({summary['bytes_archived'] / 1048576:.1f} MB → "
+                                 f"{summary['bytes_written'] / 1048576:.1f} MB)")
+            if summary["errors"]:
+                self.log_message(f"Archiving errors: {summary['errors']}")
+    
+    def check_interrupted_runs(self):
+        """Offer to resume an organize run that was interrupted."""
+        unfinished = find_unfinished(self.config.get("journal_dir", DEFAULT_JOURNAL_DIR))
+        if not unfinished:
+            return
+        state = JournalState(unfinished[0])
+        if messagebox.askyesno("Resume Organization",
+                               f"Organizing {state.folder} was interrupted.\n\n"
+                               "Do you want to finish it now?"):
+            self.set_run_buttons_state("disabled")
+            self.progress['value'] = 0
+            thread = threading.Thread(target=self.organize_files_threaded,
+                                      kwargs={"resume_journal": unfinished[0]})
+            thread.daemon = True
+            thread.start()
+        else:
+            # Mark it as finished so we do not ask again; it can still be undone
+            MoveJournal(unfinished[0]).close()
+    
+    def undo_last_run(self):
+        """Move the files of the most recent run back to where they were."""
+        journal_path = latest_journal(self.config.get("journal_dir", DEFAULT_JOURNAL_DIR))
+        if journal_path is None:
+            messagebox.showinfo("Undo", "There is no organize run to undo.")
+            return
+        state = JournalState(journal_path)
+        if not messagebox.askyesno("Undo", f"Move the files organized in {state.folder} "
+                                           "back to where they were?"):
+            return
+        self.set_run_buttons_state("disabled")
+        thread = threading.Thread(target=self.undo_threaded, args=(journal_path,))
+        thread.daemon = True
+        thread.start()
+    
+    def undo_threaded(self, journal_path):
+        """Undo a run recorded in a journal (runs in separate thread)."""
+        try:
+            self.log_message("Undoing last organize run...")
+            summary = undo_run(journal_path, log=self.log_message)
+            self.log_message(f"\n=== Undo Complete ===")
+            self.log_message(f"Files restored: {summary['files_restored']}")
+            if summary["not_restorable"]:
+                self.log_message(f"Not restored (they replaced an older file): "
+                                 f"{summary['not_restorable']}")
+            self.log_message(f"Errors: {summary['errors']}")
+        except Exception as e:
+            self.log_message(f"✗ Fatal error: {e}")
+            self.call_in_ui(lambda e=e: messagebox.showerror("Error", f"An error occurred: {e}"))
+        finally:
+            self.call_in_ui(self.restore_run_buttons)
+    
+    def toggle_watch(self):
+        """Start watching the selected folder, or stop if already watching."""
+        if self.watch_stop is not None:
+            self.watch_stop.set()
+            self.watch_btn.config(state="disabled")
+            self.log_message("Stopping watch mode...")
+            return
+        if not self.selected_folder.get():
+            messagebox.showwarning("Warning", "Please select a folder first!")
+            return
+        
+        # While watching only the Stop button stays active
+        self.set_run_buttons_state("disabled")
+        self.clear_btn.config(state="disabled")
+        self.watch_btn.config(text="Stop Watching", state="normal")
+        self.progress['value'] = 0
+        self.watch_stop = threading.Event()
+        thread = threading.Thread(target=self.watch_threaded, args=(self.watch_stop,))
+        thread.daemon = True
+        thread.start()
+    
+    def watch_threaded(self, stop_event):
+        """Organize the folder and then its new arrivals (runs in separate thread)."""
+        def on_batch(summary):
+            if summary["total_files"]:
+                self.log_message(f"Batch done: {summary['files_moved']} moved, "
+                                 f"{summary['errors']} errors")
+        
+        try:
+            self.create_engine().watch(
+                self.selected_folder.get(), stop_event,
+                journal_dir=self.config.get("journal_dir", DEFAULT_JOURNAL_DIR),
+                settle_seconds=self.config.get("watch_settle_seconds", DEFAULT_SETTLE_SECONDS),
+                poll_seconds=self.config.get("watch_poll_seconds", DEFAULT_POLL_SECONDS),
+                on_batch=on_batch)
+            self.log_message("Stopped watching.")
+        except Exception as e:
+            self.log_message(f"✗ Watch stopped: {e}")
+        finally:
+            self.call_in_ui(self.finish_watching)
+    
+    def finish_watching(self):
+        """Restore the UI after watch mode ends."""
+        self.watch_stop = None
+        self.watch_btn.config(text="Watch")
+        self.clear_btn.config(state="normal")
+        self.status_var.set("")
+        self.restore_run_buttons()
     
     def finish_organizing(self):
         """Re-enable UI elements after organization completes."""
         self.progress['value'] = self.progress['maximum']  # Ensure progress bar shows 100%
-        self.organize_btn.config(state="normal")
-
-
-def organize_downloads(path):
-    """Legacy function for backward compatibility."""
-    for filename in os.listdir(path):
-        file_path = os.path.join(path, filename)
-
-        if os.path.isfile(file_path):
-            ext = os.path.splitext(filename)[1]
-            category = get_category(ext)
-
-            target_dir = os.path.join(path, category)
-            os.makedirs(target_dir, exist_ok=True)
-
-            try:
-                shutil.move(file_path, os.path.join(target_dir, filename))
-                print(f"Moved: {filename} → {category}")
-            except Exception as e:
-                print(f"Error moving {filename}: {e}")
+        self.status_var.set("")
+        self.restore_run_buttons()
 
 
 if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        # Duplicate detection may start worker processes in frozen builds
+        import multiprocessing
+        multiprocessing.freeze_support()
     root = tk.Tk()
-    app = FileOrganizerGUI(root)
+    app = FileOrganizerGUI(root, measure_startup="--measure-startup" in sys.argv)
     root.mainloop()
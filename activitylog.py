@@ -0,0 +1,166 @@
+"""Persistent, structured log of everything SpringClean does.
+
+Every record is one JSON line with a timestamp, for example
+
+    {"time": "2026-10-17T09:30:12.125", "event": "file", "source": "...",
+     "destination": "...", "category": "DOCUMENTS", "bytes": 5120,
+     "outcome": "moved"}
+
+File records come from FileOrganizer's ``on_record`` callback; "message"
+records hold the lines shown in the app's log. Records are serialized by
+the caller and written by a background thread, so logging only waits for
+the disk when more than ``MAX_QUEUED_RECORDS`` are waiting.
+The log rotates when it reaches ``max_bytes``: springclean.log is the
+newest file, springclean.log.1 the one before it, and so on up to
+``backups`` old files.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import shutil
+import threading
+
+# Default folder of the log files, next to config.json
+DEFAULT_LOG_DIR = "logs"
+
+LOG_NAME = "springclean.log"
+
+# Size at which the log rotates, and how many old files are kept
+MAX_LOG_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# Records written per batch before the file is flushed
+WRITE_BATCH_SIZE = 1000
+
+# Records waiting to be written before write() blocks
+MAX_QUEUED_RECORDS = 100000
+
+
+def format_time(timestamp):
+    """Return a local ISO 8601 time with milliseconds."""
+    return (time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp))
+            + f".{int(timestamp * 1000) % 1000:03d}")
+
+
+class ActivityLog:
+    """Rotating JSON-lines log written by a background thread."""
+
+    def __init__(self, log_dir=DEFAULT_LOG_DIR, max_bytes=MAX_LOG_BYTES, backups=LOG_BACKUPS,
+                 on_error=None):
+        """Create the log; the folder and the writer thread are created with the first record.
+
+        ``on_error(message)`` is called from the writer thread when the log
+        cannot be written, once until writing works again; by default the
+        message goes to stderr.
+        """
+        self.log_dir = log_dir
+        self.path = os.path.join(log_dir, LOG_NAME)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.on_error = on_error or (lambda message: print(message, file=sys.stderr))
+        self.errors = 0
+        self.queue = queue.Queue(MAX_QUEUED_RECORDS)
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        """Queue a record (a JSON-serializable dict); its time is taken now.
+
+        The record is serialized right away, so a value that cannot be
+        raises here (TypeError or ValueError) instead of in the writer thread.
+        """
+        if "time" not in record:
+            record = {"time": format_time(time.time()), **record}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self.run, name="springclean-log",
+                                                   daemon=True)
+                    self.thread.start()
+        self.queue.put(line)
+
+    def message(self, text):
+        """Queue a plain log line."""
+        self.write({"event": "message", "message": text})
+
+    def run(self):
+        """Write queued records in batches until close() is called."""
+        stream = None
+        try:
+            while True:
+                records = [self.queue.get()]
+                while len(records) < WRITE_BATCH_SIZE:
+                    try:
+                        records.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in records
+                try:
+                    if stream is None:
+                        os.makedirs(self.log_dir, exist_ok=True)
+                        stream = open(self.path, "a", encoding="utf-8")
+                    stream.write("".join(line for line in records if line is not None))
+                    stream.flush()
+                    if stream.tell() >= self.max_bytes:
+                        stream.close()
+                        stream = None
+                        self.rotate()
+                except OSError as e:
+                    if stream is not None:
+                        try:
+                            stream.close()
+                        except OSError:
+                            pass
+                        stream = None
+                    self.errors += 1
+                    if self.errors == 1:
+                        self.on_error(f"✗ Could not write log {self.path}: {e}")
+                else:
+                    self.errors = 0
+                finally:
+                    for _ in records:
+                        self.queue.task_done()
+                if stop:
+                    return
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def rotate(self):
+        """Shift springclean.log to .1, .1 to .2 and so on, dropping the oldest."""
+        for number in range(self.backups, 0, -1):
+            older = f"{self.path}.{number}"
+            newer = f"{self.path}.{number - 1}" if number > 1 else self.path
+            if os.path.exists(newer):
+                os.replace(newer, older)
+        if not self.backups:
+            os.remove(self.path)
+
+    def paths(self):
+        """Return the existing log files, oldest first."""
+        candidates = [f"{self.path}.{number}" for number in range(self.backups, 0, -1)]
+        candidates.append(self.path)
+        return [path for path in candidates if os.path.exists(path)]
+
+    def flush(self):
+        """Wait until every queued record is written."""
+        if self.thread is not None:
+            self.queue.join()
+
+    def export(self, path):
+        """Write the whole history, oldest record first, into one file."""
+        self.flush()
+        with open(path, "wb") as output:
+            for log_path in self.paths():
+                with open(log_path, "rb") as f:
+                    shutil.copyfileobj(f, output)
+
+    def close(self):
+        """Write what is queued and stop the writer thread."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,261 @@
+"""Folder analytics: where the space goes, before anything is moved.
+
+A FolderInventory is filled from a scan (see FileOrganizer.inventory) and
+stores one row per file in parallel arrays: size, mtime, an interned
+category code and an interned extension code, about 24 bytes per file, so
+folders with millions of files fit in little memory. Only the paths of the
+largest files are kept, in a bounded heap.
+
+report() computes every aggregate (bytes and files per category, an age
+histogram, the extensions that end up in OTHERS) in whole-array passes,
+with NumPy when it is installed and plain loops over the arrays otherwise.
+Reports can be exported to JSON or CSV.
+"""
+import os
+import csv
+import heapq
+import bisect
+import json
+import time
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    # The report is then computed with plain loops, with the same result
+    numpy = None
+
+from defaults import DEFAULT_TOP_FILES
+from metrics import format_bytes
+
+# Age histogram buckets: (label, upper bound in days; None for the rest)
+AGE_BUCKETS = (
+    ("under 1 week", 7),
+    ("1 week - 1 month", 30),
+    ("1 - 3 months", 91),
+    ("3 - 12 months", 365),
+    ("1 - 2 years", 730),
+    ("2 - 5 years", 1826),
+    ("over 5 years", None),
+)
+
+# Extension code of files without an extension
+NO_EXTENSION = ""
+
+REPORT_FORMAT_VERSION = 1
+
+_DAY_SECONDS = 86400
+
+
+class FolderInventory:
+    """Column-wise inventory of the files in a folder tree."""
+
+    def __init__(self, folder, top=DEFAULT_TOP_FILES):
+        """Create an empty inventory that keeps the ``top`` largest files."""
+        self.folder = folder
+        self.top = top
+        self.created = time.time()
+        self.category_names = []
+        self._category_codes = {}
+        self.extension_names = []
+        self._extension_codes = {}
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        # Fewer than 65536 categories, so two bytes per file are enough
+        self.category_codes = array("H")
+        self.extension_codes = array("I")
+        # (size, path, category) min-heap of the largest files
+        self.largest = []
+        self.unreadable = 0
+
+    def __len__(self):
+        """Return the number of files in the inventory."""
+        return len(self.sizes)
+
+    def intern(self, names, codes, name):
+        """Return the code of a category or extension, assigning the next free one."""
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    def add(self, entry, category, extension=None):
+        """Add a scanned file (a DirEntry-like object) and its category.
+
+        ``extension`` is the suffix the file was classified by, such as
+        ".tar.gz" (see CategoryIndex.extension_for); by default the last one.
+        """
+        try:
+            st = entry.stat()
+        except OSError:
+            # Vanished or unreadable since it was listed
+            self.unreadable += 1
+            return
+        size = st.st_size
+        if extension is None:
+            name = entry.name.lower()
+            dot = name.rfind(".")
+            extension = name[dot:] if dot > 0 else NO_EXTENSION
+        self.sizes.append(size)
+        self.mtimes.append(int(st.st_mtime))
+        self.category_codes.append(self.intern(self.category_names, self._category_codes,
+                                               category))
+        self.extension_codes.append(self.intern(self.extension_names, self._extension_codes,
+                                                extension))
+        if len(self.largest) < self.top:
+            heapq.heappush(self.largest, (size, entry.path, category))
+        elif self.top and size > self.largest[0][0]:
+            heapq.heapreplace(self.largest, (size, entry.path, category))
+
+    def report(self, now=None):
+        """Return the aggregates of the inventory as a JSON-serializable dict."""
+        now = time.time() if now is None else now
+        if numpy is not None and len(self):
+            categories, ages, extensions = self._aggregate_numpy(now)
+        else:
+            categories, ages, extensions = self._aggregate_arrays(now)
+        others = self._category_codes.get("OTHERS")
+        return {
+            "version": REPORT_FORMAT_VERSION,
+            "folder": self.folder,
+            "created": self.created,
+            "files": len(self),
+            "bytes": sum(files_bytes[1] for files_bytes in categories),
+            "unreadable": self.unreadable,
+            "categories": _ranked(self.category_names, categories),
+            "ages": [{"age": label, "files": files, "bytes": size}
+                     for (label, _), (files, size) in zip(AGE_BUCKETS, ages)],
+            "others": (_ranked(self.extension_names, extensions[others])
+                       if others is not None else []),
+            "largest": [{"path": path, "category": category, "bytes": size}
+                        for size, path, category in sorted(self.largest, reverse=True)],
+        }
+
+    def _age_bounds(self, now):
+        """Return the mtimes at which the age buckets end, newest first."""
+        return [now - days * _DAY_SECONDS for _, days in AGE_BUCKETS if days is not None]
+
+    def _aggregate_numpy(self, now):
+        """Return (per-category, per-age, per-category-per-extension) (files, bytes) with NumPy."""
+        # The arrays are viewed in place, not copied
+        sizes = numpy.frombuffer(self.sizes, dtype=numpy.int64)
+        mtimes = numpy.frombuffer(self.mtimes, dtype=numpy.int64)
+        codes = numpy.frombuffer(self.category_codes, dtype=numpy.uint16)
+        extensions = numpy.frombuffer(self.extension_codes, dtype=numpy.uint32)
+
+        def totals(keys, count, mask=None):
+            if mask is not None:
+                keys = keys[mask]
+            files = numpy.bincount(keys, minlength=count)
+            weights = sizes if mask is None else sizes[mask]
+            size = numpy.bincount(keys, weights=weights, minlength=count)
+            return [(int(f), int(s)) for f, s in zip(files, size)]
+
+        # A file's bucket is the number of bucket ends newer than its mtime
+        bounds = numpy.array(self._age_bounds(now)[::-1])
+        buckets = len(bounds) - numpy.searchsorted(bounds, mtimes, side="right")
+        categories = totals(codes, len(self.category_names))
+        ages = totals(buckets, len(AGE_BUCKETS))
+        by_extension = {}
+        others = self._category_codes.get("OTHERS")
+        if others is not None:
+            by_extension[others] = totals(extensions, len(self.extension_names), codes == others)
+        return categories, ages, by_extension
+
+    def _aggregate_arrays(self, now):
+        """Return the same aggregates as _aggregate_numpy with plain loops."""
+        category_files = [0] * len(self.category_names)
+        category_bytes = [0] * len(self.category_names)
+        for code, size in zip(self.category_codes, self.sizes):
+            category_files[code] += 1
+            category_bytes[code] += size
+
+        bounds = self._age_bounds(now)[::-1]
+        last = len(bounds)
+        age_files = [0] * len(AGE_BUCKETS)
+        age_bytes = [0] * len(AGE_BUCKETS)
+        for mtime, size in zip(self.mtimes, self.sizes):
+            bucket = last - bisect.bisect_right(bounds, mtime)
+            age_files[bucket] += 1
+            age_bytes[bucket] += size
+
+        by_extension = {}
+        others = self._category_codes.get("OTHERS")
+        if others is not None:
+            files = [0] * len(self.extension_names)
+            size_sum = [0] * len(self.extension_names)
+            for code, extension, size in zip(self.category_codes, self.extension_codes,
+                                             self.sizes):
+                if code == others:
+                    files[extension] += 1
+                    size_sum[extension] += size
+            by_extension[others] = list(zip(files, size_sum))
+        return (list(zip(category_files, category_bytes)), list(zip(age_files, age_bytes)),
+                by_extension)
+
+
+def _ranked(names, totals):
+    """Return [{"name", "files", "bytes"}] for names with files, largest first."""
+    rows = [{"name": name or "(no extension)", "files": files, "bytes": size}
+            for name, (files, size) in zip(names, totals) if files]
+    rows.sort(key=lambda row: (-row["bytes"], -row["files"], row["name"]))
+    return rows
+
+
+def report_to_json(report, path):
+    """Write a report as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+
+def report_to_csv(report, path):
+    """Write a report as CSV, one row per category, age bucket, extension and large file."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["section", "name", "files", "bytes"])
+        for row in report["categories"]:
+            writer.writerow(["category", row["name"], row["files"], row["bytes"]])
+        for row in report["ages"]:
+            writer.writerow(["age", row["age"], row["files"], row["bytes"]])
+        for row in report["others"]:
+            writer.writerow(["others_extension", row["name"], row["files"], row["bytes"]])
+        for row in report["largest"]:
+            writer.writerow(["largest", row["path"], 1, row["bytes"]])
+
+
+def export_report(report, path):
+    """Write a report as CSV if the path ends in .csv, otherwise as JSON."""
+    if path.lower().endswith(".csv"):
+        report_to_csv(report, path)
+    else:
+        report_to_json(report, path)
+
+
+def format_report(report):
+    """Return a report as human readable lines."""
+    lines = [f"{report['files']} files, {format_bytes(report['bytes'])} in {report['folder']}"]
+    if report["unreadable"]:
+        lines.append(f"Unreadable: {report['unreadable']} files")
+    lines.append("")
+    lines.append("By category:")
+    for row in report["categories"]:
+        lines.append(f"  {row['name']:<20} {row['files']:>10} files  {format_bytes(row['bytes']):>10}")
+    lines.append("")
+    lines.append("By age (last modified):")
+    for row in report["ages"]:
+        lines.append(f"  {row['age']:<20} {row['files']:>10} files  {format_bytes(row['bytes']):>10}")
+    if report["others"]:
+        lines.append("")
+        lines.append("OTHERS by extension:")
+        for row in report["others"]:
+            lines.append(f"  {row['name']:<20} {row['files']:>10} files  "
+                         f"{format_bytes(row['bytes']):>10}")
+    if report["largest"]:
+        lines.append("")
+        lines.append("Largest files:")
+        folder = os.path.join(report["folder"], "")
+        for row in report["largest"]:
+            path = row["path"][len(folder):] if row["path"].startswith(folder) else row["path"]
+            lines.append(f"  {format_bytes(row['bytes']):>10}  {path} ({row['category']})")
+    return lines
@@ -0,0 +1,572 @@
+"""Archive cold files of the category folders into compressed bundles.
+
+After organizing, the files of a category folder that were not modified
+for longer than that category's threshold are packed into one archive per
+category and month of their modification time:
+
+    FOLDER/ARCHIVE/IMAGES/2025-03.zip
+
+Every bundle is written by one thread of a pool, so bundles are compressed
+in parallel (zlib and zstd release the GIL while they work). Files are
+streamed through in COPY_CHUNK_SIZE pieces, so memory use does not grow
+with file size.
+
+Next to every archive, ARCHIVE.manifest.json lists its files with their
+original path, size, modification time, digest and the byte range of
+their data in the archive, so one file can be extracted by seeking straight
+to it. Zip archives keep their usual layout. A .tar.zst archive is a tar
+stream in which every file is its own zstd frame. Any zstd and tar tool can
+unpack it, and extract() can decompress a single frame.
+
+An archive is written under a temporary name and then read back through
+its manifest and checked against the digests taken while writing. Only
+then is it renamed into place and are the originals removed, except those
+that changed in the meantime.
+
+tar.zst needs the zstandard package (or Python 3.14's compression.zstd).
+"""
+import os
+import json
+import stat
+import time
+import zlib
+import struct
+import hashlib
+import tarfile
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from mover import COPY_CHUNK_SIZE
+from destinations import free_name
+from defaults import (ARCHIVE_FOLDER, ARCHIVE_FORMATS, DEFAULT_ARCHIVE_DAYS,
+                      DEFAULT_ARCHIVE_WORKERS)
+
+# zstd compression level of tar.zst archives
+ZSTD_LEVEL = 9
+
+# Compressed bytes read at a time when extracting (bounds the memory used)
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+
+# Suffixes of the manifest and of an archive that is still being written
+MANIFEST_SUFFIX = ".manifest.json"
+PART_SUFFIX = ".part"
+
+MANIFEST_FORMAT_VERSION = 1
+
+# Already compressed formats, stored in zip archives without deflating again
+STORED_EXTENSIONS = {".zip", ".7z", ".rar", ".gz", ".bz2", ".xz", ".zst", ".jpg", ".jpeg",
+                     ".png", ".gif", ".webp", ".heic", ".mp3", ".m4a", ".aac", ".ogg", ".flac",
+                     ".mp4", ".mkv", ".mov", ".avi", ".webm", ".docx", ".xlsx", ".pptx", ".epub",
+                     ".apk", ".jar"}
+
+# Zip local file header: signature, versions, flags, method, time, date,
+# CRC, sizes, name length and extra field length
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+
+def archive_extension(archive_format):
+    """Return the file name extension of an archive format."""
+    return f".{archive_format}"
+
+
+def split_archive_name(name):
+    """Split an archive name into stem and extension, keeping ".tar.zst" whole."""
+    for archive_format in ARCHIVE_FORMATS:
+        extension = archive_extension(archive_format)
+        if name.endswith(extension):
+            return name[:-len(extension)], extension
+    return os.path.splitext(name)
+
+
+def _zstd():
+    """Return the zstd module in use, or None if there is none."""
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def format_available(archive_format):
+    """Return True if archives of the given format can be written here."""
+    return archive_format == "zip" or (archive_format == "tar.zst" and _zstd() is not None)
+
+
+def zstd_frame_writer(level=ZSTD_LEVEL):
+    """Return (compress, finish) functions for one zstd frame."""
+    zstd = _zstd()
+    if zstd is None:
+        raise RuntimeError("tar.zst archives need the zstandard package")
+    if hasattr(zstd, "ZstdCompressor") and hasattr(zstd.ZstdCompressor, "FLUSH_FRAME"):
+        compressor = zstd.ZstdCompressor(level)
+        return compressor.compress, lambda: compressor.flush(zstd.ZstdCompressor.FLUSH_FRAME)
+    compressor = zstd.ZstdCompressor(level=level).compressobj()
+    return compressor.compress, compressor.flush
+
+
+def zstd_reader(fileobj):
+    """Return a file object decompressing zstd data read from ``fileobj``."""
+    zstd = _zstd()
+    if zstd is None:
+        raise RuntimeError("tar.zst archives need the zstandard package")
+    if hasattr(zstd, "ZstdFile"):
+        return zstd.ZstdFile(fileobj)
+    return zstd.ZstdDecompressor().stream_reader(fileobj, closefd=False)
+
+
+def manifest_path(archive_path):
+    """Return the path of an archive's manifest."""
+    return archive_path + MANIFEST_SUFFIX
+
+
+def read_manifest(archive_path):
+    """Load the manifest of an archive."""
+    with open(manifest_path(archive_path), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _fsync_path(path):
+    """Flush a file, or the entries of a folder, to disk."""
+    if os.name == "nt":
+        if os.path.isdir(path):
+            # Folders cannot be opened for flushing on Windows; NTFS journals renames
+            return
+        flags = os.O_RDWR | os.O_BINARY
+    else:
+        flags = os.O_RDONLY
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_manifest(archive_path, manifest):
+    """Write a manifest through a temporary file, so it is never half written."""
+    path = manifest_path(archive_path)
+    temp_path = path + PART_SUFFIX
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def _iter_zip_data(f, entry, archive_path):
+    """Yield the decompressed data of the zip entry whose local header is at f."""
+    header = _ZIP_LOCAL_HEADER.unpack(f.read(_ZIP_LOCAL_HEADER.size))
+    if header[0] != b"PK\x03\x04":
+        raise ValueError(f"no zip entry at offset {entry['offset']} of {archive_path}")
+    f.seek(header[9] + header[10], os.SEEK_CUR)
+    remaining = entry["length"]
+    decompressor = (zlib.decompressobj(-zlib.MAX_WBITS) if entry["method"] == zipfile.ZIP_DEFLATED
+                    else None)
+    while True:
+        data = decompressor.unconsumed_tail if decompressor is not None else b""
+        if not data:
+            data = f.read(min(EXTRACT_CHUNK_SIZE, remaining))
+            remaining -= len(data)
+            if not data:
+                return
+        if decompressor is None:
+            yield data
+        else:
+            # Bounded output, however well the data was compressed
+            yield decompressor.decompress(data, EXTRACT_CHUNK_SIZE)
+            if decompressor.eof:
+                return
+
+
+def _iter_zst_data(f, entry):
+    """Yield the data of the tar.zst entry whose zstd frame starts at f."""
+    reader = zstd_reader(f)
+    skip = entry["data_offset"]
+    while skip:
+        # Tar header blocks in front of the data
+        header = reader.read(skip)
+        if not header:
+            return
+        skip -= len(header)
+    while True:
+        data = reader.read(EXTRACT_CHUNK_SIZE)
+        if not data:
+            return
+        yield data
+
+
+def iter_member(archive_path, entry, archive_format):
+    """Yield the content of one archived file, found through its manifest entry."""
+    with open(archive_path, "rb") as f:
+        f.seek(entry["offset"])
+        chunks = (_iter_zip_data(f, entry, archive_path) if archive_format == "zip"
+                  else _iter_zst_data(f, entry))
+        remaining = entry["size"]
+        for data in chunks:
+            if not remaining:
+                break
+            data = data[:remaining]
+            remaining -= len(data)
+            yield data
+        if remaining:
+            raise ValueError(f"{entry['name']} is truncated in {archive_path}")
+
+
+def extract(archive_path, name, destination=None):
+    """Extract one file of an archive and return the path it was written to.
+
+    ``name`` is the file's name in the archive or its original path. The
+    file is restored to its original path unless ``destination`` (a file
+    or an existing folder) is given; an existing file is never replaced.
+    Only the file's own bytes are read from the archive.
+    """
+    manifest = read_manifest(archive_path)
+    entry = next((entry for entry in manifest["files"]
+                  if name in (entry["name"], entry["source"])), None)
+    if entry is None:
+        raise KeyError(f"{name} is not in {archive_path}")
+    if destination is None:
+        destination = entry["source"]
+    elif os.path.isdir(destination):
+        destination = os.path.join(destination, os.path.basename(entry["name"]))
+    os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+
+    digest = hashlib.blake2b()
+    output = open(destination, "xb")
+    try:
+        with output:
+            for data in iter_member(archive_path, entry, manifest["format"]):
+                digest.update(data)
+                output.write(data)
+        if digest.hexdigest() != entry["digest"]:
+            raise ValueError(f"{entry['name']} does not match its digest in {archive_path}")
+    except BaseException:
+        os.unlink(destination)
+        raise
+    os.utime(destination, (entry["mtime"], entry["mtime"]))
+    return destination
+
+
+class _ZipBundle:
+    """Writes files into a zip archive."""
+
+    def __init__(self, path):
+        self.zip = zipfile.ZipFile(path, "w", allowZip64=True)
+
+    def add(self, name, source, st):
+        """Stream one open file into the archive; return (entry fields, digest)."""
+        info = zipfile.ZipInfo(name, time.localtime(max(st.st_mtime, 315532800))[:6])
+        info.external_attr = (st.st_mode & 0xFFFF) << 16
+        info.file_size = st.st_size
+        extension = os.path.splitext(name)[1].lower()
+        info.compress_type = (zipfile.ZIP_STORED if extension in STORED_EXTENSIONS
+                              else zipfile.ZIP_DEFLATED)
+        digest = hashlib.blake2b()
+        size = 0
+        with self.zip.open(info, "w") as member:
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                member.write(chunk)
+                size += len(chunk)
+        return {"offset": info.header_offset, "length": info.compress_size,
+                "method": info.compress_type, "size": size}, digest
+
+    def close(self):
+        self.zip.close()
+
+
+class _TarZstBundle:
+    """Writes files into a tar stream with one zstd frame per file."""
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+
+    def add(self, name, source, st):
+        """Stream one open file into the archive; return (entry fields, digest)."""
+        info = tarfile.TarInfo(name)
+        info.size = st.st_size
+        info.mtime = st.st_mtime
+        info.mode = stat.S_IMODE(st.st_mode)
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        offset = self.file.tell()
+        compress, finish = zstd_frame_writer()
+        self.file.write(compress(header))
+        digest = hashlib.blake2b()
+        remaining = st.st_size
+        try:
+            while remaining:
+                chunk = source.read(min(COPY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                self.file.write(compress(chunk))
+                remaining -= len(chunk)
+        finally:
+            # The header promised st_size bytes, so a file that shrank or
+            # failed to read is padded to keep the tar stream intact (and,
+            # having changed, it is not removed)
+            padding = remaining + (-st.st_size % tarfile.BLOCKSIZE)
+            while padding:
+                zeros = min(padding, COPY_CHUNK_SIZE)
+                self.file.write(compress(bytes(zeros)))
+                padding -= zeros
+            self.file.write(finish())
+        return {"offset": offset, "length": self.file.tell() - offset,
+                "data_offset": len(header), "size": st.st_size - remaining}, digest
+
+    def close(self):
+        # End of archive: two empty blocks, in a frame of their own
+        compress, finish = zstd_frame_writer()
+        self.file.write(compress(bytes(2 * tarfile.BLOCKSIZE)) + finish())
+        self.file.close()
+
+
+class ColdFileArchiver:
+    """Pack files that were not modified for a while into compressed archives.
+
+    ``days`` is the age in days after which a file is archived, and
+    ``category_days`` ({category: days}) overrides it per category; 0 (or
+    None) leaves a category alone. ``archive_format`` is one of
+    ARCHIVE_FORMATS. With ``dry_run`` cold files are only reported.
+
+    ``log(message)`` is called from the calling thread, and
+    ``progress(processed, total)`` (in files) from the worker threads.
+    """
+
+    def __init__(self, days=DEFAULT_ARCHIVE_DAYS, category_days=None, archive_format="zip",
+                 workers=DEFAULT_ARCHIVE_WORKERS, dry_run=False, log=None, progress=None):
+        """Initialize the archiver."""
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"unknown archive format: {archive_format}")
+        self.days = days
+        self.category_days = dict(category_days or {})
+        self.archive_format = archive_format
+        self.workers = max(1, int(workers))
+        self.dry_run = dry_run
+        self.log = log or (lambda message: None)
+        self.progress = progress or (lambda processed, total: None)
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.total = 0
+
+    def threshold(self, category):
+        """Return the age in seconds after which files of a category are archived, or None."""
+        days = self.category_days.get(category, self.days)
+        return days * 86400 if days else None
+
+    def find_cold(self, folder_path, categories, now=None):
+        """Return {(category, "YYYY-MM"): [(path, name in archive, stat)]}.
+
+        Category folders are searched recursively; symbolic links are left
+        alone.
+        """
+        now = time.time() if now is None else now
+        bundles = {}
+        for category in categories:
+            age = self.threshold(category)
+            root = os.path.join(folder_path, category)
+            if age is None or not os.path.isdir(root):
+                continue
+            pending = [root]
+            while pending:
+                directory = pending.pop()
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                            if now - st.st_mtime < age:
+                                continue
+                            month = time.strftime("%Y-%m", time.localtime(st.st_mtime))
+                            name = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                            bundles.setdefault((category, month), []).append((entry.path, name, st))
+                except OSError as e:
+                    self.log(f"✗ Could not list {directory}: {e}")
+        for files in bundles.values():
+            files.sort(key=lambda item: item[1])
+        return bundles
+
+    def archive_path(self, folder_path, category, month):
+        """Return a free path for a new archive of a category and month."""
+        archive_dir = os.path.join(folder_path, ARCHIVE_FOLDER, category)
+        name = month + archive_extension(self.archive_format)
+        taken = set()
+        if os.path.isdir(archive_dir):
+            taken = {os.path.normcase(split_name)
+                     for existing in os.listdir(archive_dir)
+                     for split_name in (existing, existing.removesuffix(MANIFEST_SUFFIX),
+                                        existing.removesuffix(PART_SUFFIX))}
+        if os.path.normcase(name) in taken:
+            name = free_name(name, taken, split=split_archive_name)
+            if name is None:
+                raise FileExistsError(f"no free archive name left in {archive_dir}")
+        return os.path.join(archive_dir, name)
+
+    def advance(self, files):
+        """Count archived (or failed) files and report progress."""
+        with self.lock:
+            self.processed += files
+            processed, total = self.processed, self.total
+        self.progress(processed, total)
+
+    def write_bundle(self, folder_path, archive_path, category, month, files):
+        """Archive a list of files, verify the archive and remove the originals.
+
+        Runs on a worker thread; returns a summary of the bundle, whose
+        "archive" is None if none of the files could be read.
+        """
+        result = {"archive": archive_path, "category": category, "files": 0, "bytes": 0,
+                  "bytes_written": 0, "kept": 0, "errors": 0, "messages": []}
+        part_path = archive_path + PART_SUFFIX
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        entries = []
+        archived = []
+        try:
+            bundle = (_ZipBundle if self.archive_format == "zip" else _TarZstBundle)(part_path)
+            try:
+                for path, name, _ in files:
+                    try:
+                        with open(path, "rb") as source:
+                            st = os.fstat(source.fileno())
+                            fields, digest = bundle.add(name, source, st)
+                    except OSError as e:
+                        result["errors"] += 1
+                        result["messages"].append(f"✗ Could not archive {path}: {e}")
+                        self.advance(1)
+                        continue
+                    entries.append(dict(fields, name=name, source=path, mtime=st.st_mtime,
+                                        digest=digest.hexdigest()))
+                    archived.append((path, st))
+            finally:
+                bundle.close()
+            if not entries:
+                os.unlink(part_path)
+                result["archive"] = None
+                return result
+
+            # Read every file back through the manifest before anything is removed
+            for entry in entries:
+                digest = hashlib.blake2b()
+                for data in iter_member(part_path, entry, self.archive_format):
+                    digest.update(data)
+                if digest.hexdigest() != entry["digest"]:
+                    raise ValueError(f"{entry['name']} does not match its copy in the archive")
+            # The read-back may come from the page cache; make sure the archive, its
+            # manifest and their names are on disk before any original is removed
+            _fsync_path(part_path)
+            _write_manifest(archive_path, {
+                "version": MANIFEST_FORMAT_VERSION, "format": self.archive_format,
+                "category": category, "month": month, "created": time.time(), "files": entries})
+            os.replace(part_path, archive_path)
+            _fsync_path(os.path.dirname(archive_path))
+        except BaseException:
+            for path in (part_path, manifest_path(archive_path)):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            raise
+
+        result["bytes_written"] = os.path.getsize(archive_path)
+        for entry, (path, st) in zip(entries, archived):
+            try:
+                current = os.stat(path, follow_symlinks=False)
+                if (current.st_size, current.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+                    # Changed while it was archived; the archive has an older copy
+                    result["kept"] += 1
+                else:
+                    os.unlink(path)
+                    result["files"] += 1
+                    result["bytes"] += entry["size"]
+                    self._remove_empty_dirs(os.path.dirname(path),
+                                            os.path.join(folder_path, category))
+            except OSError as e:
+                result["errors"] += 1
+                result["messages"].append(f"✗ Could not remove {path} after archiving: {e}")
+            self.advance(1)
+        return result
+
+    def _remove_empty_dirs(self, directory, root):
+        """Remove the folders below ``root`` that archiving emptied."""
+        while directory != root and directory.startswith(root):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
+
+    def run(self, folder_path, categories, now=None):
+        """Archive the cold files of the given category folders; return a summary."""
+        folder_path = os.path.abspath(folder_path)
+        bundles = self.find_cold(folder_path, categories, now)
+        summary = {"folder": folder_path, "dry_run": self.dry_run, "format": self.archive_format,
+                   "archives": 0, "files_archived": 0, "bytes_archived": 0, "bytes_written": 0,
+                   "kept": 0, "errors": 0, "categories": {}}
+        self.processed = 0
+        self.total = sum(len(files) for files in bundles.values())
+        if not bundles:
+            self.log("No files old enough to archive.")
+            return summary
+        self.log(f"Archiving {self.total} files into {len(bundles)} archives...")
+
+        if self.dry_run:
+            for (category, month), files in sorted(bundles.items()):
+                size = sum(st.st_size for _, _, st in files)
+                self.log(f"✓ Would archive: {len(files)} files of {category} from {month} "
+                         f"({size / 1048576:.1f} MB)")
+                summary["archives"] += 1
+                summary["files_archived"] += len(files)
+                summary["bytes_archived"] += size
+                summary["categories"][category] = summary["categories"].get(category, 0) + len(files)
+            return summary
+
+        futures = {}
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="springclean-archive") as pool:
+            for (category, month), files in sorted(bundles.items()):
+                try:
+                    archive_path = self.archive_path(folder_path, category, month)
+                except OSError as e:
+                    self.log(f"✗ Could not archive {category} from {month}: {e}")
+                    summary["errors"] += len(files)
+                    continue
+                future = pool.submit(self.write_bundle, folder_path, archive_path, category, month,
+                                     files)
+                futures[future] = (category, month, files)
+            for future in as_completed(futures):
+                category, month, files = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.log(f"✗ Could not archive {category} from {month}: {e}")
+                    summary["errors"] += len(files)
+                    self.advance(len(files))
+                    continue
+                for message in result["messages"]:
+                    self.log(message)
+                summary["errors"] += result["errors"]
+                if result["archive"] is None:
+                    continue
+                summary["archives"] += 1
+                summary["files_archived"] += result["files"]
+                summary["bytes_archived"] += result["bytes"]
+                summary["bytes_written"] += result["bytes_written"]
+                summary["kept"] += result["kept"]
+                summary["categories"][category] = (summary["categories"].get(category, 0)
+                                                   + result["files"])
+                self.log(f"✓ Archived: {result['files']} files of {category} from {month} → "
+                         f"{os.path.relpath(result['archive'], folder_path)} "
+                         f"({result['bytes'] / 1048576:.1f} MB → "
+                         f"{result['bytes_written'] / 1048576:.1f} MB)")
+        return summary
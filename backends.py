@@ -0,0 +1,626 @@
+"""File-system backends the organizer runs on.
+
+The organizer, the walker, the destination index, content sniffing and
+duplicate detection list, stat, create, move and read files only through a
+backend object, so the same engine can organize:
+
+* LocalBackend: the local file system (the default, defined in localfs.py
+  so the engine can use it without importing the other backends).
+  Listings are os.scandir entries, which carry file types (and on Windows
+  stat results) from the listing itself, moves go through mover.move_file
+  (a rename on the same drive, kernel copies across drives), and sniffing
+  reads file heads with a single os.read.
+* MemoryBackend: a file tree kept in memory that can hold millions of
+  entries, with optional latency and random failures, for profiling (see
+  benchmark.py --backend memory).
+* ArchiveBackend: the files of a zip or tar archive, organized into a
+  folder on another backend without changing the archive.
+
+Paths are absolute, in the local path syntax. A backend has these methods,
+and reports failures as OSError like the os functions do:
+
+    scandir(path)                     DirEntry-like objects with name, path,
+                                      is_file(), is_dir(), is_symlink(),
+                                      stat() and inode()
+    stat(path, follow_symlinks=True)  an os.stat_result
+    listdir(path)                     the names in a folder
+    lexists(path)                     True if anything is at the path
+    makedirs(path)                    create a folder and its parents if missing
+    move(src, dst, src_dev=None, dst_dev=None, verify="none", progress=None,
+         replace=False)               move a file, like mover.move_file
+    link(src, dst), unlink(path)      hard link and remove a file
+    open(path)                        a binary file object for reading
+    head(path, size)                  the first ``size`` bytes of a file
+    write(path, stream, replace=False)
+                                      create a file from a readable binary
+                                      stream; FileExistsError if the path is
+                                      taken and ``replace`` is not set
+
+``local`` is True only for the local file system, where work may be handed
+to other processes.
+"""
+import io
+import os
+import stat
+import time
+import errno
+import random
+import tarfile
+import zipfile
+import threading
+
+from mover import COPY_CHUNK_SIZE, VerificationError
+from localfs import LOCAL, LocalBackend
+
+# st_dev reported by in-memory trees unless another one is given
+MEMORY_DEVICE = -1
+
+# Inode numbers of archive members start here, away from real ones
+ARCHIVE_INODE_BASE = 1 << 48
+
+
+def make_stat(mode, ino, dev, size, mtime_ns):
+    """Return an os.stat_result for a file or folder that is not on disk."""
+    seconds = mtime_ns / 1e9
+    return os.stat_result((mode, ino, dev, 1, 0, 0, size, int(seconds), int(seconds), int(seconds),
+                           seconds, seconds, seconds, mtime_ns, mtime_ns, mtime_ns))
+
+
+class Listing(list):
+    """Entries of a folder, usable like the iterator os.scandir returns."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Nothing to release; present for os.scandir compatibility."""
+
+
+class _MemoryFile:
+    """A file of a MemoryBackend; ``data`` None means generated content."""
+
+    __slots__ = ("ino", "size", "mtime_ns", "data")
+
+    def __init__(self, ino, size, mtime_ns, data=None):
+        self.ino = ino
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.data = data
+
+
+class _MemoryDir:
+    """A folder of a MemoryBackend: its children by name."""
+
+    __slots__ = ("ino", "mtime_ns", "children")
+
+    def __init__(self, ino, mtime_ns):
+        self.ino = ino
+        self.mtime_ns = mtime_ns
+        self.children = {}
+
+
+class MemoryEntry:
+    """DirEntry of a MemoryBackend listing; its stat result is kept after the first call."""
+
+    __slots__ = ("name", "path", "node", "backend", "_stat")
+
+    def __init__(self, name, path, node, backend):
+        self.name = name
+        self.path = path
+        self.node = node
+        self.backend = backend
+        self._stat = None
+
+    def __fspath__(self):
+        return self.path
+
+    def inode(self):
+        return self.node.ino
+
+    def is_file(self, follow_symlinks=True):
+        return isinstance(self.node, _MemoryFile)
+
+    def is_dir(self, follow_symlinks=True):
+        return isinstance(self.node, _MemoryDir)
+
+    def is_symlink(self):
+        return False
+
+    def stat(self, follow_symlinks=True):
+        if self._stat is None:
+            self.backend.call("stat", self.path)
+            self._stat = self.backend.stat_node(self.node)
+        return self._stat
+
+
+class MemoryBackend:
+    """A file tree in memory, for profiling without real files.
+
+    Only folders and file sizes are stored unless a file is given content,
+    so millions of entries fit in memory; reading a file without content
+    returns bytes derived from its inode number, which differ between
+    files. Names are case-sensitive on every platform.
+
+    Every call except add_file() first sleeps for ``latency`` seconds and
+    then fails with EIO with probability ``failure_rate``; ``fail_on``
+    limits failures to some calls (names such as "move" or "stat").
+    """
+
+    local = False
+
+    def __init__(self, device=MEMORY_DEVICE, latency=0, failure_rate=0, fail_on=None, seed=None):
+        """Create an empty tree; folders are made by makedirs() and add_file()."""
+        self.device = device
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_on = set(fail_on) if fail_on else None
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.next_ino = 1
+        self.dirs = {}
+        self.calls = 0
+
+    def call(self, name, path):
+        """Spend the simulated latency of a call and maybe fail it."""
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if (self.failure_rate and (self.fail_on is None or name in self.fail_on)
+                and self.random.random() < self.failure_rate):
+            raise OSError(errno.EIO, f"simulated {name} failure", path)
+
+    def _new_ino(self):
+        """Return the next free inode number."""
+        ino = self.next_ino
+        self.next_ino += 1
+        return ino
+
+    def stat_node(self, node):
+        """Return the stat result of a file or folder node."""
+        if isinstance(node, _MemoryDir):
+            return make_stat(stat.S_IFDIR | 0o755, node.ino, self.device, 0, node.mtime_ns)
+        return make_stat(stat.S_IFREG | 0o644, node.ino, self.device, node.size, node.mtime_ns)
+
+    def _dir(self, path):
+        """Return the folder node at a path."""
+        node = self.dirs.get(os.path.normpath(path))
+        if node is None:
+            if isinstance(self._find(path), _MemoryFile):
+                raise NotADirectoryError(errno.ENOTDIR, "Not a directory", path)
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory", path)
+        return node
+
+    def _find(self, path):
+        """Return the node at a path, or None."""
+        path = os.path.normpath(path)
+        node = self.dirs.get(path)
+        if node is None:
+            parent, name = os.path.split(path)
+            folder = self.dirs.get(parent)
+            if folder is not None:
+                node = folder.children.get(name)
+        return node
+
+    def _node(self, path):
+        """Return the node at a path; FileNotFoundError if there is none."""
+        node = self._find(path)
+        if node is None:
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory", path)
+        return node
+
+    def _parent(self, path):
+        """Return (parent folder node, name) for a path whose parent must exist."""
+        parent, name = os.path.split(os.path.normpath(path))
+        return self._dir(parent), name
+
+    def _makedirs(self, path):
+        """Create a folder and its missing parents; return its node."""
+        path = os.path.normpath(path)
+        node = self.dirs.get(path)
+        if node is not None:
+            return node
+        parent, name = os.path.split(path)
+        now = time.time_ns()
+        node = _MemoryDir(self._new_ino(), now)
+        if name:
+            folder = self._makedirs(parent)
+            if name in folder.children:
+                raise FileExistsError(errno.EEXIST, "File exists", path)
+            folder.children[name] = node
+            folder.mtime_ns = now
+        self.dirs[path] = node
+        return node
+
+    def add_file(self, path, size=0, mtime=None, data=None):
+        """Create a file (and its folders) without any simulated latency."""
+        if data is not None:
+            size = len(data)
+        mtime_ns = time.time_ns() if mtime is None else int(mtime * 1e9)
+        with self.lock:
+            parent, name = os.path.split(os.path.normpath(path))
+            folder = self._makedirs(parent)
+            if name in folder.children:
+                raise FileExistsError(errno.EEXIST, "File exists", path)
+            folder.children[name] = _MemoryFile(self._new_ino(), size, mtime_ns, data)
+            folder.mtime_ns = time.time_ns()
+
+    def scandir(self, path):
+        """Return the entries of a folder as a Listing of MemoryEntry objects."""
+        self.call("scandir", path)
+        with self.lock:
+            children = list(self._dir(path).children.items())
+        return Listing(MemoryEntry(name, os.path.join(path, name), node, self)
+                       for name, node in children)
+
+    def stat(self, path, follow_symlinks=True):
+        """Return the stat result of a file or folder."""
+        self.call("stat", path)
+        with self.lock:
+            return self.stat_node(self._node(path))
+
+    def listdir(self, path):
+        """Return the names in a folder."""
+        self.call("listdir", path)
+        with self.lock:
+            return list(self._dir(path).children)
+
+    def lexists(self, path):
+        """Return True if a file or folder is at the path."""
+        self.call("lexists", path)
+        with self.lock:
+            return self._find(path) is not None
+
+    def makedirs(self, path):
+        """Create a folder and its missing parents."""
+        self.call("makedirs", path)
+        with self.lock:
+            self._makedirs(path)
+
+    def move(self, src, dst, src_dev=None, dst_dev=None, verify="none", progress=None,
+             replace=False):
+        """Rename a file node; FileExistsError if dst is taken and ``replace`` is not set."""
+        self.call("move", src)
+        with self.lock:
+            source_dir, source_name = self._parent(src)
+            node = source_dir.children.get(source_name)
+            if node is None:
+                raise FileNotFoundError(errno.ENOENT, "No such file or directory", src)
+            if isinstance(node, _MemoryDir):
+                raise IsADirectoryError(errno.EISDIR, "Is a directory", src)
+            target_dir, target_name = self._parent(dst)
+            existing = target_dir.children.get(target_name)
+            if existing is not None and (not replace or isinstance(existing, _MemoryDir)):
+                raise FileExistsError(errno.EEXIST, "File exists", dst)
+            del source_dir.children[source_name]
+            target_dir.children[target_name] = node
+            now = time.time_ns()
+            source_dir.mtime_ns = target_dir.mtime_ns = now
+
+    def link(self, src, dst):
+        """Add a second name for the file node at src."""
+        self.call("link", src)
+        with self.lock:
+            node = self._node(src)
+            if isinstance(node, _MemoryDir):
+                raise PermissionError(errno.EPERM, "Operation not permitted", src)
+            target_dir, target_name = self._parent(dst)
+            if target_name in target_dir.children:
+                raise FileExistsError(errno.EEXIST, "File exists", dst)
+            target_dir.children[target_name] = node
+            target_dir.mtime_ns = time.time_ns()
+
+    def unlink(self, path):
+        """Remove a file."""
+        self.call("unlink", path)
+        with self.lock:
+            folder, name = self._parent(path)
+            node = folder.children.get(name)
+            if node is None:
+                raise FileNotFoundError(errno.ENOENT, "No such file or directory", path)
+            if isinstance(node, _MemoryDir):
+                raise IsADirectoryError(errno.EISDIR, "Is a directory", path)
+            del folder.children[name]
+            folder.mtime_ns = time.time_ns()
+
+    def open(self, path):
+        """Return a BytesIO of a file's content, generated if it has none."""
+        self.call("open", path)
+        with self.lock:
+            node = self._node(path)
+        if isinstance(node, _MemoryDir):
+            raise IsADirectoryError(errno.EISDIR, "Is a directory", path)
+        if node.data is not None:
+            return io.BytesIO(node.data)
+        pattern = node.ino.to_bytes(8, "little")
+        return io.BytesIO((pattern * (node.size // 8 + 1))[:node.size])
+
+    def head(self, path, size):
+        """Return the first ``size`` bytes of a file."""
+        with self.open(path) as f:
+            return f.read(size)
+
+    def write(self, path, stream, replace=False):
+        """Create a file holding everything read from a stream."""
+        self.call("write", path)
+        data = stream.read()
+        with self.lock:
+            folder, name = self._parent(path)
+            existing = folder.children.get(name)
+            if existing is not None and (not replace or isinstance(existing, _MemoryDir)):
+                raise FileExistsError(errno.EEXIST, "File exists", path)
+            now = time.time_ns()
+            folder.children[name] = _MemoryFile(self._new_ino(), len(data), now, data)
+            folder.mtime_ns = now
+
+
+class _ArchiveMember:
+    """A regular file inside an archive."""
+
+    __slots__ = ("info", "ino", "size", "mtime_ns")
+
+    def __init__(self, info, ino, size, mtime):
+        self.info = info
+        self.ino = ino
+        self.size = size
+        self.mtime_ns = int(mtime * 1e9)
+
+
+class ArchiveEntry:
+    """DirEntry of an archive member or of a folder that only exists in the archive."""
+
+    __slots__ = ("name", "path", "member", "backend")
+
+    def __init__(self, name, path, member, backend):
+        self.name = name
+        self.path = path
+        self.member = member
+        self.backend = backend
+
+    def __fspath__(self):
+        return self.path
+
+    def inode(self):
+        return self.member.ino if self.member is not None else 0
+
+    def is_file(self, follow_symlinks=True):
+        return self.member is not None
+
+    def is_dir(self, follow_symlinks=True):
+        return self.member is None
+
+    def is_symlink(self):
+        return False
+
+    def stat(self, follow_symlinks=True):
+        return self.backend.stat_member(self.member)
+
+
+class _LockedReader(io.RawIOBase):
+    """A tar member stream whose reads hold the archive's lock.
+
+    Members of a TarFile share its file object and each read seeks it to
+    the member's data, so reads of several members must not interleave.
+    """
+
+    def __init__(self, stream, lock):
+        """Wrap a stream returned by TarFile.extractfile."""
+        self.stream = stream
+        self.lock = lock
+
+    def readable(self):
+        """Return True; the stream is read-only."""
+        return True
+
+    def readinto(self, buffer):
+        """Read into a buffer while holding the lock; return the bytes read."""
+        with self.lock:
+            return self.stream.readinto(buffer)
+
+    def close(self):
+        """Close the member stream."""
+        if not self.closed:
+            self.stream.close()
+        super().close()
+
+
+class ArchiveBackend:
+    """A zip or tar archive organized into a folder of another backend.
+
+    The archive's files appear inside ``folder`` (created if missing)
+    next to whatever is really there; where both hold the same name, the
+    real entry wins. Moving an archive file extracts it to its destination
+    on the ``target`` backend, after which it no longer appears in the
+    folder; the archive itself is never changed and its files cannot be
+    linked or removed. Everything outside the archive is passed on to the
+    target.
+    """
+
+    def __init__(self, archive_path, folder, target=None):
+        """Open the archive and index its files."""
+        self.target = target or LOCAL
+        self.local = self.target.local
+        self.folder = os.path.abspath(folder)
+        self.target.makedirs(self.folder)
+        root = self.target.stat(self.folder)
+        self.device = root.st_dev
+        self.dir_mtime_ns = root.st_mtime_ns
+        self.lock = threading.Lock()
+        # Relative path -> member, and relative folder -> names inside it
+        self.members = {}
+        self.dirs = {"": set()}
+        # Files not extracted yet below every relative folder
+        self.remaining = {"": 0}
+
+        if zipfile.is_zipfile(archive_path):
+            self.zip = zipfile.ZipFile(archive_path)
+            self.tar = None
+            infos = ((info, info.filename, info.file_size, time.mktime(info.date_time + (0, 0, -1)))
+                     for info in self.zip.infolist() if not info.is_dir())
+        elif tarfile.is_tarfile(archive_path):
+            self.zip = None
+            self.tar = tarfile.open(archive_path)
+            infos = ((info, info.name, info.size, info.mtime)
+                     for info in self.tar.getmembers() if info.isfile())
+        else:
+            raise ValueError(f"{archive_path} is not a zip or tar archive")
+        for info, name, size, mtime in infos:
+            parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+            if not parts or ".." in parts:
+                # Nothing may be extracted outside the folder
+                continue
+            relative = os.path.join(*parts)
+            if relative in self.members:
+                continue
+            self.members[relative] = _ArchiveMember(info, ARCHIVE_INODE_BASE + len(self.members),
+                                                    size, mtime)
+            parent = ""
+            for part in parts[:-1]:
+                self.dirs.setdefault(parent, set()).add(part)
+                parent = os.path.join(parent, part) if parent else part
+                self.remaining[parent] = self.remaining.get(parent, 0) + 1
+            self.dirs.setdefault(parent, set()).add(parts[-1])
+            self.remaining[""] += 1
+
+    def relative(self, path):
+        """Return a path relative to the folder, or None if it lies outside."""
+        relative = os.path.relpath(os.path.abspath(path), self.folder)
+        if relative == ".":
+            return ""
+        if relative == ".." or relative.startswith(".." + os.sep):
+            return None
+        return relative
+
+    def member(self, path):
+        """Return the archive file at a path if it was not extracted yet."""
+        relative = self.relative(path)
+        return self.members.get(relative) if relative is not None else None
+
+    def archive_dir(self, path):
+        """Return True if a folder still holds archive files below a path."""
+        relative = self.relative(path)
+        return relative is not None and self.remaining.get(relative, 0) > 0
+
+    def stat_member(self, member):
+        """Return the stat result of an archive file, or of a folder for None."""
+        if member is None:
+            return make_stat(stat.S_IFDIR | 0o755, 0, self.device, 0, self.dir_mtime_ns)
+        return make_stat(stat.S_IFREG | 0o444, member.ino, self.device, member.size,
+                         member.mtime_ns)
+
+    def scandir(self, path):
+        """Return the target's entries of a folder plus the archive files not extracted yet."""
+        try:
+            with self.target.scandir(path) as listing:
+                entries = Listing(listing)
+        except FileNotFoundError:
+            if not self.archive_dir(path):
+                raise
+            entries = Listing()
+        relative = self.relative(path)
+        if relative is None or relative not in self.dirs:
+            return entries
+        taken = {entry.name for entry in entries}
+        with self.lock:
+            for name in sorted(self.dirs[relative]):
+                if name in taken:
+                    continue
+                child = os.path.join(relative, name) if relative else name
+                member = self.members.get(child)
+                if member is not None:
+                    entries.append(ArchiveEntry(name, os.path.join(path, name), member, self))
+                elif self.remaining.get(child, 0) > 0:
+                    entries.append(ArchiveEntry(name, os.path.join(path, name), None, self))
+        return entries
+
+    def stat(self, path, follow_symlinks=True):
+        """Return the stat result from the target, or of an archive file or folder."""
+        try:
+            return self.target.stat(path, follow_symlinks=follow_symlinks)
+        except FileNotFoundError:
+            member = self.member(path)
+            if member is None and not self.archive_dir(path):
+                raise
+            return self.stat_member(member)
+
+    def listdir(self, path):
+        """Return the names in a folder, archive files included."""
+        return [entry.name for entry in self.scandir(path)]
+
+    def lexists(self, path):
+        """Return True if the path exists on the target or in the archive."""
+        return (self.target.lexists(path) or self.member(path) is not None
+                or self.archive_dir(path))
+
+    def makedirs(self, path):
+        """Create a folder on the target."""
+        self.target.makedirs(path)
+
+    def extracted(self, path):
+        """Hide an extracted archive file from the folder."""
+        relative = self.relative(path)
+        with self.lock:
+            if self.members.pop(relative, None) is None:
+                return
+            parent = relative
+            while parent:
+                parent = os.path.dirname(parent)
+                self.remaining[parent] -= 1
+            self.dirs[os.path.dirname(relative)].discard(os.path.basename(relative))
+
+    def move(self, src, dst, src_dev=None, dst_dev=None, verify="none", progress=None,
+             replace=False):
+        """Move a file on the target, or extract an archive file to dst."""
+        if self.target.lexists(src):
+            self.target.move(src, dst, src_dev=src_dev, dst_dev=dst_dev, verify=verify,
+                             progress=progress, replace=replace)
+            return
+        member = self.member(src)
+        if member is None:
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory", src)
+        with self.open(src) as stream:
+            self.target.write(dst, stream, replace=replace)
+        if verify != "none" and self.target.stat(dst).st_size != member.size:
+            raise VerificationError(errno.EIO, "size mismatch after extraction", dst)
+        if progress:
+            progress(member.size, member.size)
+        self.extracted(src)
+
+    def link(self, src, dst):
+        """Hard link a file on the target; archive files cannot be linked."""
+        if self.member(src) is not None:
+            raise OSError(errno.EXDEV, "cannot link to a file inside an archive", src)
+        self.target.link(src, dst)
+
+    def unlink(self, path):
+        """Remove a file on the target; archive files cannot be removed."""
+        if not self.target.lexists(path) and self.member(path) is not None:
+            raise OSError(errno.EROFS, "cannot remove a file inside an archive", path)
+        self.target.unlink(path)
+
+    def open(self, path):
+        """Open a file on the target, or stream an archive file."""
+        member = self.member(path)
+        if member is None or self.target.lexists(path):
+            return self.target.open(path)
+        if self.zip is not None:
+            # ZipFile serializes reads of its shared file itself
+            return self.zip.open(member.info)
+        with self.lock:
+            stream = self.tar.extractfile(member.info)
+        return io.BufferedReader(_LockedReader(stream, self.lock), COPY_CHUNK_SIZE)
+
+    def head(self, path, size):
+        """Return the first ``size`` bytes of a file."""
+        with self.open(path) as f:
+            return f.read(size)
+
+    def write(self, path, stream, replace=False):
+        """Create a file on the target from a stream."""
+        self.target.write(path, stream, replace=replace)
+
+    def close(self):
+        """Close the archive."""
+        (self.zip or self.tar).close()
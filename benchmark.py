@@ -0,0 +1,375 @@
+"""Benchmark the organizer on synthetic messy folders.
+
+Usage:
+    python benchmark.py [--sizes 1000 10000 ...] [--categories basic ...]
+                        [--output results.json] [--baseline baseline.json]
+    python benchmark.py --sizes 500 --latency-ms 20 --only engine network
+    python benchmark.py --sizes 1000000 --backend memory [--failure-rate 0.01]
+
+For every folder size and category set a folder of the requested size is
+generated from a fixed seed. Its extensions are drawn from the shipped
+categories_*.json files, with some upper-case, unknown and missing
+extensions mixed in. A fresh copy of the folder is then organized by the
+legacy organize_downloads(), another through the engine as the GUI
+worker runs it (plan, then execute with a journal), and a third by the
+engine in network mode. For the engine, scan, classify and move are
+timed separately; organize_downloads() does them file by file and is
+timed as a whole. With --repeat the fastest of several runs is kept,
+together with the number of files it moved. With --latency-ms every
+file-system call on the folder is delayed like on a network share (see
+netshare.SimulatedLatency).
+
+With --backend memory the folders are generated in a MemoryBackend
+instead of on disk, so millions of files can be profiled without touching
+a drive; there --latency-ms is the backend's own delay per call and
+--failure-rate makes that share of moves fail.
+
+With --startup, the app's cold start is measured too: SpringClean.py is
+launched with --measure-startup (which needs a display) and the time until
+its window is first painted is checked against a budget.
+
+Results are written as JSON. With --baseline, the totals are compared with
+an earlier results file. The exit code is 1 if any of them got slower than
+the tolerance allows or if the cold start is over budget.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+
+import organizer
+from journal import MoveJournal
+from netshare import SimulatedLatency
+from backends import LOCAL, MemoryBackend
+
+RESULTS_FORMAT_VERSION = 1
+
+# Folder sizes benchmarked by default; up to 1,000,000 can be requested
+DEFAULT_SIZES = (1000, 10000)
+
+# Category sets shipped with SpringClean, by short name
+CATEGORY_SETS = ("basic", "intermediate", "advanced")
+
+# Share of generated names with an upper-case, unknown or missing extension
+UPPERCASE_RATIO = 0.05
+UNKNOWN_RATIO = 0.03
+NO_EXTENSION_RATIO = 0.02
+
+# Backends the folders can be generated in
+BACKENDS = ("local", "memory")
+
+# Generated files are small; size is drawn from 0..MAX_FILE_SIZE bytes
+MAX_FILE_SIZE = 4096
+
+# Allowed slowdown against the baseline before a result counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Cold start budget: seconds from launching the app until its window is painted
+STARTUP_BUDGET = 1.0
+
+_WORDS = ("report", "invoice", "photo", "IMG", "scan", "setup", "backup", "notes", "draft",
+          "final", "download", "export", "track", "clip", "slides", "data", "budget", "resume")
+
+
+def app_path(name):
+    """Return the path of a file next to this script."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+
+
+def categories_path(category_set):
+    """Return the path of a shipped categories file."""
+    return app_path(f"categories_{category_set}.json")
+
+
+def generate_folder(path, count, categories, seed=0, memory=None):
+    """Fill a new folder with ``count`` files named after the given categories.
+
+    Categories are picked in proportion to how many extensions they list,
+    so big families (images, code, ...) are common and niche ones rare.
+    The same seed always produces the same folder. With a MemoryBackend
+    as ``memory`` the files are created there instead of on disk.
+    """
+    rng = random.Random(seed)
+    extensions = [extension for group in categories.values() for extension in group]
+    payload = rng.randbytes(MAX_FILE_SIZE)
+    if memory is not None:
+        memory.makedirs(path)
+    else:
+        os.makedirs(path)
+    for index in range(count):
+        roll = rng.random()
+        if roll < NO_EXTENSION_RATIO:
+            extension = ""
+        elif roll < NO_EXTENSION_RATIO + UNKNOWN_RATIO:
+            extension = f".x{rng.randrange(1000):03d}"
+        else:
+            extension = rng.choice(extensions)
+            if roll > 1 - UPPERCASE_RATIO:
+                extension = extension.upper()
+        name = f"{rng.choice(_WORDS)}_{index}{extension}"
+        size = rng.randrange(MAX_FILE_SIZE + 1)
+        if memory is not None:
+            memory.add_file(os.path.join(path, name), size)
+            continue
+        fd = os.open(os.path.join(path, name), os.O_WRONLY | os.O_CREAT | os.O_EXCL
+                     | getattr(os, "O_BINARY", 0))
+        try:
+            os.write(fd, payload[:size])
+        finally:
+            os.close(fd)
+
+
+def bench_legacy(folder, fs=LOCAL):
+    """Time organize_downloads() on the folder.
+
+    It scans, classifies and moves file by file, so only the whole run is
+    timed. Its output goes to os.devnull, which keeps the cost of the
+    print calls but not of a terminal.
+    """
+    def count_files():
+        return sum(organizer.PathEntry(folder, name, fs).is_file() for name in fs.listdir(folder))
+
+    before = count_files()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        organizer.organize_downloads(folder, fs)
+        timings = {"organize": time.perf_counter() - start}
+    return timings, before - count_files()
+
+
+def bench_engine(folder, journal_dir, network=False, fs=None):
+    """Time the engine as the GUI worker drives it: scan, plan, then execute."""
+    engine = organizer.FileOrganizer(network=network, fs=fs)
+    timings = {}
+    start = time.perf_counter()
+    entries = engine.scan(folder)
+    timings["scan"] = time.perf_counter() - start
+
+    # Plan from the inventory above so classification is timed on its own
+    engine.scan = lambda folder_path: entries
+    start = time.perf_counter()
+    plan = engine.plan(folder)
+    timings["classify"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    journal = MoveJournal.create(plan, journal_dir) if journal_dir else None
+    summary = engine.execute(plan, journal=journal)
+    timings["move"] = time.perf_counter() - start
+    return timings, summary["files_moved"]
+
+
+def bench_startup(repeat=1):
+    """Launch the app with --measure-startup and time its cold start.
+
+    Returns the fastest run's timings in seconds: "interpreter" (until
+    SpringClean.py starts running), "imports" (its own imports),
+    "first_paint" (launch until the window is painted) and "ready" (launch
+    until the deferred startup work is done).
+    """
+    best = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, app_path("SpringClean.py"), "--measure-startup"],
+                                   stdout=subprocess.PIPE, text=True, cwd=app_path(""))
+        line = process.stdout.readline()
+        elapsed = time.perf_counter() - start
+        process.wait()
+        if not line:
+            raise RuntimeError(f"the app exited with code {process.returncode} before it was painted")
+        reported = json.loads(line)
+        interpreter = elapsed - reported["ready"]
+        timings = {"interpreter": interpreter, "imports": reported["imports"],
+                   "first_paint": interpreter + reported["first_paint"], "ready": elapsed}
+        if best is None or timings["first_paint"] < best["first_paint"]:
+            best = timings
+    return best
+
+
+BENCHMARKS = {
+    "legacy": lambda folder, journal_dir, fs: bench_legacy(folder, fs),
+    "engine": lambda folder, journal_dir, fs: bench_engine(folder, journal_dir, fs=fs),
+    "network": lambda folder, journal_dir, fs: bench_engine(folder, journal_dir, True, fs),
+}
+
+
+def run_benchmarks(sizes, category_sets, workdir, seed=0, journal=True, repeat=1, log=print,
+                   benchmarks=None, latency=0, capacity=None, backend="local", failure_rate=0):
+    """Run every benchmark on every folder size and return the result records.
+
+    ``benchmarks`` picks names from BENCHMARKS (all by default). With a
+    ``latency`` in seconds the benchmarks run against a SimulatedLatency
+    share serving at most ``capacity`` calls at once. With the "memory"
+    ``backend`` folders live in a MemoryBackend with that latency, where
+    moves fail with probability ``failure_rate``; journals stay on disk.
+    """
+    results = []
+    for category_set in category_sets:
+        categories = organizer.load_file_categories(categories_path(category_set))
+        organizer.set_file_categories(categories)
+        for size in sizes:
+            for name in benchmarks or BENCHMARKS:
+                bench = BENCHMARKS[name]
+                folder = os.path.join(workdir, f"{name}-{category_set}-{size}")
+                journal_dir = os.path.join(workdir, "journals") if journal else None
+                timings = moved = None
+                for _ in range(max(1, repeat)):
+                    log(f"Generating {size} files ({category_set}) for {name}...")
+                    if backend == "memory":
+                        fs = MemoryBackend(latency=latency, failure_rate=failure_rate,
+                                           fail_on=("move",), seed=seed)
+                        share = contextlib.nullcontext()
+                    else:
+                        fs = LOCAL
+                        share = (SimulatedLatency(folder, latency, capacity) if latency
+                                 else contextlib.nullcontext())
+                    generate_folder(folder, size, categories, seed,
+                                    fs if backend == "memory" else None)
+                    try:
+                        with share:
+                            run_timings, run_moved = bench(folder, journal_dir, fs)
+                    finally:
+                        if backend != "memory":
+                            shutil.rmtree(folder, ignore_errors=True)
+                        if journal_dir:
+                            shutil.rmtree(journal_dir, ignore_errors=True)
+                    if timings is None or sum(run_timings.values()) < sum(timings.values()):
+                        # Keep the moved count of the run whose timings are kept
+                        timings, moved = run_timings, run_moved
+                total = sum(timings.values())
+                record = {"benchmark": name, "categories": category_set, "files": size,
+                          "runs": max(1, repeat), "backend": backend,
+                          "latency_ms": round(latency * 1000, 3),
+                          "files_moved": moved, **{stage: round(seconds, 6)
+                                                   for stage, seconds in timings.items()},
+                          "total": round(total, 6),
+                          "files_per_second": round(size / total) if total else None}
+                stages = "  ".join(f"{stage} {seconds:.3f}s" for stage, seconds in timings.items())
+                log(f"  {name:<8} {stages}  ({record['files_per_second']} files/s)")
+                results.append(record)
+    organizer.set_file_categories(organizer.DEFAULT_FILE_CATEGORIES.copy())
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare results with a baseline; return (lines, regressions)."""
+    def key(record):
+        return (record["benchmark"], record["categories"], record["files"],
+                record.get("backend", "local"), record.get("latency_ms", 0))
+
+    previous = {key(record): record for record in baseline["results"]}
+    lines = []
+    regressions = 0
+    for record in results:
+        old = previous.get(key(record))
+        if old is None or not old["total"]:
+            continue
+        ratio = record["total"] / old["total"]
+        stages = "  ".join(f"{stage} {record[stage] / old[stage]:.2f}x"
+                           for stage in ("scan", "classify", "move", "organize")
+                           if old.get(stage) and stage in record)
+        regressed = ratio > 1 + tolerance
+        regressions += regressed
+        lines.append(f"{'REGRESSION ' if regressed else ''}{record['benchmark']} "
+                     f"{record['categories']} {record['files']}: {ratio:.2f}x baseline ({stages})")
+    return lines, regressions
+
+
+def build_parser():
+    """Create the command-line argument parser."""
+    parser = argparse.ArgumentParser(prog="benchmark",
+                                     description="Benchmark SpringClean on synthetic folders.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES), metavar="N",
+                        help="numbers of files to generate (default: %(default)s); "
+                             "give none to only measure --startup")
+    parser.add_argument("--categories", nargs="+", choices=CATEGORY_SETS, default=["advanced"],
+                        help="shipped category sets to draw extensions from (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: %(default)s)")
+    parser.add_argument("--workdir", metavar="DIR",
+                        help="where to generate folders (default: a temporary folder); "
+                             "use the drive you want to measure")
+    parser.add_argument("--repeat", type=int, default=1, metavar="N",
+                        help="run each benchmark N times and keep the fastest (default: %(default)s)")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), metavar="NAME",
+                        help=f"run only these benchmarks ({', '.join(BENCHMARKS)}; default: all)")
+    parser.add_argument("--latency-ms", type=float, default=0, metavar="MS",
+                        help="delay every file-system call on the folders by MS milliseconds, "
+                             "like a network share")
+    parser.add_argument("--latency-capacity", type=int, metavar="N",
+                        help="with --latency-ms, serve at most N calls at once and queue the rest")
+    parser.add_argument("--backend", choices=BACKENDS, default="local",
+                        help="generate the folders on disk or in memory (default: %(default)s)")
+    parser.add_argument("--failure-rate", type=float, default=0, metavar="P",
+                        help="with --backend memory, share of moves that fail (default: %(default)s)")
+    parser.add_argument("--startup", action="store_true",
+                        help="also measure the app's cold start (needs a display)")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET, metavar="SECONDS",
+                        help="cold start budget until the window is painted (default: %(default)s)")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="run the engine without a move journal")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", metavar="FILE",
+                        help="where to write the JSON results (default: %(default)s)")
+    parser.add_argument("--baseline", metavar="FILE", help="compare with earlier results")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline (default: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    """Run the benchmarks and return the exit code."""
+    args = build_parser().parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="springclean-bench-", dir=args.workdir)
+    try:
+        results = run_benchmarks(args.sizes, args.categories, workdir, args.seed,
+                                 journal=not args.no_journal, repeat=args.repeat,
+                                 benchmarks=args.only, latency=args.latency_ms / 1000,
+                                 capacity=args.latency_capacity, backend=args.backend,
+                                 failure_rate=args.failure_rate)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    over_budget = False
+    if args.startup:
+        timings = bench_startup(args.repeat)
+        over_budget = timings["first_paint"] > args.startup_budget
+        print(f"  startup first paint {timings['first_paint']:.3f}s (interpreter "
+              f"{timings['interpreter']:.3f}s, imports {timings['imports']:.3f}s), ready "
+              f"{timings['ready']:.3f}s; budget {args.startup_budget:.3f}s"
+              f"{'  OVER BUDGET' if over_budget else ''}")
+        results.append({"benchmark": "startup", "categories": "-", "files": 0,
+                        "runs": max(1, args.repeat),
+                        **{stage: round(seconds, 6) for stage, seconds in timings.items()},
+                        "total": round(timings["first_paint"], 6),
+                        "budget": args.startup_budget})
+
+    report = {
+        "version": RESULTS_FORMAT_VERSION,
+        "created": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressions = compare(results, baseline, args.tolerance)
+        for line in lines:
+            print(line)
+        if regressions:
+            return 1
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,561 @@
+"""Headless command-line entry point for SpringClean.
+
+Usage:
+    python cli.py FOLDER [--categories FILE] [--dry-run] [--json]
+    python cli.py FOLDER FOLDER... [--device-workers N] [--device-limit PATH=N]
+    python cli.py FOLDER --dry-run --plan-out plan.json [--diff-plan old.json]
+    python cli.py --replay plan.json
+    python cli.py --resume | --undo [JOURNAL] [--undo-category CAT] [--undo-last N]
+    python cli.py FOLDER --watch [--settle-seconds S] [--poll-seconds S]
+    python cli.py FOLDER --from-archive ARCHIVE.zip
+    python cli.py FOLDER --archive-after DAYS [--archive-format zip|tar.zst]
+    python cli.py --extract ARCHIVE NAME [--extract-to PATH]
+    python cli.py FOLDER --analyze [--top N] [--analyze-out report.json|report.csv]
+
+Only the GUI-free engine is imported, so this runs on machines without a
+display (cron jobs, scheduled tasks, servers).
+"""
+import os
+import sys
+import json
+import argparse
+import importlib
+import threading
+
+import organizer
+from journal import DEFAULT_JOURNAL_DIR, MoveJournal, find_unfinished, latest_journal, undo_run
+from plan import MovePlan
+from sniffer import DEFAULT_SNIFF_CACHE
+from dedupe import DEFAULT_HASH_CACHE, DUPLICATE_ACTIONS
+from destinations import CONFLICT_POLICIES
+from metrics import format_metrics
+from activitylog import ActivityLog
+from scheduler import DEFAULT_DEVICE_WORKERS, DeviceScheduler, device_of
+from defaults import (ARCHIVE_FORMATS, DEFAULT_ARCHIVE_WORKERS, DEFAULT_DIR_INDEX,
+                      DEFAULT_MAX_IN_FLIGHT, DEFAULT_TOP_FILES)
+
+
+def build_parser():
+    """Create the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="springclean",
+        description="Organize the files of a folder into category subfolders.")
+    parser.add_argument("folders", nargs="*", metavar="folder",
+                        help="folder to organize (omit with --replay, --resume or --undo); several "
+                             "folders are organized in one job, in parallel across devices")
+    parser.add_argument("-c", "--categories", metavar="FILE",
+                        help="JSON file with custom file categories (default: built-in categories)")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="show what would be moved without touching any file")
+    parser.add_argument("--json", action="store_true",
+                        help="print a JSON summary to stdout instead of log lines")
+    parser.add_argument("-w", "--workers", type=int, default=organizer.DEFAULT_MOVE_WORKERS,
+                        help="parallel same-volume moves (default: %(default)s)")
+    parser.add_argument("--copy-workers", type=int, default=organizer.DEFAULT_COPY_WORKERS,
+                        help="parallel cross-volume copies (default: %(default)s)")
+    parser.add_argument("--network", action="store_true",
+                        help="for high-latency network shares: keep many stats, folder listings "
+                             "and renames in flight at once instead of one after another")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, metavar="N",
+                        help="with --network, the most calls in flight; fewer are used while the "
+                             "share answers slowly (default: %(default)s)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="also organize files inside subfolders")
+    parser.add_argument("--max-depth", type=int, metavar="N",
+                        help="with --recursive, do not descend more than N folders deep")
+    parser.add_argument("-x", "--exclude", action="append", default=[], metavar="PATTERN",
+                        help="skip files and folders whose name matches this glob (repeatable)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="remember the folders of every run and list only those that "
+                             "changed since (see --dir-index)")
+    parser.add_argument("--dir-index", default=DEFAULT_DIR_INDEX, metavar="FILE",
+                        help="where --incremental remembers folders (default: %(default)s)")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="with --incremental, scan everything and rebuild what is remembered")
+    parser.add_argument("--verify", choices=organizer.VERIFY_MODES, default="none",
+                        help="check cross-volume copies before deleting the source (default: %(default)s)")
+    parser.add_argument("--sniff", action="store_true",
+                        help="identify files with unknown or no extension by their content")
+    parser.add_argument("--sniff-cache", default=DEFAULT_SNIFF_CACHE, metavar="FILE",
+                        help="where --sniff remembers files it has already read (default: %(default)s)")
+    parser.add_argument("--duplicates", choices=DUPLICATE_ACTIONS, default="off",
+                        help="find files with identical content and skip them, collect them in a "
+                             "DUPLICATES folder or hard-link them to the original (default: %(default)s)")
+    parser.add_argument("--hash-cache", default=DEFAULT_HASH_CACHE, metavar="FILE",
+                        help="where --duplicates remembers file hashes (default: %(default)s)")
+    parser.add_argument("--on-conflict", choices=CONFLICT_POLICIES, default="skip",
+                        help="what to do when a destination name is taken: leave the file, move it "
+                             "as 'name (1).ext', overwrite older files, or number it only if its "
+                             "content differs (default: %(default)s)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="time every stage and report move latencies in the summary")
+    parser.add_argument("--metrics-out", metavar="FILE",
+                        help="write the metrics of the run to FILE as JSON (implies --metrics)")
+    parser.add_argument("--metrics-hook", metavar="MODULE:FUNCTION",
+                        help="call FUNCTION(metrics_dict) after every run, e.g. to feed a "
+                             "metrics collector (implies --metrics)")
+    parser.add_argument("--log-dir", metavar="DIR",
+                        help="also append a structured JSON-lines record of every file to "
+                             "DIR/springclean.log (rotated at 10 MB)")
+    parser.add_argument("--device-workers", type=int, default=DEFAULT_DEVICE_WORKERS, metavar="N",
+                        help="with several folders, how many folders on the same device are "
+                             "organized at once (default: %(default)s)")
+    parser.add_argument("--device-limit", type=device_limit, action="append", default=[],
+                        metavar="PATH=N", help="with several folders, organize N folders at once on "
+                                               "the device holding PATH (repeatable)")
+    parser.add_argument("--from-archive", metavar="ARCHIVE",
+                        help="organize the files of a zip or tar archive into the folder "
+                             "(created if missing) instead of files already on disk")
+    parser.add_argument("--archive-after", type=int, metavar="DAYS",
+                        help="after organizing, pack files of the category folders not modified "
+                             "for DAYS days into monthly archives in ARCHIVE/")
+    parser.add_argument("--archive-after-category", type=category_days, action="append",
+                        default=[], metavar="CAT=DAYS",
+                        help="with --archive-after, another age for one category "
+                             "(0 never archives it; repeatable)")
+    parser.add_argument("--archive-format", choices=ARCHIVE_FORMATS, default="zip",
+                        help="archive format (default: %(default)s; tar.zst needs zstandard)")
+    parser.add_argument("--archive-workers", type=int, default=DEFAULT_ARCHIVE_WORKERS,
+                        metavar="N", help="archives compressed at once (default: %(default)s)")
+    parser.add_argument("--extract", nargs=2, metavar=("ARCHIVE", "NAME"),
+                        help="restore one file from an archive made by --archive-after, by its "
+                             "name in the archive or its original path")
+    parser.add_argument("--extract-to", metavar="PATH",
+                        help="with --extract, where to write the file (default: its original path)")
+    parser.add_argument("--analyze", action="store_true",
+                        help="only report bytes and files per category and age, the extensions "
+                             "in OTHERS and the largest files; nothing is moved")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_FILES, metavar="N",
+                        help="with --analyze, how many of the largest files to list "
+                             "(default: %(default)s)")
+    parser.add_argument("--analyze-out", metavar="FILE",
+                        help="with --analyze, write the report to FILE (.json, or .csv for "
+                             "spreadsheets)")
+    parser.add_argument("--plan-out", metavar="FILE",
+                        help="write the move plan to FILE (.json is replayable, .csv for spreadsheets)")
+    parser.add_argument("--diff-plan", metavar="FILE",
+                        help="compare the new plan with a plan saved earlier by --plan-out")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="execute a plan saved earlier by --plan-out instead of scanning")
+    parser.add_argument("--journal-dir", default=DEFAULT_JOURNAL_DIR, metavar="DIR",
+                        help="where run journals are kept (default: %(default)s)")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="do not journal this run (it cannot be resumed or undone)")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="JOURNAL",
+                        help="finish an interrupted run (default: the latest unfinished one)")
+    parser.add_argument("--undo", nargs="?", const="latest", metavar="JOURNAL",
+                        help="move the files of a run back (default: the latest journal)")
+    parser.add_argument("--undo-category", action="append", default=[], metavar="CATEGORY",
+                        help="with --undo, only restore files moved into this category (repeatable)")
+    parser.add_argument("--undo-last", type=int, metavar="N",
+                        help="with --undo, only restore the last N moves")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and organize new files as they arrive (stop with Ctrl+C)")
+    parser.add_argument("--settle-seconds", type=float, default=organizer.DEFAULT_SETTLE_SECONDS,
+                        metavar="S", help="with --watch, wait until a new file has not changed "
+                                          "for S seconds (default: %(default)s)")
+    parser.add_argument("--poll-seconds", type=float, default=organizer.DEFAULT_POLL_SECONDS,
+                        metavar="S", help="with --watch, folder polling interval where inotify "
+                                          "is unavailable (default: %(default)s)")
+    return parser
+
+
+def device_limit(value):
+    """Parse a --device-limit PATH=N argument into (PATH, N)."""
+    path, _, workers = value.rpartition("=")
+    try:
+        workers = int(workers)
+    except ValueError:
+        workers = 0
+    if not path or workers < 1:
+        raise argparse.ArgumentTypeError(f"expected PATH=N with N >= 1, got {value!r}")
+    return path, workers
+
+
+def category_days(value):
+    """Parse a --archive-after-category CAT=DAYS argument into (CAT, DAYS)."""
+    category, _, days = value.rpartition("=")
+    try:
+        days = int(days)
+    except ValueError:
+        days = -1
+    if not category or days < 0:
+        raise argparse.ArgumentTypeError(f"expected CAT=DAYS with DAYS >= 0, got {value!r}")
+    return category, days
+
+
+def resolve_journal(value, journal_dir, unfinished_only=False):
+    """Turn a --resume/--undo argument into a journal path (or None)."""
+    if value == "latest":
+        if unfinished_only:
+            unfinished = find_unfinished(journal_dir)
+            return unfinished[0] if unfinished else None
+        return latest_journal(journal_dir)
+    return value if os.path.isfile(value) else None
+
+
+def load_hook(spec):
+    """Import the function named by a MODULE:FUNCTION string."""
+    module_name, _, function_name = spec.partition(":")
+    if not module_name or not function_name:
+        raise ValueError(f"expected MODULE:FUNCTION, got {spec!r}")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def print_json(summary):
+    """Write a summary dict to stdout as JSON."""
+    json.dump(summary, sys.stdout, indent=4)
+    sys.stdout.write("\n")
+
+
+def print_summary(summary):
+    """Print the totals of a summary as log lines."""
+    print("\n=== Organization Complete ===")
+    print(f"Files moved: {summary['files_moved']}")
+    if summary["renamed"]:
+        print(f"Renamed to avoid a conflict: {summary['renamed']}")
+    if summary["replaced"]:
+        print(f"Replaced older files: {summary['replaced']}")
+    if summary["skipped"]:
+        print(f"Skipped: {summary['skipped']}")
+    if summary["conflicts"]:
+        print(f"Not moved (name conflicts): {summary['conflicts']}")
+    if summary["already_done"]:
+        print(f"Already moved before the interruption: {summary['already_done']}")
+    if summary.get("duplicates"):
+        print(f"Duplicates found: {summary['duplicates']}")
+    if summary.get("folders_unchanged"):
+        print(f"Unchanged folders skipped: {summary['folders_unchanged']}")
+    print(f"Errors: {summary['errors']}")
+
+
+def archive_cold(args, folder, log):
+    """Archive the cold files of an organized folder; return the archiver's summary."""
+    from archiver import ColdFileArchiver
+    archiver = ColdFileArchiver(days=args.archive_after,
+                                category_days=dict(args.archive_after_category),
+                                archive_format=args.archive_format, workers=args.archive_workers,
+                                dry_run=args.dry_run, log=log or (lambda message: None))
+    return archiver.run(folder, organizer.category_folders())
+
+
+def print_archive_summary(summary):
+    """Print the totals of an archiving summary."""
+    print(f"Files archived: {summary['files_archived']} into {summary['archives']} archives "
+          f"({summary['bytes_archived'] / 1048576:.1f} MB → "
+          f"{summary['bytes_written'] / 1048576:.1f} MB)")
+    if summary["kept"]:
+        print(f"Kept (changed while archiving): {summary['kept']}")
+    if summary["errors"]:
+        print(f"Archiving errors: {summary['errors']}")
+
+
+def analyze(make_engine, args):
+    """Report on every folder without moving anything; return the exit code."""
+    from analytics import export_report, format_report
+    reports = []
+    for folder in args.folders:
+        report = make_engine(folder).inventory(folder, top=args.top).report()
+        reports.append(report)
+        if not args.json:
+            print("\n".join(format_report(report)))
+    if args.analyze_out:
+        export_report(reports[0], args.analyze_out)
+    if args.json:
+        print_json(reports[0] if len(reports) == 1 else reports)
+    return 0
+
+
+def organize_many(make_engine, args):
+    """Organize several folders in one job, one queue per device (see scheduler.py)."""
+    limits = {}
+    for path, workers in args.device_limit:
+        try:
+            limits[device_of(path)] = workers
+        except OSError as e:
+            print(f"Error: --device-limit {path}: {e}", file=sys.stderr)
+            return 2
+    scheduler = DeviceScheduler(make_engine, device_workers=args.device_workers, limits=limits,
+                                log=None if args.json else print)
+    summary = scheduler.run(args.folders, journal_dir=None if args.no_journal else args.journal_dir)
+    if args.archive_after is not None:
+        for folder_summary in summary["folders"]:
+            if "error" not in folder_summary and not folder_summary.get("stopped"):
+                folder_summary["archive"] = archive_cold(args, folder_summary["folder"],
+                                                         None if args.json else print)
+                summary["errors"] += folder_summary["archive"]["errors"]
+
+    if args.metrics_out:
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            json.dump({folder_summary["folder"]: folder_summary["metrics"]
+                       for folder_summary in summary["folders"] if "metrics" in folder_summary},
+                      f, indent=4)
+
+    if args.json:
+        print_json(summary)
+    else:
+        print(f"\n=== Folders ({summary['devices']} devices) ===")
+        for folder_summary in summary["folders"]:
+            if "error" in folder_summary:
+                print(f"{folder_summary['folder']}: failed: {folder_summary['error']}")
+            elif folder_summary.get("stopped"):
+                print(f"{folder_summary['folder']}: not started")
+            else:
+                print(f"{folder_summary['folder']}: {folder_summary['files_moved']} moved, "
+                      f"{folder_summary['errors']} errors")
+        print_summary(summary)
+        for folder_summary in summary["folders"]:
+            if "archive" in folder_summary:
+                print(f"{folder_summary['folder']}: ", end="")
+                print_archive_summary(folder_summary["archive"])
+    return 1 if summary["errors"] else 0
+
+
+def watch(engine, args):
+    """Organize the folder, then keep organizing new arrivals until interrupted."""
+    stop_event = threading.Event()
+    totals = {"files_moved": 0, "errors": 0}
+
+    def on_batch(summary):
+        totals["files_moved"] += summary["files_moved"]
+        totals["errors"] += summary["errors"]
+        if args.metrics_out and "metrics" in summary:
+            # Keeps the metrics of the latest batch
+            with open(args.metrics_out, "w", encoding="utf-8") as f:
+                json.dump(summary["metrics"], f, indent=4)
+        if args.json:
+            print_json(summary)
+            sys.stdout.flush()
+
+    def run():
+        try:
+            engine.watch(args.folder, stop_event,
+                         journal_dir=None if args.no_journal else args.journal_dir,
+                         settle_seconds=args.settle_seconds, poll_seconds=args.poll_seconds,
+                         on_batch=on_batch)
+        except OSError as e:
+            # e.g. the watched folder was removed or unmounted
+            print(f"Error: stopped watching: {e}", file=sys.stderr)
+            totals["errors"] += 1
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        stop_event.set()
+        thread.join()
+    if not args.json:
+        print(f"\nStopped watching. Files moved: {totals['files_moved']}, errors: {totals['errors']}")
+    return 1 if totals["errors"] else 0
+
+
+def main(argv=None):
+    """Run the organizer from the command line and return the exit code."""
+    args = build_parser().parse_args(argv)
+    activity = ActivityLog(args.log_dir) if args.log_dir else None
+    try:
+        return run(args, activity)
+    finally:
+        if activity is not None:
+            activity.close()
+
+
+def run(args, activity=None):
+    """Carry out the parsed command line; file records go to the ActivityLog."""
+    args.folder = args.folders[0] if args.folders else None
+    journal_path = None
+    if args.extract:
+        from archiver import extract
+        try:
+            path = extract(*args.extract, destination=args.extract_to)
+        except (OSError, KeyError, ValueError, RuntimeError) as e:
+            print(f"Error: cannot extract: {e}", file=sys.stderr)
+            return 1
+        print(f"Extracted: {path}")
+        return 0
+    if args.archive_after is not None:
+        from archiver import format_available
+        if not format_available(args.archive_format):
+            print(f"Error: {args.archive_format} archives need the zstandard package",
+                  file=sys.stderr)
+            return 2
+    if args.archive_after is not None and (args.watch or args.undo):
+        print("Error: --archive-after cannot be combined with --watch or --undo", file=sys.stderr)
+        return 2
+    if args.from_archive and (len(args.folders) > 1 or args.watch or args.resume or args.undo
+                              or args.replay):
+        print("Error: --from-archive needs a single folder and cannot be combined with --watch, "
+              "--resume, --undo or --replay", file=sys.stderr)
+        return 2
+    if args.incremental and args.from_archive:
+        print("Error: --incremental cannot be combined with --from-archive", file=sys.stderr)
+        return 2
+    if len(args.folders) > 1 and (args.watch or args.resume or args.undo or args.replay
+                                  or args.plan_out or args.diff_plan or args.analyze_out):
+        print("Error: several folders cannot be combined with --watch, --resume, --undo, "
+              "--replay, --plan-out, --diff-plan or --analyze-out", file=sys.stderr)
+        return 2
+    if args.analyze and (args.watch or args.resume or args.undo or args.replay
+                         or args.from_archive):
+        print("Error: --analyze cannot be combined with --watch, --resume, --undo, --replay "
+              "or --from-archive", file=sys.stderr)
+        return 2
+    if args.resume or args.undo:
+        journal_path = resolve_journal(args.resume or args.undo, args.journal_dir,
+                                       unfinished_only=bool(args.resume))
+        if journal_path is None:
+            print(f"Error: no journal found: {args.resume or args.undo}", file=sys.stderr)
+            return 2
+    elif args.replay:
+        if not os.path.isfile(args.replay):
+            print(f"Error: plan file not found: {args.replay}", file=sys.stderr)
+            return 2
+    elif not args.folders:
+        print("Error: no folder given", file=sys.stderr)
+        return 2
+    elif args.from_archive:
+        if not os.path.isfile(args.from_archive):
+            print(f"Error: archive not found: {args.from_archive}", file=sys.stderr)
+            return 2
+    else:
+        for folder in args.folders:
+            if not os.path.isdir(folder):
+                print(f"Error: not a folder: {folder}", file=sys.stderr)
+                return 2
+
+    if args.categories:
+        if not os.path.isfile(args.categories):
+            print(f"Error: categories file not found: {args.categories}", file=sys.stderr)
+            return 2
+        category_index = organizer.set_file_categories(organizer.load_file_categories(args.categories))
+        for line in category_index.describe_conflicts():
+            print(f"Warning: extension conflict: {line}", file=sys.stderr)
+        for line in category_index.describe_rule_errors():
+            print(f"Warning: rule ignored: {line}", file=sys.stderr)
+
+    on_metrics = None
+    if args.metrics_hook:
+        try:
+            on_metrics = load_hook(args.metrics_hook)
+        except (ImportError, AttributeError, ValueError) as e:
+            print(f"Error: cannot load metrics hook: {e}", file=sys.stderr)
+            return 2
+    collect_metrics = args.metrics or bool(args.metrics_out) or on_metrics is not None
+
+    log = None if args.json else print
+    if args.undo:
+        summary = undo_run(journal_path, categories=args.undo_category, last=args.undo_last, log=log)
+        if args.json:
+            print_json(summary)
+        else:
+            print(f"\nFiles restored: {summary['files_restored']}")
+            if summary["not_restorable"]:
+                print(f"Not restored (they replaced an older file): {summary['not_restorable']}")
+            print(f"Errors: {summary['errors']}")
+        return 1 if summary["errors"] else 0
+
+    fs = None
+    if args.from_archive:
+        import tarfile
+        import zipfile
+        from backends import ArchiveBackend
+        try:
+            fs = ArchiveBackend(args.from_archive, args.folder)
+        except (OSError, ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+            print(f"Error: cannot open archive: {e}", file=sys.stderr)
+            return 2
+    try:
+        return organize(args, activity, journal_path, log, collect_metrics, on_metrics, fs)
+    finally:
+        if fs is not None:
+            fs.close()
+
+
+def organize(args, activity, journal_path, log, collect_metrics, on_metrics, fs=None):
+    """Organize, resume or replay as the command line asks; return the exit code."""
+    def make_engine(folder=None, progress=None):
+        engine_log = log
+        if log is not None and len(args.folders) > 1:
+            # Lines of folders organized in parallel interleave
+            name = os.path.basename(os.path.normpath(folder)) or folder
+            engine_log = lambda message: log(f"[{name}] {message}")
+        return organizer.FileOrganizer(dry_run=args.dry_run, log=engine_log, progress=progress,
+                                       workers=args.workers, copy_workers=args.copy_workers,
+                                       verify=args.verify, recursive=args.recursive,
+                                       max_depth=args.max_depth, exclude=args.exclude,
+                                       sniff=args.sniff, sniff_cache=args.sniff_cache,
+                                       duplicates=args.duplicates, hash_cache=args.hash_cache,
+                                       metrics=collect_metrics, on_metrics=on_metrics,
+                                       conflicts=args.on_conflict, network=args.network,
+                                       max_in_flight=args.max_in_flight, fs=fs,
+                                       dir_index=args.dir_index if args.incremental else None,
+                                       full_scan=args.full_scan,
+                                       on_record=activity.write if activity is not None else None)
+
+    if args.analyze:
+        return analyze(make_engine, args)
+    if len(args.folders) > 1:
+        return organize_many(make_engine, args)
+    engine = make_engine(args.folder)
+    if args.watch:
+        if args.resume or args.undo or args.replay:
+            print("Error: --watch cannot be combined with --resume, --undo or --replay",
+                  file=sys.stderr)
+            return 2
+        return watch(engine, args)
+    if args.resume:
+        try:
+            summary = engine.resume(journal_path)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        plan = None
+    elif args.replay:
+        plan = MovePlan.load(args.replay)
+    else:
+        plan = engine.plan(args.folder)
+
+    if args.plan_out and plan is not None:
+        plan.export(args.plan_out)
+    if args.diff_plan and plan is not None:
+        changes = MovePlan.load(args.diff_plan).diff(plan)
+        print(f"Plan changes: {len(changes['added'])} added, {len(changes['removed'])} removed, "
+              f"{len(changes['changed'])} changed", file=sys.stderr)
+        for source, old, new in changes["changed"]:
+            print(f"  {source}: {old} → {new}", file=sys.stderr)
+
+    if plan is not None:
+        journal = None
+        if not args.no_journal and not args.dry_run and len(plan):
+            journal = MoveJournal.create(plan, args.journal_dir)
+        summary = engine.execute(plan, recheck=bool(args.replay), journal=journal)
+
+    if args.metrics_out and "metrics" in summary:
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            json.dump(summary["metrics"], f, indent=4)
+
+    if args.archive_after is not None and args.folder:
+        summary["archive"] = archive_cold(args, args.folder, log)
+        summary["errors"] += summary["archive"]["errors"]
+
+    if args.json:
+        print_json(summary)
+    else:
+        print_summary(summary)
+        if "archive" in summary:
+            print_archive_summary(summary["archive"])
+        if "metrics" in summary:
+            print("\n=== Metrics ===")
+            for line in format_metrics(summary["metrics"]):
+                print(line)
+
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    # Duplicate detection may start worker processes (also in frozen builds)
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""Find files with identical content before they are moved.
+
+Detection runs in stages, each one only looking at files the previous one
+could not tell apart:
+
+1. Files are bucketed by size; a file with a unique size has no duplicate.
+2. Same-size files are compared by a hash of their first and last blocks
+   (read on a thread pool). For small files this covers the whole file.
+3. Files that still collide are hashed in full, on a process pool when
+   there is enough data to make that worthwhile.
+
+Hashes are cached on disk by file identity (see filecache.py), so files
+that were already looked at by an earlier run are not read again.
+
+Files on other backends than the local file system (see backends.py) are
+read through the backend, and stage 3 then stays on threads.
+"""
+import os
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from filecache import FileCache, identity_key, stat_key
+from mover import file_digest
+
+# What to do with a file whose content matches another planned file
+DUPLICATE_ACTIONS = ("off", "skip", "collect", "hardlink")
+
+# Folder that the "collect" action moves duplicates into
+DUPLICATES_FOLDER = "DUPLICATES"
+
+# Default on-disk hash cache, next to config.json
+DEFAULT_HASH_CACHE = "hash_cache.json"
+
+# Size of the first and last blocks hashed in stage 2
+HASH_BLOCK_SIZE = 64 * 1024
+
+# Default number of threads for stage 2 and processes for stage 3
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 2)
+
+# Below this many bytes to hash in stage 3, a process pool costs more than it saves
+PROCESS_POOL_MIN_BYTES = 64 * 1024 * 1024
+
+
+def partial_digest(path, size, fs=None):
+    """Hash the first and last HASH_BLOCK_SIZE bytes of a file.
+
+    Files no larger than two blocks are hashed completely, so their partial
+    digest is also their full one. Without a backend ``fs`` the file is
+    opened directly.
+    """
+    digest = hashlib.blake2b(str(size).encode())
+    with (open(path, "rb") if fs is None else fs.open(path)) as f:
+        if size <= 2 * HASH_BLOCK_SIZE:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(HASH_BLOCK_SIZE))
+            f.seek(-HASH_BLOCK_SIZE, os.SEEK_END)
+            digest.update(f.read(HASH_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def full_digest(path, size=None, fs=None):
+    """Hash the whole file; takes the same arguments as partial_digest."""
+    return file_digest(path, fs).hex()
+
+
+def same_content(path, other, cache=None, fs=None):
+    """Return True if two files have the same content.
+
+    Sizes are compared first; full hashes are taken from (and stored in)
+    the optional FileCache. Files are read through the ``fs`` backend if
+    one is given.
+    """
+    st = os.stat(path) if fs is None else fs.stat(path)
+    other_st = os.stat(other) if fs is None else fs.stat(other)
+    if st.st_size != other_st.st_size:
+        return False
+    if st.st_ino and (st.st_dev, st.st_ino) == (other_st.st_dev, other_st.st_ino):
+        return True
+
+    def digest(file_path, file_st):
+        key = stat_key(file_st)
+        cached = cache.get(key) if cache is not None else None
+        if cached and cached.get("f"):
+            return cached["f"]
+        value = full_digest(file_path, fs=fs)
+        if cache is not None:
+            cache.put(key, dict(cached or {}, f=value))
+        return value
+
+    return digest(path, st) == digest(other, other_st)
+
+
+class DuplicateFinder:
+    """Group files by content using size, partial and full hashes."""
+
+    def __init__(self, cache_path=None, workers=DEFAULT_HASH_WORKERS, fs=None):
+        """Initialize the finder and load the hash cache; files are read through ``fs``."""
+        # None reads local files directly, which process pools can do too
+        self.fs = fs if fs is not None and not fs.local else None
+        self.cache = FileCache(cache_path)
+        self.workers = max(1, int(workers))
+        self.partial_hashed = 0
+        self.full_hashed = 0
+        self.cached = 0
+
+    def _cached(self, key, field):
+        """Return a cached hash ("p" partial or "f" full) for an identity key."""
+        value = self.cache.get(key)
+        return value.get(field) if value else None
+
+    def _store(self, key, field, digest):
+        """Remember a hash for an identity key."""
+        value = dict(self.cache.get(key) or {})
+        value[field] = digest
+        self.cache.put(key, value)
+
+    def _digests(self, files, field, compute, pool_factory):
+        """Return {position: digest} for (position, path, size, key) files.
+
+        Cached digests are used where possible; the rest are computed with
+        ``compute(path, size)`` on a pool made by ``pool_factory`` (None =
+        inline); it must be a module level function so process pools can
+        run it. Files that cannot be read are left out.
+        """
+        digests = {}
+        todo = []
+        for position, path, size, key in files:
+            digest = self._cached(key, field)
+            if digest is not None:
+                digests[position] = digest
+                self.cached += 1
+            else:
+                todo.append((position, path, size, key))
+        if not todo:
+            return digests
+
+        if pool_factory is None or len(todo) == 1:
+            for item in todo:
+                try:
+                    digest = compute(item[1], item[2])
+                except OSError:
+                    digest = None
+                self._collect(item, field, digest, digests)
+        else:
+            with pool_factory() as pool:
+                futures = [pool.submit(compute, item[1], item[2]) for item in todo]
+                for item, future in zip(todo, futures):
+                    try:
+                        digest = future.result()
+                    except OSError:
+                        digest = None
+                    self._collect(item, field, digest, digests)
+        return digests
+
+    def _collect(self, item, field, digest, digests):
+        """Record one computed digest."""
+        if digest is None:
+            return
+        position, _, _, key = item
+        digests[position] = digest
+        self._store(key, field, digest)
+        if field == "f":
+            self.full_hashed += 1
+        else:
+            self.partial_hashed += 1
+
+    def find(self, entries):
+        """Return {position: original position} for every duplicate in entries.
+
+        ``entries`` is a list of DirEntry-like objects. Within each group of
+        identical files the one with the shortest name (then the oldest)
+        is kept as the original, so ``report (1).pdf`` counts as the copy.
+        Empty files are never reported.
+        """
+        by_size = {}
+        for position, entry in enumerate(entries):
+            try:
+                size = entry.stat().st_size
+                if size:
+                    by_size.setdefault(size, []).append((position, entry.path, size,
+                                                         identity_key(entry)))
+            except OSError:
+                continue
+
+        # Stage 2: first and last blocks of every file sharing its size
+        candidates = [item for items in by_size.values() if len(items) > 1 for item in items]
+        if self.fs is None:
+            partial_compute, full_compute = partial_digest, full_digest
+        else:
+            partial_compute = functools.partial(partial_digest, fs=self.fs)
+            full_compute = functools.partial(full_digest, fs=self.fs)
+        partial = self._digests(
+            candidates, "p", partial_compute,
+            lambda: ThreadPoolExecutor(self.workers, thread_name_prefix="springclean-hash"))
+        groups = {}
+        for item in candidates:
+            digest = partial.get(item[0])
+            if digest is not None:
+                groups.setdefault((item[2], digest), []).append(item)
+
+        # Stage 3: full hashes for large files that still look the same
+        matches = []
+        large = []
+        for (size, _), items in groups.items():
+            if len(items) < 2:
+                continue
+            if size <= 2 * HASH_BLOCK_SIZE:
+                matches.append([item[0] for item in items])
+            else:
+                large.extend(items)
+        if large:
+            use_processes = (self.fs is None
+                             and sum(item[2] for item in large) >= PROCESS_POOL_MIN_BYTES)
+            if use_processes:
+                # Imported on demand: it loads multiprocessing, which slows down app startup
+                from concurrent.futures import ProcessPoolExecutor
+            full = self._digests(
+                large, "f", full_compute,
+                (lambda: ProcessPoolExecutor(self.workers)) if use_processes else None)
+            full_groups = {}
+            for item in large:
+                digest = full.get(item[0])
+                if digest is not None:
+                    full_groups.setdefault((item[2], digest), []).append(item[0])
+            matches.extend(group for group in full_groups.values() if len(group) > 1)
+
+        def keep_order(position):
+            entry = entries[position]
+            return (len(entry.name), entry.stat().st_mtime, position)
+
+        originals = {}
+        for group in matches:
+            original = min(group, key=keep_order)
+            for position in group:
+                if position != original:
+                    originals[position] = original
+        return originals
+
+    def close(self):
+        """Save the hash cache."""
+        self.cache.save()
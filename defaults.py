@@ -0,0 +1,30 @@
+"""Defaults of the optional features, shared by the entry points.
+
+organizer.py, cli.py and SpringClean.py need these values for their
+settings and command-line options even when the feature is not used, so
+they live here instead of in netshare.py, archiver.py, dirindex.py and
+analytics.py, which are only imported once the feature runs. Those modules
+take their defaults from here too.
+"""
+import os
+
+# Upper bound of the number of calls in flight in network mode (netshare.py)
+DEFAULT_MAX_IN_FLIGHT = 64
+
+# Folder the archives are kept in, next to the category folders (archiver.py)
+ARCHIVE_FOLDER = "ARCHIVE"
+
+# Supported archive formats
+ARCHIVE_FORMATS = ("zip", "tar.zst")
+
+# Files not modified for this many days are archived (0 turns archiving off)
+DEFAULT_ARCHIVE_DAYS = 365
+
+# Bundles compressed at the same time
+DEFAULT_ARCHIVE_WORKERS = min(4, os.cpu_count() or 2)
+
+# Directory index database, next to config.json (dirindex.py)
+DEFAULT_DIR_INDEX = "dir_index.sqlite"
+
+# Number of largest files listed in an analysis report (analytics.py)
+DEFAULT_TOP_FILES = 20
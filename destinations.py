@@ -0,0 +1,112 @@
+"""In-memory index of the names inside destination folders.
+
+Each category folder is listed once; after that, whether a destination name
+is taken is answered from memory instead of by a stat per file, which
+matters on network shares. The index learns about completed moves, and a
+folder is only listed again once its mtime shows that something else
+changed it. That mtime is checked once per batch: the organizer calls
+revalidate() at the start of every plan.
+
+When a destination name is taken the organizer resolves the clash according
+to one of CONFLICT_POLICIES:
+
+* ``skip``: leave the file where it is (the default).
+* ``suffix``: move it under the first free name, ``report (1).pdf``, ...
+* ``overwrite-if-newer``: replace the existing file if the new one was
+  modified more recently, otherwise leave it.
+* ``keep-both-by-hash``: leave it if it has the same content as the
+  existing file, otherwise move it under a numbered name.
+
+Clashes between two files of the same run are never resolved by
+overwriting; ``overwrite-if-newer`` numbers them like ``suffix``.
+"""
+import os
+
+from localfs import LOCAL
+
+CONFLICT_POLICIES = ("skip", "suffix", "overwrite-if-newer", "keep-both-by-hash")
+
+# Highest number tried when looking for a free "name (n).ext"
+MAX_SUFFIX = 10000
+
+
+class DestinationIndex:
+    """Normalized names in destination folders, listed once and kept in sync."""
+
+    def __init__(self, fs=None):
+        """Create an empty index of folders on a backend (see backends.py)."""
+        self.fs = fs or LOCAL
+        self.folders = {}
+        self.synced = {}
+        # Synced folders whose mtime was checked since the last revalidate()
+        self.checked = set()
+
+    def names(self, target_dir):
+        """Return the set of normalized names in a folder.
+
+        Returns None if the path exists but is not a usable folder. A folder
+        listed before is only listed again if its mtime changed since the
+        index was last synced with it, which is checked on the first call
+        after revalidate().
+        """
+        names = self.folders.get(target_dir)
+        if names is not None and target_dir in self.synced and target_dir not in self.checked:
+            self.checked.add(target_dir)
+            try:
+                mtime = self.fs.stat(target_dir).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != self.synced[target_dir]:
+                names = None
+        if names is None:
+            try:
+                names = {os.path.normcase(name) for name in self.fs.listdir(target_dir)}
+            except FileNotFoundError:
+                names = set()
+            except OSError:
+                names = False
+            self.folders[target_dir] = names
+            self.synced.pop(target_dir, None)
+        return names if names is not False else None
+
+    def add(self, target_dir, name):
+        """Record that a file named ``name`` now exists in a folder."""
+        names = self.folders.get(target_dir)
+        if names is not None and names is not False:
+            names.add(os.path.normcase(name))
+
+    def sync(self, target_dir):
+        """Remember a folder's mtime after our own moves into it are recorded."""
+        if not isinstance(self.folders.get(target_dir), set):
+            return
+        try:
+            self.synced[target_dir] = self.fs.stat(target_dir).st_mtime_ns
+        except OSError:
+            self.folders.pop(target_dir, None)
+            self.synced.pop(target_dir, None)
+
+    def revalidate(self):
+        """Start a new batch: check the mtime of synced folders again when next used."""
+        self.checked = set()
+
+    def forget(self):
+        """Drop everything, so every folder is listed again."""
+        self.folders = {}
+        self.synced = {}
+        self.checked = set()
+
+
+def numbered_name(name, number, split=os.path.splitext):
+    """Return ``name`` with `` (number)`` inserted before its extension."""
+    stem, extension = split(name)
+    return f"{stem} ({number}){extension}"
+
+
+def free_name(name, *taken, split=os.path.splitext):
+    """Return the first ``name (n).ext`` not in any of the ``taken`` name sets."""
+    for number in range(1, MAX_SUFFIX + 1):
+        candidate = numbered_name(name, number, split)
+        key = os.path.normcase(candidate)
+        if not any(key in names for names in taken):
+            return candidate
+    return None
@@ -0,0 +1,210 @@
+"""Remember the state of organized folders so later runs skip what did not change.
+
+A DirectoryIndex keeps, in an SQLite database next to config.json, the
+modification time of every folder a run left without any file to organize,
+and the folders below it. A folder's mtime changes whenever a file is
+added, removed or renamed in it, so the next run only lists folders whose
+mtime changed; it still stats the known subfolders, as a change deep in
+the tree does not touch its parents.
+
+Folders still holding files after a run (name conflicts, skipped
+duplicates, failed moves) are never stored as unchanged: editing a file in
+place or freeing the name it conflicted with does not change the folder's
+mtime, so they are listed and their files planned again on every run.
+
+The index belongs to the settings that decide what a scan finds and how it
+is planned (categories, rules, recursion, exclusions, ...); when they
+change the folder is scanned in full. So it is after a crash that left
+the database unclean (it is checked with PRAGMA quick_check), when the
+database cannot be read, and when a sample of unchanged folders listed at
+the start of every run does not match what the index says about them.
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+
+INDEX_FORMAT_VERSION = 2
+
+# Unchanged folders listed anyway at the start of a run to check the index
+INTEGRITY_SAMPLE = 8
+
+# A folder whose mtime is this recent may still change within the same
+# mtime tick, which would go unnoticed; it is listed again next time
+RACY_SECONDS = 2.0
+
+# Seconds to wait for another process writing the database
+LOCK_TIMEOUT = 10.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS roots (root TEXT PRIMARY KEY, fingerprint TEXT);
+CREATE TABLE IF NOT EXISTS dirs (root TEXT, path TEXT, mtime_ns INTEGER, subdirs TEXT,
+                                 PRIMARY KEY (root, path));
+"""
+
+
+class DirectoryIndex:
+    """The saved state of one folder tree, loaded for the length of a run.
+
+    Everything known about ``root`` is read when the index is created and
+    the database is closed again, so the index can be used from any thread
+    while the walk goes on. ``listed`` collects what the run saw, and
+    save() writes it back.
+
+    With ``full_scan`` nothing is loaded, so every folder is listed and
+    the tree's state is rebuilt from scratch.
+    """
+
+    def __init__(self, path, root, fingerprint, full_scan=False, log=None):
+        """Load the saved state of a folder tree."""
+        self.path = path
+        self.root = os.path.abspath(root)
+        self.fingerprint = fingerprint
+        self.log = log or (lambda message: None)
+        # Folder -> (mtime_ns, JSON list of subfolder names), for folders known clean
+        self.dirs = {}
+        # Folder -> [mtime_ns before listing, [subfolder names], files found]
+        self.listed = {}
+        self.unchanged_dirs = 0
+        if not full_scan:
+            try:
+                self.load()
+            except sqlite3.Error as e:
+                self.log(f"✗ Folder index unreadable ({e}); scanning everything")
+                self.reset()
+
+    def connect(self):
+        """Open the database, creating its tables if needed."""
+        connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def reset(self):
+        """Start over with an empty database."""
+        self.dirs = {}
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.log(f"✗ Could not remove {self.path + suffix}: {e}")
+
+    def load(self):
+        """Read the state of the tree, after checking the database can be trusted."""
+        if not os.path.exists(self.path):
+            return
+        connection = self.connect()
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            if meta.get("version", str(INDEX_FORMAT_VERSION)) != str(INDEX_FORMAT_VERSION):
+                self.log("Folder index was written by another version; scanning everything")
+                connection.close()
+                self.reset()
+                return
+            if meta.get("clean", "1") != "1":
+                # The last run did not finish writing it
+                result = connection.execute("PRAGMA quick_check").fetchone()[0]
+                if result != "ok":
+                    self.log(f"✗ Folder index is damaged ({result}); scanning everything")
+                    connection.close()
+                    self.reset()
+                    return
+            row = connection.execute("SELECT fingerprint FROM roots WHERE root = ?",
+                                     (self.root,)).fetchone()
+            if row is None or row[0] != self.fingerprint:
+                if row is not None:
+                    self.log("Settings changed since the last run; scanning everything")
+                return
+            self.dirs = {path: (mtime_ns, subdirs) for path, mtime_ns, subdirs in connection.execute(
+                "SELECT path, mtime_ns, subdirs FROM dirs WHERE root = ? AND mtime_ns IS NOT NULL",
+                (self.root,))}
+        finally:
+            connection.close()
+
+    def check(self, fs, exclude=None, sample=INTEGRITY_SAMPLE):
+        """List a few unchanged folders and drop the index if they do not match it.
+
+        Returns True if the index passed.
+        """
+        if not self.dirs:
+            return True
+        paths = random.sample(list(self.dirs), min(sample, len(self.dirs)))
+        for path in paths:
+            try:
+                if fs.stat(path).st_mtime_ns != self.dirs[path][0]:
+                    continue
+                subdirs = set()
+                files = 0
+                with fs.scandir(path) as listing:
+                    for entry in listing:
+                        if exclude is not None and exclude.match(entry.name):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.add(entry.name)
+                        elif entry.is_file():
+                            files += 1
+            except OSError:
+                continue
+            if files or not set(json.loads(self.dirs[path][1])) <= subdirs:
+                self.log(f"Folder index does not match {path}; scanning everything")
+                self.dirs = {}
+                return False
+        return True
+
+    def unchanged(self, path, mtime_ns):
+        """Return the subfolder names of a folder that did not change, or None."""
+        known = self.dirs.get(path)
+        if known is None or known[0] != mtime_ns:
+            return None
+        self.unchanged_dirs += 1
+        return json.loads(known[1])
+
+    def forget(self, path):
+        """Make sure a folder is listed again next time."""
+        self.listed.pop(path, None)
+        self.dirs.pop(path, None)
+
+    def save(self, states):
+        """Write what the run learned.
+
+        ``states`` maps every listed folder to (mtime_ns or None, subfolder
+        names). A folder stored without an mtime is listed again next time.
+        """
+        now = time.time_ns()
+        racy = int(RACY_SECONDS * 1e9)
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                                   (str(INDEX_FORMAT_VERSION),))
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('clean', '0')")
+            with connection:
+                row = connection.execute("SELECT fingerprint FROM roots WHERE root = ?",
+                                         (self.root,)).fetchone()
+                if row is None or row[0] != self.fingerprint:
+                    connection.execute("DELETE FROM dirs WHERE root = ?", (self.root,))
+                    connection.execute("INSERT OR REPLACE INTO roots VALUES (?, ?)",
+                                       (self.root, self.fingerprint))
+                for path, (mtime_ns, subdirs) in states.items():
+                    old = connection.execute("SELECT subdirs FROM dirs WHERE root = ? AND path = ?",
+                                             (self.root, path)).fetchone()
+                    if old is not None and old[0]:
+                        for name in set(json.loads(old[0])) - set(subdirs):
+                            self._delete_tree(connection, os.path.join(path, name))
+                    if mtime_ns is not None and now - mtime_ns < racy:
+                        mtime_ns = None
+                    connection.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                                       (self.root, path, mtime_ns, json.dumps(sorted(subdirs))))
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('clean', '1')")
+        finally:
+            connection.close()
+
+    def _delete_tree(self, connection, path):
+        """Remove a folder that is gone, and everything below it."""
+        prefix = os.path.join(path, "")
+        connection.execute("DELETE FROM dirs WHERE root = ? AND (path = ? OR substr(path, 1, ?) = ?)",
+                           (self.root, path, len(prefix), prefix))
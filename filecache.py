@@ -0,0 +1,75 @@
+"""On-disk caches of per-file results keyed by file identity.
+
+A file's identity is its (device, inode, size, mtime). It does not change
+when the organizer renames the file into a category folder, but it does
+change as soon as the file is modified, so stale results are never used.
+"""
+import os
+import json
+import threading
+
+# Oldest entries are dropped beyond this many cached files
+MAX_CACHE_ENTRIES = 200000
+
+
+def stat_key(st):
+    """Return the cache key of a stat result."""
+    return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def identity_key(entry):
+    """Return the cache key of a DirEntry (or anything with .stat() and .path)."""
+    st = entry.stat()
+    if not st.st_ino:
+        # DirEntry.stat() leaves the inode out on Windows
+        st = os.stat(entry.path)
+    return stat_key(st)
+
+
+class FileCache:
+    """JSON-backed {identity key: value} cache, written atomically."""
+
+    def __init__(self, path=None, max_entries=MAX_CACHE_ENTRIES):
+        """Load the cache file if there is one; without a path nothing is saved."""
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading cache {path}: {e}")
+
+    def get(self, key, default=None):
+        """Return the cached value for a key."""
+        return self.entries.get(key, default)
+
+    def put(self, key, value):
+        """Remember a value for a key."""
+        self.entries[key] = value
+        self.dirty = True
+
+    def save(self):
+        """Write the cache back to disk if anything changed."""
+        if not self.path or not self.dirty:
+            return
+        entries = self.entries
+        if len(entries) > self.max_entries:
+            # Dicts keep insertion order, so the oldest results go first
+            keys = list(entries)[len(entries) - self.max_entries:]
+            entries = {key: entries[key] for key in keys}
+        # Organizers running side by side (see scheduler.py) may save the same cache
+        temp_path = f"{self.path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Error saving cache {self.path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
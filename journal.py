@@ -0,0 +1,286 @@
+"""Crash-safe move journal with resume and undo.
+
+Every organize run that touches disk writes an append-only JSON-lines
+journal. The plan being executed is saved next to it. Before a batch of
+moves starts, its intents (index, source, destination) are written and
+fsynced. Completions are buffered and committed with the next batch of
+intents, so there is one fsync per batch instead of one per file. They are
+numbered in the order the moves finished, which parallel moves do not
+keep in plan order, so an undo of the last N moves reverts the N that
+finished last.
+
+After a crash the journal tells exactly which moves may have happened:
+everything marked done, plus intents whose destination exists while the
+source does not. That is enough to resume the run without rescanning the
+folder, or to undo all or part of it.
+"""
+import os
+import json
+import time
+import uuid
+import glob
+
+from mover import MoveExecutor, move_file
+from plan import STATUS_REPLACE, MovePlan
+
+# Journals live next to config.json unless told otherwise
+DEFAULT_JOURNAL_DIR = "journals"
+
+# Number of moves announced per write-ahead record (and per fsync)
+JOURNAL_BATCH_SIZE = 256
+
+
+class MoveJournal:
+    """Append-only write-ahead log of one organize run."""
+
+    def __init__(self, path, sequence=0):
+        """Open an existing journal for appending.
+
+        ``sequence`` is the number of the next completion, which continues
+        from JournalState.sequence when a run is resumed.
+        """
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._done = []
+        self.sequence = sequence
+
+    @classmethod
+    def create(cls, plan, directory=DEFAULT_JOURNAL_DIR):
+        """Start a journal for a plan, saving the plan next to it."""
+        os.makedirs(directory, exist_ok=True)
+        run_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8]
+        plan_path = os.path.join(directory, f"{run_id}.plan.json")
+        plan.to_json(plan_path)
+        journal = cls(os.path.join(directory, f"{run_id}.journal"))
+        journal._write({"type": "begin", "run": run_id, "folder": plan.folder,
+                        "plan": os.path.basename(plan_path), "created": time.time()}, sync=True)
+        return journal
+
+    def _write(self, record, sync=False):
+        """Append one record, optionally forcing it to stable storage."""
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if sync:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_intents(self, moves):
+        """Announce a batch of (index, source, destination) moves before they run.
+
+        Completions buffered since the previous batch are committed by the
+        same fsync.
+        """
+        self._flush_done()
+        self._write({"type": "intent", "moves": [list(move) for move in moves]}, sync=True)
+
+    def record_done(self, index):
+        """Buffer the completion of a move; it is committed with the next batch."""
+        self._done.append(index)
+
+    def record_undone(self, indices):
+        """Record moves that have been reverted by an undo."""
+        self._write({"type": "undone", "indices": list(indices)}, sync=True)
+
+    def _flush_done(self):
+        """Write buffered completions without syncing.
+
+        The record's "sequence" numbers the first of them; the others follow
+        in order.
+        """
+        if self._done:
+            self._write({"type": "done", "indices": self._done, "sequence": self.sequence})
+            self.sequence += len(self._done)
+            self._done = []
+
+    def close(self, finished=True):
+        """Commit pending records and mark the run finished (or just stop)."""
+        self._flush_done()
+        if finished:
+            self._write({"type": "end", "finished": time.time()})
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+class JournalState:
+    """What a journal says about its run, reconstructed from its records."""
+
+    def __init__(self, path):
+        """Read and replay a journal file."""
+        self.path = path
+        self.run_id = None
+        self.folder = None
+        self.plan_path = None
+        self.moves = {}
+        self.done = set()
+        # Index -> completion number, and the next number to hand out
+        self.completion_order = {}
+        self.sequence = 0
+        self.undone = set()
+        self.finished = False
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line after a crash
+                    break
+                kind = record.get("type")
+                if kind == "begin":
+                    self.run_id = record["run"]
+                    self.folder = record["folder"]
+                    self.plan_path = os.path.join(os.path.dirname(path), record["plan"])
+                elif kind == "intent":
+                    for index, source, destination in record["moves"]:
+                        self.moves[index] = (source, destination)
+                elif kind == "done":
+                    # Journals without numbers were written in completion order
+                    first = record.get("sequence", self.sequence)
+                    for offset, index in enumerate(record["indices"]):
+                        self.completion_order[index] = first + offset
+                    self.sequence = max(self.sequence, first + len(record["indices"]))
+                    self.done.update(record["indices"])
+                elif kind == "undone":
+                    self.undone.update(record["indices"])
+                    self.done.difference_update(record["indices"])
+                elif kind == "end":
+                    self.finished = True
+
+    def completed(self):
+        """Return the indices whose move has taken effect.
+
+        Moves marked done are trusted; announced moves without a completion
+        record are checked on disk.
+        """
+        completed = set(self.done)
+        for index, (source, destination) in self.moves.items():
+            if (index not in completed and index not in self.undone
+                    and os.path.lexists(destination) and not os.path.lexists(source)):
+                completed.add(index)
+        return completed
+
+    def finished_last(self, indices):
+        """Return completed move indices, the most recently finished first.
+
+        Moves found on disk without a completion record finished after the
+        last one that was committed.
+        """
+        after = self.sequence
+        return sorted(indices, key=lambda index: (self.completion_order.get(index, after), index),
+                      reverse=True)
+
+    def load_plan(self):
+        """Load the plan this run was executing."""
+        return MovePlan.load(self.plan_path)
+
+
+def list_journals(directory=DEFAULT_JOURNAL_DIR):
+    """Return journal paths, newest first."""
+    return sorted(glob.glob(os.path.join(directory, "*.journal")), reverse=True)
+
+
+def latest_journal(directory=DEFAULT_JOURNAL_DIR):
+    """Return the newest journal path, or None if there is none."""
+    journals = list_journals(directory)
+    return journals[0] if journals else None
+
+
+def find_unfinished(directory=DEFAULT_JOURNAL_DIR):
+    """Return the journals of runs that never reached their end record."""
+    unfinished = []
+    for path in list_journals(directory):
+        try:
+            if not JournalState(path).finished:
+                unfinished.append(path)
+        except (OSError, ValueError, KeyError):
+            continue
+    return unfinished
+
+
+def category_of(folder, destination):
+    """Return the top-level category folder a destination lies in."""
+    relative = os.path.relpath(os.path.dirname(destination), folder)
+    return relative.split(os.sep, 1)[0]
+
+
+def undo_run(journal_path, categories=None, last=None, log=None, executor=None):
+    """Move files of a run back to where they came from.
+
+    ``categories`` limits the undo to moves into those category folders and
+    ``last`` to the N moves that finished last; by default the whole run is
+    undone. Moves that overwrote an older file are not undone, as the older
+    file is gone and moving the new one back would leave nothing in its
+    place; they are counted as "not_restorable". Returns a summary dict
+    like the organizer's.
+
+    Undoing a whole run that was interrupted also ends its journal, so the
+    run is no longer offered for resuming.
+    """
+    log = log or (lambda message: None)
+    state = JournalState(journal_path)
+    completed = state.finished_last(state.completed())
+    if categories:
+        wanted = {category.upper() for category in categories}
+        completed = [index for index in completed
+                     if category_of(state.folder, state.moves[index][1]).upper() in wanted]
+    if last is not None:
+        completed = completed[:last]
+
+    summary = {"journal": journal_path, "folder": state.folder, "total_files": len(completed),
+               "files_restored": 0, "not_restorable": 0, "errors": 0}
+    try:
+        plan = state.load_plan()
+    except (OSError, ValueError, KeyError) as e:
+        # Without the plan, moves that replaced a file cannot be told apart
+        log(f"✗ Could not read the plan of the run ({e}); undoing every move")
+        plan = None
+    if plan is not None:
+        replaced = [index for index in completed
+                    if index < len(plan) and plan.status(index) == STATUS_REPLACE]
+        for index in replaced:
+            log(f"✗ Not restoring {os.path.basename(state.moves[index][0])}: it replaced an "
+                f"older {os.path.basename(state.moves[index][1])}, which cannot be brought back")
+        summary["not_restorable"] = len(replaced)
+        if replaced:
+            replaced = set(replaced)
+            completed = [index for index in completed if index not in replaced]
+    journal = MoveJournal(journal_path)
+    restored = []
+    ended = False
+
+    def restore(index):
+        source, destination = state.moves[index]
+        if os.path.lexists(source):
+            raise FileExistsError(f"{source} already exists")
+        os.makedirs(os.path.dirname(source), exist_ok=True)
+        move_file(destination, source)
+
+    try:
+        for index, error in (executor or MoveExecutor()).run(completed, restore):
+            source, destination = state.moves[index]
+            if error is None:
+                log(f"↶ Restored: {os.path.basename(source)}")
+                summary["files_restored"] += 1
+                restored.append(index)
+                if len(restored) >= JOURNAL_BATCH_SIZE:
+                    journal.record_undone(restored)
+                    restored = []
+            else:
+                log(f"✗ Error restoring {os.path.basename(source)}: {error}")
+                summary["errors"] += 1
+        ended = not state.finished and not categories and last is None
+    finally:
+        if restored:
+            journal.record_undone(restored)
+        journal.close(finished=ended)
+
+    # Remove category folders (and date subfolders) the undo left empty
+    root = os.path.normcase(os.path.abspath(state.folder))
+    for folder in sorted({os.path.dirname(state.moves[index][1]) for index in completed},
+                         key=len, reverse=True):
+        while os.path.normcase(os.path.dirname(os.path.abspath(folder))).startswith(root):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                break
+            folder = os.path.dirname(folder)
+    return summary
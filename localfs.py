@@ -0,0 +1,83 @@
+"""The local file-system backend (see backends.py for the interface).
+
+It is kept apart from the in-memory and archive backends so the engine,
+which runs on it by default, loads without them.
+"""
+import os
+import shutil
+
+from mover import COPY_CHUNK_SIZE, REPLACE_SUFFIX, move_file
+
+
+class LocalBackend:
+    """The local file system."""
+
+    local = True
+
+    def scandir(self, path):
+        """Return an os.scandir iterator of a folder."""
+        return os.scandir(path)
+
+    def stat(self, path, follow_symlinks=True):
+        """Return the os.stat result of a path."""
+        return os.stat(path, follow_symlinks=follow_symlinks)
+
+    def listdir(self, path):
+        """Return the names in a folder."""
+        return os.listdir(path)
+
+    def lexists(self, path):
+        """Return True if anything, even a broken link, is at the path."""
+        return os.path.lexists(path)
+
+    def makedirs(self, path):
+        """Create a folder and its missing parents."""
+        os.makedirs(path, exist_ok=True)
+
+    def move(self, src, dst, src_dev=None, dst_dev=None, verify="none", progress=None,
+             replace=False):
+        """Move a file with mover.move_file."""
+        move_file(src, dst, src_dev=src_dev, dst_dev=dst_dev, verify=verify, progress=progress,
+                  replace=replace)
+
+    def link(self, src, dst):
+        """Create a hard link at dst to the file at src."""
+        os.link(src, dst)
+
+    def unlink(self, path):
+        """Remove a file."""
+        os.unlink(path)
+
+    def open(self, path):
+        """Open a file for reading in binary mode."""
+        return open(path, "rb")
+
+    def head(self, path, size):
+        """Return the first ``size`` bytes of a file."""
+        # One unbuffered read instead of filling a file object's buffer
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            return os.read(fd, size)
+        finally:
+            os.close(fd)
+
+    def write(self, path, stream, replace=False):
+        """Create a file from a readable binary stream."""
+        # A replacement is written next to the old file first, so a failure keeps it
+        target = path + REPLACE_SUFFIX if replace else path
+        output = open(target, "wb" if replace else "xb")
+        try:
+            with output:
+                shutil.copyfileobj(stream, output, COPY_CHUNK_SIZE)
+            if replace:
+                os.replace(target, path)
+        except BaseException:
+            try:
+                os.unlink(target)
+            except OSError:
+                pass
+            raise
+
+
+# Shared instance used wherever no backend is given
+LOCAL = LocalBackend()
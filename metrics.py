@@ -0,0 +1,197 @@
+"""Optional instrumentation of organize runs: stage timers, counters, histograms.
+
+An organizer created with metrics wraps its stage methods (listing, stat,
+classification, mkdir, moves, journal writes) so that every call adds to
+per-stage wall and CPU time. Moves also feed latency histograms, split
+into renames and copies. Without metrics nothing is wrapped, so a normal
+run pays nothing.
+
+Stage CPU time is measured per calling thread and summed, so for stages
+running on worker pools (moves) wall and CPU are totals over all threads
+and may exceed the elapsed time of the run.
+"""
+import time
+import json
+import threading
+from bisect import bisect_left
+
+# Histogram bucket upper bounds in seconds: 1 µs doubling up to ~67 s
+HISTOGRAM_BOUNDS = tuple(1e-6 * 2 ** power for power in range(27))
+
+METRICS_FORMAT_VERSION = 1
+
+
+class Histogram:
+    """Latency histogram with fixed logarithmic buckets."""
+
+    def __init__(self):
+        """Create an empty histogram."""
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        """Add one measurement (not thread safe; see RunMetrics.observe)."""
+        self.buckets[bisect_left(HISTOGRAM_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given fraction.
+
+        The bound is capped at the largest measurement, which is closer
+        when the top bucket is only partly filled.
+        """
+        if not self.count:
+            return None
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                return (min(HISTOGRAM_BOUNDS[index], self.max) if index < len(HISTOGRAM_BOUNDS)
+                        else self.max)
+        return self.max
+
+    def to_dict(self):
+        """Return a JSON-serializable description of the histogram."""
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "buckets": {f"le_{bound:g}": count
+                        for bound, count in zip(HISTOGRAM_BOUNDS + (float("inf"),), self.buckets)
+                        if count},
+        }
+
+
+class RunMetrics:
+    """Stage timers, counters and histograms of one organize run."""
+
+    def __init__(self):
+        """Create empty metrics."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything measured so far."""
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}
+            self.counters = {}
+            self.histograms = {}
+
+    def add_time(self, stage, wall, cpu, calls=1):
+        """Add wall and CPU seconds to a stage."""
+        with self._lock:
+            record = self.stages.get(stage)
+            if record is None:
+                record = self.stages[stage] = [0, 0.0, 0.0]
+            record[0] += calls
+            record[1] += wall
+            record[2] += cpu
+
+    def count(self, counter, amount=1):
+        """Increase a counter."""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def observe(self, histogram, seconds):
+        """Add a measurement to a histogram."""
+        with self._lock:
+            target = self.histograms.get(histogram)
+            if target is None:
+                target = self.histograms[histogram] = Histogram()
+            target.observe(seconds)
+
+    def timed(self, stage, func):
+        """Return func wrapped so that every call is added to a stage."""
+        perf_counter = time.perf_counter
+        thread_time = time.thread_time
+
+        def wrapper(*args, **kwargs):
+            wall = perf_counter()
+            cpu = thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add_time(stage, perf_counter() - wall, thread_time() - cpu)
+        return wrapper
+
+    def timed_iter(self, stage, iterable):
+        """Yield from an iterable, adding the time spent producing items to a stage."""
+        perf_counter = time.perf_counter
+        thread_time = time.thread_time
+        iterator = iter(iterable)
+        wall_total = 0.0
+        cpu_total = 0.0
+        calls = 0
+        try:
+            while True:
+                wall = perf_counter()
+                cpu = thread_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    wall_total += perf_counter() - wall
+                    cpu_total += thread_time() - cpu
+                    calls += 1
+                yield item
+        finally:
+            self.add_time(stage, wall_total, cpu_total, calls)
+
+    def to_dict(self):
+        """Return all metrics as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                "version": METRICS_FORMAT_VERSION,
+                "started": self.started,
+                "stages": {name: {"calls": calls, "wall": wall, "cpu": cpu}
+                           for name, (calls, wall, cpu) in self.stages.items()},
+                "counters": dict(self.counters),
+                "histograms": {name: histogram.to_dict()
+                               for name, histogram in self.histograms.items()},
+            }
+
+    def export(self, path):
+        """Write the metrics to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+
+def format_metrics(data):
+    """Return human readable summary lines for a metrics dict."""
+    lines = []
+    for name, stage in data["stages"].items():
+        lines.append(f"{name}: {stage['wall']:.3f}s wall, {stage['cpu']:.3f}s CPU "
+                     f"({stage['calls']} calls)")
+    for name, histogram in data["histograms"].items():
+        if histogram["count"]:
+            lines.append(f"{name} latency: p50 {histogram['p50'] * 1000:.2f} ms, "
+                         f"p99 {histogram['p99'] * 1000:.2f} ms, "
+                         f"max {histogram['max'] * 1000:.2f} ms ({histogram['count']} files)")
+    counters = data["counters"]
+    if counters.get("bytes_moved"):
+        lines.append(f"Bytes moved: {counters['bytes_moved'] / 1048576:.1f} MB "
+                     f"({counters.get('bytes_copied', 0) / 1048576:.1f} MB copied across drives)")
+    return lines
+
+
+def format_bytes(size):
+    """Return a size as a short human readable string."""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
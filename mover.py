@@ -0,0 +1,239 @@
+"""Move stage of the organizer: worker pools, renames and fast copies."""
+import os
+import errno
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Default concurrency for the move stage
+DEFAULT_MOVE_WORKERS = 4
+DEFAULT_COPY_WORKERS = 1
+
+# Chunk size for cross-device copies (kernel copy calls and buffered reads)
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Temporary name suffix of a copy that is going to replace an existing file
+REPLACE_SUFFIX = ".springclean-part"
+
+# Supported checks of a cross-device copy before the source is removed
+VERIFY_MODES = ("none", "size", "hash")
+
+# errno values meaning "this kernel copy call does not work here, try another"
+_KERNEL_COPY_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                                errno.ENOTSUP, errno.EBADF, errno.EPERM}
+
+
+class VerificationError(OSError):
+    """A copied file does not match its source."""
+
+
+def _copy_kernel(func, src_fd, dst_fd, total, progress):
+    """Copy with os.copy_file_range or os.sendfile; return False if unsupported."""
+    copied = 0
+    while copied < total:
+        try:
+            if func is os.sendfile:
+                sent = os.sendfile(dst_fd, src_fd, copied, COPY_CHUNK_SIZE)
+            else:
+                sent = os.copy_file_range(src_fd, dst_fd, COPY_CHUNK_SIZE)
+        except OSError as e:
+            if copied == 0 and e.errno in _KERNEL_COPY_FALLBACK_ERRNOS:
+                return False
+            raise
+        if sent == 0:
+            break
+        copied += sent
+        if progress:
+            progress(copied, total)
+    return True
+
+
+def _copy_buffered(src_file, dst_file, total, progress):
+    """Copy through a single large reusable buffer."""
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    copied = 0
+    while True:
+        read = src_file.readinto(buffer)
+        if not read:
+            break
+        dst_file.write(view[:read])
+        copied += read
+        if progress:
+            progress(copied, total)
+
+
+def copy_file_data(src, dst, progress=None, exclusive=False):
+    """Copy file contents using the fastest method the platform offers.
+
+    Tries os.copy_file_range, then os.sendfile (both copy inside the kernel),
+    then falls back to buffered reads. ``progress(copied_bytes, total_bytes)``
+    is called after every chunk. With ``exclusive``, an existing ``dst``
+    raises FileExistsError instead of being overwritten.
+    """
+    with open(src, "rb") as src_file, open(dst, "xb" if exclusive else "wb") as dst_file:
+        total = os.fstat(src_file.fileno()).st_size
+        src_fd = src_file.fileno()
+        dst_fd = dst_file.fileno()
+        for func in (getattr(os, "copy_file_range", None), getattr(os, "sendfile", None)):
+            if func is not None and _copy_kernel(func, src_fd, dst_fd, total, progress):
+                return
+        _copy_buffered(src_file, dst_file, total, progress)
+
+
+def file_digest(path, fs=None):
+    """Return the BLAKE2b digest of a file's contents (read through ``fs`` if given)."""
+    digest = hashlib.blake2b()
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with (open(path, "rb") if fs is None else fs.open(path)) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.digest()
+
+
+def verify_copy(src, dst, mode):
+    """Raise VerificationError if dst does not match src under the given mode."""
+    if mode == "size" or mode == "hash":
+        if os.stat(src).st_size != os.stat(dst).st_size:
+            raise VerificationError(errno.EIO, "size mismatch after copy", dst)
+    if mode == "hash" and file_digest(src) != file_digest(dst):
+        raise VerificationError(errno.EIO, "content mismatch after copy", dst)
+
+
+def rename_no_replace(src, dst):
+    """Rename a file, raising FileExistsError if ``dst`` exists.
+
+    os.rename refuses an existing destination only on Windows; elsewhere the
+    file is hard-linked to its new name and the old name removed. For
+    symlinks and where hard links are not supported the destination is
+    checked just before renaming.
+    """
+    if os.name == "nt":
+        os.rename(src, dst)
+        return
+    if not os.path.islink(src):
+        try:
+            os.link(src, dst)
+        except OSError as e:
+            if e.errno in (errno.EEXIST, errno.EXDEV, errno.ENOENT):
+                raise
+            # No hard links on this file system (FAT, some network shares)
+        else:
+            try:
+                os.unlink(src)
+            except BaseException:
+                # Keep the file under one name only
+                os.unlink(dst)
+                raise
+            return
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, "File exists", dst)
+    os.rename(src, dst)
+
+
+def move_file(src, dst, src_dev=None, dst_dev=None, verify="none", progress=None,
+              replace=False):
+    """Move a file, renaming on the same device and copying across devices.
+
+    ``src_dev``/``dst_dev`` are optional st_dev hints; when they differ the
+    rename is not even attempted. A rename that fails with EXDEV also falls
+    back to the copy path. Cross-device copies go through copy_file_data,
+    are checked with verify_copy and only then is the source unlinked. A
+    partially written destination is removed if anything goes wrong.
+
+    Unless ``replace`` is given, an existing destination is never
+    overwritten, even one created after the move was planned:
+    FileExistsError is raised instead. With ``replace`` it is overwritten
+    on every platform; a copy is then written under a temporary name first,
+    so the old file survives a failed copy.
+    """
+    if src_dev is None or dst_dev is None or src_dev == dst_dev:
+        try:
+            if replace:
+                os.replace(src, dst)
+            else:
+                rename_no_replace(src, dst)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+    if os.path.islink(src):
+        if not replace and os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, "File exists", dst)
+        # Let shutil recreate the link itself rather than copying its target
+        shutil.move(src, dst)
+        return
+
+    target = dst + REPLACE_SUFFIX if replace else dst
+    try:
+        copy_file_data(src, target, progress, exclusive=not replace)
+        shutil.copystat(src, target)
+        verify_copy(src, target, verify)
+        if replace:
+            os.replace(target, dst)
+    except FileExistsError:
+        # The destination is not ours; leave it alone
+        raise
+    except BaseException:
+        try:
+            os.unlink(target)
+        except OSError:
+            pass
+        raise
+    os.unlink(src)
+
+
+def call_job(func, job):
+    """Run func(job) and return the raised exception, or None on success."""
+    try:
+        func(job)
+        return None
+    except Exception as e:
+        return e
+
+
+class MoveExecutor:
+    """Run move jobs on bounded worker pools.
+
+    Same-volume moves are cheap renames and run on a pool of ``workers``
+    threads. Cross-volume moves copy data, so they get their own, usually
+    smaller, pool of ``copy_workers`` threads to avoid thrashing spinning
+    disks. Results are yielded to the calling thread in completion order, so
+    the caller can keep its counters without any locking.
+    """
+
+    def __init__(self, workers=DEFAULT_MOVE_WORKERS, copy_workers=DEFAULT_COPY_WORKERS):
+        """Initialize the executor with its concurrency limits."""
+        self.workers = max(1, int(workers))
+        self.copy_workers = max(1, int(copy_workers))
+
+    def run(self, jobs, func, is_cross_device=None):
+        """Apply func to every job and yield (job, exception_or_None)."""
+        if self.workers == 1 and self.copy_workers == 1:
+            for job in jobs:
+                yield job, call_job(func, job)
+            return
+
+        # Keep the number of queued futures bounded for very large folders
+        window = (self.workers + self.copy_workers) * 4
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix="springclean-move") as rename_pool, \
+             ThreadPoolExecutor(max_workers=self.copy_workers,
+                                thread_name_prefix="springclean-copy") as copy_pool:
+            for job in jobs:
+                pool = copy_pool if is_cross_device and is_cross_device(job) else rename_pool
+                pending[pool.submit(call_job, func, job)] = job
+                if len(pending) >= window:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
@@ -0,0 +1,298 @@
+"""Network-share mode: many file-system calls in flight at once.
+
+On an SMB or NFS mount every stat, mkdir and rename is a round trip of
+several milliseconds, so doing them one after another leaves the link idle
+most of the time. In network mode the organizer runs them through an
+AsyncPipeline instead: an asyncio event loop keeps many blocking calls
+running on a thread pool and hands their results back in completion order.
+
+How many calls are in flight is decided by an AdaptiveLimit, which grows
+while latency stays near the lowest seen and backs off when the share
+starts to queue requests, like TCP congestion control.
+
+SimulatedLatency is a stand-in for such a share on a local folder, used by
+benchmark.py --latency-ms.
+"""
+import os
+import time
+import errno
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mover import DEFAULT_COPY_WORKERS, call_job
+from defaults import DEFAULT_MAX_IN_FLIGHT
+
+# Starting point of the number of calls in flight (DEFAULT_MAX_IN_FLIGHT
+# is the upper bound)
+INITIAL_IN_FLIGHT = 8
+
+# A call is "slow" when it takes this many times the lowest recent latency,
+# and at least LATENCY_SLACK seconds more (so jitter on local disks is ignored)
+LATENCY_TOLERANCE = 2.0
+LATENCY_SLACK = 0.002
+
+# Share of the limit kept after a slow or failed call
+BACKOFF = 0.7
+
+# The lowest latency is measured again after this many calls, so the limit
+# follows a share that got slower or faster for good
+BASELINE_WINDOW = 1000
+
+# Errors a busy server answers with; the call is counted as slow
+OVERLOAD_ERRNOS = {errno.EAGAIN, errno.EBUSY, errno.ETIMEDOUT}
+
+# Cross-device copies queued per copy worker
+COPY_QUEUE_DEPTH = 4
+
+
+def is_overload(error):
+    """Return True if a call failed in a way that suggests an overloaded share."""
+    return isinstance(error, OSError) and error.errno in OVERLOAD_ERRNOS
+
+
+class AdaptiveLimit:
+    """Number of calls kept in flight, adjusted to the latency of the share.
+
+    Every call that completes near the lowest latency seen recently raises
+    the limit: by one per call until the first backoff (so it doubles every
+    round trip) and by one per round trip after that. A slow or overloaded
+    call cuts it to BACKOFF of its value, at most once per round trip.
+    """
+
+    def __init__(self, initial=INITIAL_IN_FLIGHT, minimum=1, maximum=DEFAULT_MAX_IN_FLIGHT):
+        """Initialize the limit."""
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.value = float(min(self.maximum, max(self.minimum, initial)))
+        self.slow_start = True
+        self.since_backoff = 0
+        self.reset()
+
+    @property
+    def current(self):
+        """Return the number of calls that may be in flight now."""
+        return int(self.value)
+
+    def reset(self):
+        """Forget the measured latency, e.g. before a different kind of call."""
+        self.base = None
+        self.window_min = None
+        self.samples = 0
+
+    def record(self, latency, overloaded=False):
+        """Adjust the limit after a call that took ``latency`` seconds."""
+        self.samples += 1
+        self.since_backoff += 1
+        if self.window_min is None or latency < self.window_min:
+            self.window_min = latency
+        if self.base is None or latency < self.base:
+            self.base = latency
+        if self.samples % BASELINE_WINDOW == 0:
+            self.base = self.window_min
+            self.window_min = None
+
+        slow = latency > self.base * LATENCY_TOLERANCE and latency - self.base > LATENCY_SLACK
+        if overloaded or slow:
+            if self.since_backoff >= self.value:
+                self.value = max(self.minimum, self.value * BACKOFF)
+                self.since_backoff = 0
+                self.slow_start = False
+        elif self.slow_start:
+            self.value = min(self.maximum, self.value + 1)
+        else:
+            self.value = min(self.maximum, self.value + 1 / self.value)
+
+
+class AsyncPipeline:
+    """Run blocking calls with an adaptive number in flight.
+
+    A drop-in for MoveExecutor: run(jobs, func, is_cross_device) applies
+    func to every job and yields (job, exception_or_None) to the calling
+    thread in completion order. The generator steps its own asyncio event
+    loop, which keeps up to ``limit.current`` calls running on a thread
+    pool. Cross-device copies are bound by bandwidth rather than round
+    trips, so they run on a separate pool of ``copy_workers`` threads and
+    are left out of the latency measurements.
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT, copy_workers=DEFAULT_COPY_WORKERS):
+        """Initialize the pipeline; its thread pools are created per run."""
+        self.limit = AdaptiveLimit(maximum=max_in_flight)
+        self.copy_workers = max(1, int(copy_workers))
+
+    async def call(self, loop, pool, func, job, measured):
+        """Run one call on a pool and feed its latency to the limit."""
+        start = time.perf_counter()
+        error = await loop.run_in_executor(pool, call_job, func, job)
+        if measured:
+            self.limit.record(time.perf_counter() - start, is_overload(error))
+        return job, error
+
+    def run(self, jobs, func, is_cross_device=None):
+        """Apply func to every job and yield (job, exception_or_None).
+
+        Jobs are pulled from the iterable on the calling thread, only while
+        there is room in flight. Runs of one pipeline must not overlap,
+        as they share the limit.
+        """
+        self.limit.reset()
+        jobs = iter(jobs)
+        loop = asyncio.new_event_loop()
+        pool = ThreadPoolExecutor(self.limit.maximum, thread_name_prefix="springclean-net")
+        copy_pool = ThreadPoolExecutor(self.copy_workers, thread_name_prefix="springclean-copy")
+        copies = set()
+        pending = set()
+        exhausted = False
+        try:
+            while True:
+                while (not exhausted and len(pending) - len(copies) < self.limit.current
+                       and len(copies) < self.copy_workers * COPY_QUEUE_DEPTH):
+                    job = next(jobs, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    copy = is_cross_device is not None and is_cross_device(job)
+                    task = loop.create_task(
+                        self.call(loop, copy_pool if copy else pool, func, job, not copy))
+                    pending.add(task)
+                    if copy:
+                        copies.add(task)
+                if not pending:
+                    return
+                done, pending = loop.run_until_complete(
+                    asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED))
+                for task in done:
+                    copies.discard(task)
+                    yield task.result()
+        finally:
+            # Calls already running on a thread cannot be cancelled; let them finish
+            if pending:
+                loop.run_until_complete(asyncio.wait(pending))
+            loop.close()
+            pool.shutdown(wait=True)
+            copy_pool.shutdown(wait=True)
+
+
+class _SlowListing:
+    """os.scandir() iterator whose entries are delayed by a SimulatedLatency."""
+
+    def __init__(self, listing, share):
+        self.listing = listing
+        self.share = share
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return _SlowEntry(next(self.listing), self.share)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.listing.close()
+
+
+class _SlowEntry:
+    """DirEntry whose first stat() costs a round trip, like on a network share."""
+
+    __slots__ = ("entry", "share", "name", "path", "statted")
+
+    def __init__(self, entry, share):
+        self.entry = entry
+        self.share = share
+        self.name = entry.name
+        self.path = entry.path
+        self.statted = set()
+
+    def __fspath__(self):
+        return self.path
+
+    def inode(self):
+        return self.entry.inode()
+
+    def is_dir(self, follow_symlinks=True):
+        return self.entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, follow_symlinks=True):
+        return self.entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        return self.entry.is_symlink()
+
+    def stat(self, follow_symlinks=True):
+        if follow_symlinks not in self.statted:
+            self.share.wait()
+            self.statted.add(follow_symlinks)
+        return self.entry.stat(follow_symlinks=follow_symlinks)
+
+
+class SimulatedLatency:
+    """Make a local folder behave like a high-latency network share.
+
+    While active (as a context manager) the os functions in DELAYED_CALLS
+    and the first stat() of scanned entries sleep for ``latency`` seconds
+    when they touch a path below ``root``. Sleeping releases the GIL, so as
+    with real round trips the delays of different threads overlap. With
+    ``capacity``, at most that many calls are served at once and the rest
+    wait in line, so latency rises when the share is overloaded.
+
+    This patches the os module for the whole process; it is meant for
+    benchmarks and experiments, not for use next to real work.
+    """
+
+    DELAYED_CALLS = ("stat", "lstat", "listdir", "scandir", "mkdir", "rmdir", "rename", "replace",
+                     "unlink", "remove", "link", "utime", "chmod")
+
+    def __init__(self, root, latency, capacity=None):
+        """Initialize the stand-in; nothing is patched until it is entered."""
+        self.root = os.path.join(os.path.abspath(root), "")
+        self.latency = latency
+        self.slots = threading.BoundedSemaphore(capacity) if capacity else None
+        self.originals = {}
+        self.calls = 0
+
+    def wait(self):
+        """Spend one round trip."""
+        self.calls += 1
+        if self.slots is None:
+            time.sleep(self.latency)
+            return
+        with self.slots:
+            time.sleep(self.latency)
+
+    def touches(self, path):
+        """Return True if a path argument lies below the root."""
+        if isinstance(path, int):
+            return False
+        path = os.fspath(path)
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        return os.path.join(os.path.abspath(path), "").startswith(self.root)
+
+    def wrap(self, name, original):
+        """Return a delaying version of an os function."""
+        def delayed(path=".", *args, **kwargs):
+            if self.touches(path):
+                self.wait()
+            result = original(path, *args, **kwargs)
+            if name == "scandir" and self.touches(path):
+                return _SlowListing(result, self)
+            return result
+        return delayed
+
+    def __enter__(self):
+        for name in self.DELAYED_CALLS:
+            original = getattr(os, name)
+            self.originals[name] = original
+            setattr(os, name, self.wrap(name, original))
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, original in self.originals.items():
+            setattr(os, name, original)
+        self.originals = {}
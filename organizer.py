@@ -0,0 +1,1149 @@
+"""GUI-free file organizing engine shared by the SpringClean GUI and CLI.
+
+Nothing in this module imports tkinter or the theming packages, so it can be
+used from cron jobs and headless servers.
+"""
+import os
+import stat
+import time
+import json
+import hashlib
+
+from mover import DEFAULT_COPY_WORKERS, DEFAULT_MOVE_WORKERS, VERIFY_MODES, MoveExecutor
+from walker import DEFAULT_WALK_WORKERS, ParallelWalker, compile_excludes
+from plan import (STATUS_DUPLICATE, STATUS_ERROR, STATUS_EXISTS, STATUS_IDENTICAL, STATUS_OK,
+                  STATUS_REPLACE, MovePlan)
+from journal import JOURNAL_BATCH_SIZE, JournalState, MoveJournal
+from watcher import DEFAULT_POLL_SECONDS, DEFAULT_SETTLE_SECONDS, FolderWatcher
+from sniffer import DEFAULT_SNIFF_WORKERS, ContentSniffer
+from dedupe import (DEFAULT_HASH_WORKERS, DUPLICATE_ACTIONS, DUPLICATES_FOLDER, DuplicateFinder,
+                    same_content)
+from destinations import CONFLICT_POLICIES, DestinationIndex, free_name
+from filecache import FileCache
+from metrics import RunMetrics
+from localfs import LOCAL
+from defaults import ARCHIVE_FOLDER, DEFAULT_MAX_IN_FLIGHT, DEFAULT_TOP_FILES
+from rules import RULES_KEY, RuleMatcher
+
+CONFLICT_MESSAGES = {
+    STATUS_EXISTS: "already exists",
+    STATUS_DUPLICATE: "is also the destination of another file",
+    STATUS_ERROR: "cannot be created",
+}
+
+# Default file type categories (basic - for typical Windows users)
+DEFAULT_FILE_CATEGORIES = {
+    "DOCUMENTS": [".pdf", ".doc", ".docx", ".txt", ".rtf"],
+    "SPREADSHEETS": [".xls", ".xlsx", ".csv"],
+    "PRESENTATIONS": [".ppt", ".pptx"],
+    "IMAGES": [".jpg", ".jpeg", ".png", ".gif", ".bmp"],
+    "VIDEOS": [".mp4", ".avi", ".mkv", ".mov", ".wmv"],
+    "AUDIO": [".mp3", ".wav", ".m4a", ".wma"],
+    "PROGRAMS": [".exe", ".msi"],
+    "COMPRESSED": [".zip", ".rar", ".7z"]
+}
+
+def load_file_categories(json_path=None):
+    """Load file categories from JSON file or return defaults."""
+    try:
+        if json_path and os.path.exists(json_path):
+            with open(json_path, 'r', encoding='utf-8') as f:
+                categories = json.load(f)
+                return categories
+        else:
+            # Return hardcoded defaults without creating files
+            return DEFAULT_FILE_CATEGORIES.copy()
+    except Exception as e:
+        print(f"Error loading file categories from {json_path}: {e}")
+        return DEFAULT_FILE_CATEGORIES.copy()
+
+def save_file_categories(categories, json_path="file_categories.json"):
+    """Save file categories to JSON file."""
+    try:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(categories, f, indent=4)
+        return True
+    except Exception as e:
+        print(f"Error saving file categories: {e}")
+        return False
+
+
+class CategoryIndex:
+    """Precompiled extension -> category lookup table.
+
+    Extensions are case-folded and may span several suffixes (``.tar.gz``);
+    lookups try the longest suffix first. When two categories claim the same
+    extension the first one wins, like the old linear scan, and the clash is
+    recorded in ``conflicts`` (extension -> list of claiming categories).
+
+    Ordered rules from the categories file (see rules.py) are compiled
+    into ``rules``, a RuleMatcher, or None when there are none.
+    """
+
+    def __init__(self, categories, rules=None):
+        """Compile the index from a {category: [extensions]} mapping and a rule list."""
+        self.rules = RuleMatcher(rules) if rules else None
+        # As given, so a change of rules can be recognized (see dirindex.py)
+        self.rule_specs = rules or []
+        self.by_extension = {}
+        self.conflicts = {}
+        self.max_parts = 1
+        for category, extensions in categories.items():
+            for extension in extensions:
+                key = extension.strip().lower()
+                if not key:
+                    continue
+                if not key.startswith("."):
+                    key = "." + key
+                owner = self.by_extension.get(key)
+                if owner is None:
+                    self.by_extension[key] = category
+                    self.max_parts = max(self.max_parts, key.count("."))
+                elif owner != category:
+                    claimants = self.conflicts.setdefault(key, [owner])
+                    if category not in claimants:
+                        claimants.append(category)
+
+    def lookup(self, extension):
+        """Return the category of a single extension such as '.pdf'."""
+        return self.by_extension.get(extension.lower(), "OTHERS")
+
+    def category_for(self, filename):
+        """Return the category of a file name, preferring the longest suffix."""
+        name = filename.lower()
+        by_extension = self.by_extension
+        if self.max_parts == 1:
+            pos = name.rfind(".")
+            if pos <= 0:
+                return "OTHERS"
+            return by_extension.get(name[pos:], "OTHERS")
+
+        # Collect up to max_parts suffix start positions, right to left.
+        # A leading dot marks a hidden file, not an extension.
+        starts = []
+        pos = len(name)
+        while len(starts) < self.max_parts:
+            pos = name.rfind(".", 0, pos)
+            if pos <= 0:
+                break
+            starts.append(pos)
+        for pos in reversed(starts):
+            category = by_extension.get(name[pos:])
+            if category is not None:
+                return category
+        return "OTHERS"
+
+    def extension_for(self, filename):
+        """Return the suffix category_for() goes by: the longest known one, else the last."""
+        name = filename.lower()
+        last = name.rfind(".")
+        if last <= 0:
+            return ""
+        starts = [last]
+        while len(starts) < self.max_parts:
+            pos = name.rfind(".", 0, starts[-1])
+            if pos <= 0:
+                break
+            starts.append(pos)
+        for pos in reversed(starts):
+            if name[pos:] in self.by_extension:
+                return name[pos:]
+        return name[last:]
+
+    def describe_conflicts(self):
+        """Return one human readable line per conflicting extension."""
+        return [f"{extension} is claimed by {', '.join(categories)} (using {categories[0]})"
+                for extension, categories in sorted(self.conflicts.items())]
+
+    def describe_rule_errors(self):
+        """Return one human readable line per rule that could not be used."""
+        return list(self.rules.errors) if self.rules is not None else []
+
+
+# Global variable for file categories (starts with defaults)
+FILE_CATEGORIES = DEFAULT_FILE_CATEGORIES.copy()
+CATEGORY_INDEX = CategoryIndex(FILE_CATEGORIES)
+
+def set_file_categories(categories):
+    """Replace the active file categories and rebuild the lookup index.
+
+    A "rules" list in ``categories`` is compiled into the index and left
+    out of FILE_CATEGORIES.
+    """
+    global FILE_CATEGORIES, CATEGORY_INDEX
+    rules = categories.get(RULES_KEY)
+    if rules is not None:
+        categories = {category: extensions for category, extensions in categories.items()
+                      if category != RULES_KEY}
+    FILE_CATEGORIES = categories
+    CATEGORY_INDEX = CategoryIndex(categories, rules)
+    return CATEGORY_INDEX
+
+def stat_entry(entry):
+    """Stat a scanned entry; DirEntry and PathEntry keep the result."""
+    entry.stat()
+
+
+def get_category(extension):
+    """Get the category of a file based on its extension."""
+    return CATEGORY_INDEX.lookup(extension)
+
+
+def category_folders():
+    """Return the names of every folder the organizer may move files into."""
+    categories = list(FILE_CATEGORIES) + ["OTHERS", DUPLICATES_FOLDER]
+    if CATEGORY_INDEX.rules is not None:
+        categories.extend(sorted(CATEGORY_INDEX.rules.folders))
+    return categories
+
+
+class PathEntry:
+    """Minimal os.DirEntry stand-in for a file that is known by name only."""
+
+    __slots__ = ("name", "path", "fs", "_stat")
+
+    def __init__(self, folder_path, name, fs=LOCAL):
+        """Create the entry; nothing is read from disk yet."""
+        self.name = name
+        self.path = os.path.join(folder_path, name)
+        self.fs = fs
+        self._stat = None
+
+    def stat(self, follow_symlinks=True):
+        """Return (and cache) the entry's stat result."""
+        if self._stat is None:
+            self._stat = self.fs.stat(self.path)
+        return self._stat
+
+    def is_file(self):
+        """Return True if the entry is a regular file (following symlinks)."""
+        try:
+            return stat.S_ISREG(self.stat().st_mode)
+        except OSError:
+            return False
+
+
+class FileOrganizer:
+    """Scan a folder, classify its files and move them into category folders.
+
+    The organizer reports back through two optional callbacks so that any
+    front end can drive it:
+
+    * ``log(message)`` receives human readable status lines.
+    * ``progress(processed, total)`` is called once with ``processed == 0``
+      after scanning and then after every file.
+
+    A run is split into plan() (scan and classify into a MovePlan, without
+    touching disk) and execute() (carry the plan out); run() does both.
+
+    Both callbacks are only ever invoked from the calling thread,
+    even when the moves themselves run on a worker pool. The optional
+    ``byte_progress(filename, copied, total)`` callback reports progress
+    inside cross-device copies and is called from the worker threads.
+
+    With ``sniff``, files whose extension is not in any category are
+    identified by their content (see sniffer.py) while the scan goes on.
+    ``duplicates`` ("skip", "collect" or "hardlink") turns on duplicate
+    detection among the planned files (see dedupe.py). ``conflicts`` is
+    the policy for destination names that are already taken (see
+    destinations.py).
+
+    ``network`` is meant for high-latency shares (see netshare.py): the
+    stats of the scan, the listings and creation of destination folders
+    and the moves each run with many calls in flight, up to
+    ``max_in_flight``, instead of one round trip after another.
+
+    Every listing, stat, mkdir, move and read goes through the ``fs``
+    backend (see backends.py), the local file system by default.
+
+    With ``metrics`` (True or a RunMetrics), every stage is timed and moves
+    feed latency histograms (see metrics.py). The summary returned by
+    execute() then has a "metrics" dict, which is also passed to the
+    ``on_metrics(metrics)`` hook.
+
+    ``on_record(record)``, if given, receives a dict for every file that
+    execute() handles (source, destination, category, bytes, outcome and an
+    optional message), from the calling thread, e.g. for an ActivityLog.
+
+    With ``dir_index`` (the path of a database, see dirindex.py), a run
+    only lists the folders that changed since the last run and does not
+    plan again the files that run left in place, unless they changed;
+    ``full_scan`` ignores what the index knows and rebuilds it. The index
+    is only updated by runs that are not dry runs and finish.
+    """
+
+    def __init__(self, dry_run=False, log=None, progress=None,
+                 workers=DEFAULT_MOVE_WORKERS, copy_workers=DEFAULT_COPY_WORKERS,
+                 verify="none", byte_progress=None, recursive=False, max_depth=None,
+                 exclude=(), walk_workers=DEFAULT_WALK_WORKERS, sniff=False,
+                 sniff_workers=DEFAULT_SNIFF_WORKERS, sniff_cache=None, duplicates="off",
+                 hash_cache=None, hash_workers=DEFAULT_HASH_WORKERS, metrics=None,
+                 on_metrics=None, conflicts="skip", on_record=None, network=False,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, fs=None, dir_index=None,
+                 full_scan=False):
+        """Initialize the organizer."""
+        if verify not in VERIFY_MODES:
+            raise ValueError(f"verify must be one of {', '.join(VERIFY_MODES)}")
+        if duplicates not in DUPLICATE_ACTIONS:
+            raise ValueError(f"duplicates must be one of {', '.join(DUPLICATE_ACTIONS)}")
+        if conflicts not in CONFLICT_POLICIES:
+            raise ValueError(f"conflicts must be one of {', '.join(CONFLICT_POLICIES)}")
+        self.dry_run = dry_run
+        self.fs = fs or LOCAL
+        self.log = log or (lambda message: None)
+        self.progress = progress or (lambda processed, total: None)
+        self.byte_progress = byte_progress
+        self.network = network
+        if network:
+            from netshare import AsyncPipeline
+            self.executor = AsyncPipeline(max_in_flight, copy_workers)
+        else:
+            self.executor = MoveExecutor(workers, copy_workers)
+        self.verify = verify
+        self.recursive = recursive
+        self.max_depth = max_depth
+        self.exclude = list(exclude)
+        self.walk_workers = walk_workers
+        self.sniff = sniff
+        self.sniff_workers = sniff_workers
+        self.sniff_cache = sniff_cache
+        self.duplicates = duplicates
+        self.hash_cache = hash_cache
+        self.hash_workers = hash_workers
+        self.conflicts = conflicts
+        self.dir_index = dir_index
+        self.full_scan = full_scan
+        self.dir_state = None
+        self.state_plan = None
+        self.walker = None
+        self.source_dev = None
+        self.targets = {}
+        # Kept across runs of this organizer; see DestinationIndex
+        self.index = DestinationIndex(self.fs)
+        self.planned_names = {}
+        self.content_cache = None
+        self.link_sources = {}
+        self.replace_indices = set()
+        self.recheck = False
+        self.started = None
+        self.metrics = RunMetrics() if metrics is True else (metrics or None)
+        self.on_metrics = on_metrics or (lambda metrics: None)
+        self.on_record = on_record
+        if self.metrics is not None:
+            self.instrument()
+
+    def instrument(self):
+        """Wrap the stage methods of this organizer with metric timers.
+
+        Only called when metrics are on, so uninstrumented runs keep calling
+        the plain methods.
+        """
+        metrics = self.metrics
+        for stage, method in (("scan", "scan"), ("classify", "classify"),
+                              ("rules", "apply_rules"), ("stat", "entry_size"),
+                              ("list_destinations", "existing_names"), ("mkdir", "target_for"),
+                              ("dedupe", "add_with_duplicates"), ("prefetch", "prefetch"),
+                              ("plan", "plan")):
+            setattr(self, method, metrics.timed(stage, getattr(self, method)))
+
+        move = self.move
+        perf_counter = time.perf_counter
+        thread_time = time.thread_time
+
+        def timed_move(job):
+            copied = job[4] != self.source_dev
+            wall = perf_counter()
+            cpu = thread_time()
+            try:
+                move(job)
+            finally:
+                elapsed = perf_counter() - wall
+                metrics.add_time("move", elapsed, thread_time() - cpu)
+                metrics.observe("copy" if copied else "rename", elapsed)
+            if copied and not self.dry_run:
+                metrics.count("bytes_copied", self.fs.stat(job[2]).st_size)
+        self.move = timed_move
+
+        execute = metrics.timed("execute", self.execute)
+
+        def execute_and_report(plan, recheck=False, journal=None, completed=()):
+            if journal is not None:
+                journal.record_intents = metrics.timed("journal", journal.record_intents)
+            summary = execute(plan, recheck=recheck, journal=journal, completed=completed)
+            for counter in ("total_files", "files_moved", "bytes_moved", "skipped", "conflicts",
+                            "errors"):
+                metrics.count(counter, summary[counter])
+            summary["metrics"] = metrics.to_dict()
+            self.on_metrics(summary["metrics"])
+            return summary
+        self.execute = execute_and_report
+
+    def iter_files(self, folder_path):
+        """Yield a DirEntry for every file directly inside the folder.
+
+        A single os.scandir pass is used; DirEntry.is_file() answers from the
+        directory listing itself on most platforms, so no extra stat call is
+        made per entry.
+        """
+        exclude = compile_excludes(self.exclude)
+        with self.fs.scandir(folder_path) as entries:
+            for entry in entries:
+                if exclude is not None and exclude.match(entry.name):
+                    continue
+                try:
+                    if entry.is_file():
+                        yield entry
+                except OSError:
+                    # Entry vanished or is unreadable while listing
+                    continue
+
+    def scan(self, folder_path):
+        """Return the inventory of files to organize.
+
+        The inventory is a snapshot: files created after the scan are left
+        for the next run, and files that disappear before they are moved are
+        reported as skipped rather than as errors.
+
+        In network mode every entry is stat'ed with many calls in flight
+        before it is checked, which also answers is_file() on shares whose
+        listings do not say what kind of entry each one is.
+        """
+        state = self.dir_state
+        if state is not None:
+            mtime_ns = self.fs.stat(folder_path).st_mtime_ns
+            if state.unchanged(folder_path, mtime_ns) is not None:
+                return []
+        if not self.network:
+            files = list(self.iter_files(folder_path))
+        else:
+            exclude = compile_excludes(self.exclude)
+            with self.fs.scandir(folder_path) as listing:
+                entries = [entry for entry in listing
+                           if exclude is None or not exclude.match(entry.name)]
+            self.prefetch(entries, stat_entry)
+            files = []
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        files.append(entry)
+                except OSError:
+                    continue
+        if state is not None:
+            state.listed[folder_path] = [mtime_ns, [], len(files)]
+        return files
+
+    def prefetch(self, items, func):
+        """Call func on every item with many calls in flight (network mode).
+
+        Used to warm the caches the plan and execute steps read from;
+        failures are ignored here and met again by the step that needs
+        the result.
+        """
+        for _ in self.executor.run(items, func):
+            pass
+
+    def walk(self, folder_path):
+        """Stream every file below the folder for the recursive mode.
+
+        The category folders the organizer creates itself are skipped so a
+        run never re-organizes its own output.
+        """
+        own_folders = [os.path.join(folder_path, category)
+                       for category in category_folders() + [ARCHIVE_FOLDER]]
+        self.walker = ParallelWalker(workers=self.walk_workers, max_depth=self.max_depth,
+                                     exclude=self.exclude, skip_dirs=own_folders, fs=self.fs,
+                                     dir_state=self.dir_state)
+        return self.walker.walk(folder_path)
+
+    def fingerprint(self):
+        """Return a digest of the settings that decide what a run plans.
+
+        The directory index of a folder is only used by runs with the same
+        fingerprint.
+        """
+        settings = {"recursive": self.recursive, "max_depth": self.max_depth,
+                    "exclude": self.exclude, "sniff": self.sniff, "duplicates": self.duplicates,
+                    "conflicts": self.conflicts, "categories": FILE_CATEGORIES,
+                    "rules": CATEGORY_INDEX.rule_specs}
+        text = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def open_dir_state(self, folder_path):
+        """Load the directory index of a folder for the coming plan."""
+        from dirindex import DirectoryIndex
+        self.dir_state = DirectoryIndex(self.dir_index, folder_path, self.fingerprint(),
+                                        full_scan=self.full_scan, log=self.log)
+        self.dir_state.check(self.fs, compile_excludes(self.exclude))
+
+    def save_dir_state(self, plan):
+        """Record in the directory index what a finished run left behind.
+
+        A folder is stored with its mtime only if no file is left in it to
+        organize. Folders still holding files (name conflicts, skipped
+        duplicates, failed moves) and folders that could not be read are
+        listed again next time, so their files are planned again. Folders
+        files were moved out of are listed again now, as the moves changed
+        their mtime.
+        """
+        import sqlite3
+        state = self.dir_state
+        self.dir_state = None
+        self.state_plan = None
+        if self.recursive and self.walker is not None:
+            for path, _ in self.walker.errors:
+                state.forget(path)
+                state.forget(os.path.dirname(path))
+        moved_from = set()
+        for index in range(len(plan)):
+            status = plan.status(index)
+            if status == STATUS_OK or status == STATUS_REPLACE:
+                moved_from.add(os.path.dirname(os.path.join(plan.folder, plan.sources[index])))
+        if moved_from:
+            # Category folders may have been created in it
+            moved_from.add(plan.folder)
+
+        exclude = compile_excludes(self.exclude)
+        states = {}
+        for path, (mtime_ns, subdirs, files) in state.listed.items():
+            if path in moved_from:
+                files = 0
+                subdirs = []
+                try:
+                    mtime_ns = self.fs.stat(path).st_mtime_ns
+                    with self.fs.scandir(path) as listing:
+                        for entry in listing:
+                            if exclude is not None and exclude.match(entry.name):
+                                continue
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.name)
+                            elif entry.is_file():
+                                files += 1
+                except OSError:
+                    mtime_ns = None
+            if files:
+                mtime_ns = None
+            states[path] = (mtime_ns, subdirs)
+        try:
+            state.save(states)
+        except sqlite3.Error as e:
+            self.log(f"✗ Could not save the folder index: {e}")
+
+    def classify(self, filename):
+        """Return the category folder name for a file."""
+        return CATEGORY_INDEX.category_for(filename)
+
+    def apply_rules(self, entry, category, prefix):
+        """Return the destination folder chosen by the first matching rule, or None.
+
+        ``prefix`` is the length of the organized folder's path, so the
+        entry's subfolder is the part of its path in between.
+        """
+        subfolder = os.path.dirname(entry.path[prefix:])
+        if os.sep != "/":
+            subfolder = subfolder.replace(os.sep, "/")
+        return CATEGORY_INDEX.rules.match(entry, category, subfolder, self.started)
+
+    def target_for(self, folder_path, category):
+        """Return (target_dir, st_dev) for a category, creating the folder once.
+
+        Results, including failures (stored as the exception), are cached for
+        the rest of the run so each category folder costs a single mkdir.
+        """
+        target = self.targets.get(category)
+        if target is None:
+            target_dir = os.path.join(folder_path, category)
+            try:
+                if self.dry_run:
+                    target = (target_dir, None)
+                else:
+                    self.fs.makedirs(target_dir)
+                    target = (target_dir, self.fs.stat(target_dir).st_dev)
+            except OSError as e:
+                target = e
+            self.targets[category] = target
+        if isinstance(target, Exception):
+            raise target
+        return target
+
+    def existing_names(self, folder_path, category):
+        """Return the normalized names already inside a category folder.
+
+        Answered from the destination index, which lists each folder once.
+        Returns None if the category path exists but is not a usable folder.
+        """
+        return self.index.names(os.path.join(folder_path, category))
+
+    def split_name(self, name):
+        """Split a file name into stem and extension, keeping known multi-part extensions."""
+        if CATEGORY_INDEX.max_parts > 1:
+            lower = name.lower()
+            pos = lower.find(".", 1)
+            while pos > 0:
+                if lower[pos:] in CATEGORY_INDEX.by_extension:
+                    return name[:pos], name[pos:]
+                pos = lower.find(".", pos + 1)
+        return os.path.splitext(name)
+
+    def resolve_conflict(self, entry, target_dir, existing, planned):
+        """Apply the conflict policy to a file whose destination name is taken.
+
+        ``planned`` maps the names already claimed by this plan to their
+        sources. Returns (status, target_name); target_name is None when the
+        file keeps its name.
+        """
+        name = entry.name
+        key = os.path.normcase(name)
+        policy = self.conflicts
+        if policy == "skip":
+            return (STATUS_DUPLICATE if key in planned else STATUS_EXISTS), None
+        on_disk = key not in planned
+        other = os.path.join(target_dir, name) if on_disk else planned[key]
+        try:
+            if policy == "overwrite-if-newer" and on_disk:
+                if entry.stat().st_mtime > self.fs.stat(other).st_mtime:
+                    planned[key] = entry.path
+                    return STATUS_REPLACE, None
+                return STATUS_EXISTS, None
+            if policy == "keep-both-by-hash":
+                if self.content_cache is None:
+                    self.content_cache = FileCache(self.hash_cache)
+                if same_content(entry.path, other, self.content_cache, self.fs):
+                    return STATUS_IDENTICAL, None
+        except OSError:
+            # One of the files vanished; execution will sort it out
+            return (STATUS_DUPLICATE if key in planned else STATUS_EXISTS), None
+        new_name = free_name(name, existing, planned, split=self.split_name)
+        if new_name is None:
+            return STATUS_EXISTS, None
+        planned[os.path.normcase(new_name)] = entry.path
+        return STATUS_OK, new_name
+
+    def plan(self, folder_path, names=None):
+        """Scan and classify the folder into a MovePlan without touching disk.
+
+        With ``names``, only those files directly inside the folder are
+        planned and the folder is not listed (used by the watch mode).
+        """
+        folder_path = os.path.abspath(folder_path)
+        plan = MovePlan(folder_path)
+        if self.metrics is not None:
+            self.metrics.reset()
+        self.planned_names = {}
+        # Destination folders changed by others since the last run are found once per plan
+        self.index.revalidate()
+        # Rule ages are measured from the start of the plan
+        self.started = time.time()
+        self.dir_state = None
+        self.state_plan = None
+        if names is None and self.dir_index:
+            self.open_dir_state(folder_path)
+            self.state_plan = plan
+        if names is not None:
+            exclude = compile_excludes(self.exclude)
+            entries = [entry for entry in (PathEntry(folder_path, name, self.fs) for name in names)
+                       if exclude is None or not exclude.match(entry.name)]
+            if self.network:
+                self.prefetch(entries, stat_entry)
+            entries = [entry for entry in entries if entry.is_file()]
+        elif self.recursive:
+            self.log("Scanning folder tree...")
+            entries = self.walk(folder_path)
+            if self.metrics is not None:
+                # The walk lists folders as its entries are consumed
+                entries = self.metrics.timed_iter("scan", entries)
+            if self.network:
+                entries = list(entries)
+                self.prefetch(entries, stat_entry)
+        else:
+            entries = self.scan(folder_path)
+
+        # Sources are stored relative to the folder; slicing beats os.path.relpath
+        prefix = len(os.path.join(folder_path, ""))
+        sniffer = (ContentSniffer(self.sniff_workers, self.sniff_cache, self.fs) if self.sniff
+                   else None)
+        try:
+            classified = self.classify_entries(entries, sniffer, prefix)
+            if self.network:
+                # List the destination folders side by side before planning
+                classified = list(classified)
+                self.prefetch({category for _, category in classified},
+                              lambda category: self.existing_names(folder_path, category))
+            if self.duplicates == "off":
+                for entry, category in classified:
+                    self.add_to_plan(plan, entry, category, prefix)
+            else:
+                self.add_with_duplicates(plan, list(classified), prefix)
+        finally:
+            if sniffer is not None:
+                sniffer.close()
+            if self.content_cache is not None:
+                self.content_cache.save()
+                self.content_cache = None
+
+        if self.recursive and names is None:
+            for path, error in self.walker.errors:
+                self.log(f"✗ Could not read {path}: {error}")
+        if self.dir_state is not None:
+            self.log(f"Skipped {self.dir_state.unchanged_dirs} unchanged folders")
+        return plan
+
+    def inventory(self, folder_path, top=DEFAULT_TOP_FILES):
+        """Scan the folder into a FolderInventory without planning any moves.
+
+        Files are listed and classified as plan() would do it (recursively,
+        skipping excluded names and the category folders, applying the
+        rules and sniffing files of unknown type if enabled).
+        """
+        folder_path = os.path.abspath(folder_path)
+        from analytics import FolderInventory
+        self.started = time.time()
+        self.dir_state = None
+        inventory = FolderInventory(folder_path, top)
+        if self.recursive:
+            self.log("Scanning folder tree...")
+            entries = self.walk(folder_path)
+            if self.network:
+                entries = list(entries)
+                self.prefetch(entries, stat_entry)
+        else:
+            entries = self.scan(folder_path)
+        prefix = len(os.path.join(folder_path, ""))
+        sniffer = (ContentSniffer(self.sniff_workers, self.sniff_cache, self.fs) if self.sniff
+                   else None)
+        extension_for = CATEGORY_INDEX.extension_for
+        try:
+            for entry, category in self.classify_entries(entries, sniffer, prefix):
+                inventory.add(entry, category, extension_for(entry.name))
+        finally:
+            if sniffer is not None:
+                sniffer.close()
+        if self.recursive:
+            for path, error in self.walker.errors:
+                self.log(f"✗ Could not read {path}: {error}")
+        return inventory
+
+    def classify_entries(self, entries, sniffer=None, prefix=0):
+        """Yield (entry, category) for scanned files.
+
+        The category is the destination folder, which a rule may have
+        chosen instead of the extension's category. With a ContentSniffer,
+        files of unknown type that no rule claims are read on the sniffing
+        pool while the scan goes on, and are yielded once it is done.
+        """
+        rules = CATEGORY_INDEX.rules is not None
+        sniffing = []
+        for entry in entries:
+            category = self.classify(entry.name)
+            if rules:
+                destination = self.apply_rules(entry, category, prefix)
+                if destination is not None:
+                    yield entry, destination
+                    continue
+            if sniffer is not None and category == "OTHERS":
+                sniffing.append((entry, sniffer.submit(entry)))
+                continue
+            yield entry, category
+
+        identified = 0
+        for entry, future in sniffing:
+            extension = future.result()
+            category = CATEGORY_INDEX.lookup(extension) if extension else "OTHERS"
+            if category != "OTHERS":
+                identified += 1
+                if rules:
+                    category = self.apply_rules(entry, category, prefix) or category
+            yield entry, category
+        if sniffing:
+            self.log(f"Identified {identified} of {len(sniffing)} unknown files by content "
+                     f"({sniffer.cached} from cache)")
+
+    def add_with_duplicates(self, plan, items, prefix):
+        """Add classified files to the plan, handling duplicates by content.
+
+        Depending on ``self.duplicates`` a duplicate is left in place
+        ("skip"), planned into the DUPLICATES folder ("collect"), or planned
+        as usual and later replaced by a hard link to its original
+        ("hardlink").
+        """
+        self.log("Looking for duplicate files...")
+        finder = DuplicateFinder(self.hash_cache, self.hash_workers, self.fs)
+        try:
+            originals = finder.find([entry for entry, _ in items])
+        finally:
+            finder.close()
+        if originals:
+            self.log(f"Found {len(originals)} duplicate files "
+                     f"({finder.cached} hashes from cache)")
+
+        plan.duplicate_action = self.duplicates
+        for position, (entry, category) in enumerate(items):
+            original = originals.get(position)
+            if original is None:
+                self.add_to_plan(plan, entry, category, prefix)
+            elif self.duplicates == "skip":
+                self.add_to_plan(plan, entry, category, prefix, status=STATUS_IDENTICAL,
+                                 duplicate_of=original)
+            elif self.duplicates == "collect":
+                self.add_to_plan(plan, entry, DUPLICATES_FOLDER, prefix, duplicate_of=original)
+            else:
+                self.add_to_plan(plan, entry, category, prefix, duplicate_of=original)
+
+    def entry_size(self, entry):
+        """Return the size of a scanned file, or 0 if it vanished since it was listed."""
+        try:
+            return entry.stat().st_size
+        except OSError:
+            # Execution will report it as skipped
+            return 0
+
+    def add_to_plan(self, plan, entry, category, prefix, status=None, duplicate_of=None):
+        """Add one scanned file to the plan.
+
+        Unless a status is given, it is the destination conflict status.
+        """
+        name = entry.name
+        size = self.entry_size(entry)
+        if status is not None:
+            plan.add(entry.path[prefix:], category, size, status, duplicate_of=duplicate_of)
+            return
+        existing = self.existing_names(plan.folder, category)
+        planned = self.planned_names.setdefault(category, {})
+        key = os.path.normcase(name)
+        target_name = None
+        if existing is None:
+            status = STATUS_ERROR
+        elif key in planned or key in existing:
+            status, target_name = self.resolve_conflict(
+                entry, os.path.join(plan.folder, category), existing, planned)
+        else:
+            status = STATUS_OK
+            planned[key] = entry.path
+        plan.add(entry.path[prefix:], category, size, status, target_name, duplicate_of)
+
+    def move(self, job):
+        """Move one file into its category folder (no-op on dry runs)."""
+        if self.dry_run:
+            return
+        index, source, destination, category, target_dev = job
+        replace = index in self.replace_indices
+        if self.recheck and not replace and self.fs.lexists(destination):
+            raise FileExistsError(f"{destination} already exists")
+        originals = self.link_sources.get(index)
+        if originals is not None and target_dev == self.source_dev:
+            if self.link_duplicate(originals, source, destination):
+                return
+        progress = None
+        if self.byte_progress is not None:
+            def progress(copied, total, name=os.path.basename(source)):
+                self.byte_progress(name, copied, total)
+        self.fs.move(source, destination, src_dev=self.source_dev, dst_dev=target_dev,
+                     verify=self.verify, progress=progress, replace=replace)
+
+    def link_duplicate(self, originals, source, destination):
+        """Replace a duplicate by a hard link to its original at the destination.
+
+        ``originals`` are the paths the original may be found at (it may be
+        moved concurrently). Returns False if hard links are not possible,
+        so the caller falls back to a normal move.
+        """
+        for original in originals:
+            try:
+                self.fs.link(original, destination)
+            except FileNotFoundError:
+                continue
+            except FileExistsError:
+                raise
+            except OSError:
+                return False
+            self.fs.unlink(source)
+            return True
+        return False
+
+    def execute(self, plan, recheck=False, journal=None, completed=()):
+        """Carry out a MovePlan and return a JSON-serializable summary dict.
+
+        Only entries whose status is "ok" (or "replace", which overwrites the
+        destination) are moved; conflicting entries are reported and left in
+        place. Completed moves are added to the destination index. Pass
+        ``recheck=True`` when replaying an older plan so that destinations
+        created since planning are not overwritten.
+
+        When a MoveJournal is given, each batch of moves is announced in it
+        before it starts and completions are recorded. Indices listed in
+        ``completed`` (from an interrupted run) are not moved again.
+        """
+        self.recheck = recheck
+        folder_path = plan.folder
+        summary = {
+            "folder": folder_path,
+            "dry_run": self.dry_run,
+            "recursive": self.recursive,
+            "total_files": len(plan),
+            "files_moved": 0,
+            "bytes_moved": 0,
+            "renamed": 0,
+            "replaced": 0,
+            "skipped": 0,
+            "conflicts": 0,
+            "already_done": 0,
+            "duplicates": len(plan.duplicate_of),
+            "errors": 0,
+            "categories": {},
+        }
+        if self.recursive and self.walker is not None:
+            summary["folders_scanned"] = self.walker.dirs_scanned
+            summary["errors"] += len(self.walker.errors)
+        # Only the run that planned with the directory index updates it
+        dir_state = self.dir_state is not None and plan is self.state_plan
+        if dir_state:
+            summary["folders_unchanged"] = self.dir_state.unchanged_dirs
+
+        total_files = len(plan)
+        if total_files == 0:
+            self.log("No files found to organize.")
+            if dir_state and not self.dry_run:
+                self.save_dir_state(plan)
+            return summary
+
+        self.log(f"Found {total_files} files to organize...")
+        self.progress(0, total_files)
+        self.targets = {}
+        self.source_dev = None if self.dry_run else self.fs.stat(folder_path).st_dev
+        self.link_sources = {}
+        if plan.duplicate_action == "hardlink":
+            for index, original in plan.duplicate_of.items():
+                paths = [os.path.join(folder_path, plan.sources[original])]
+                # Once moved, the original is only trusted at a destination it could claim
+                if plan.status(original) == STATUS_OK:
+                    paths.append(os.path.join(folder_path, plan.destination(original)))
+                self.link_sources[index] = paths
+        self.replace_indices = {index for index in range(total_files)
+                                if plan.status(index) == STATUS_REPLACE}
+        if self.network and not self.dry_run:
+            # Create the destination folders side by side before the moves start
+            self.prefetch({plan.category(index) for index in range(total_files)
+                           if plan.status(index) in (STATUS_OK, STATUS_REPLACE)
+                           and index not in completed},
+                          lambda category: self.target_for(folder_path, category))
+        processed = 0
+        on_record = self.on_record
+
+        def report(index, outcome, message=None):
+            record = {"event": "file",
+                      "source": os.path.join(folder_path, plan.sources[index]),
+                      "destination": os.path.join(folder_path, plan.destination(index)),
+                      "category": plan.category(index), "bytes": plan.sizes[index],
+                      "outcome": outcome}
+            if message is not None:
+                record["message"] = message
+            on_record(record)
+
+        def iter_jobs():
+            nonlocal processed
+            for index in range(total_files):
+                source = os.path.join(folder_path, plan.sources[index])
+                category = plan.category(index)
+                status = plan.status(index)
+                if index in completed:
+                    processed += 1
+                    summary["already_done"] += 1
+                    self.progress(processed, total_files)
+                    continue
+                if status == STATUS_IDENTICAL:
+                    processed += 1
+                    original = plan.duplicate_of.get(index)
+                    if original is None:
+                        # Matched a file already in the category folder
+                        summary["duplicates"] += 1
+                        same_as = f" (already in {category})"
+                    else:
+                        same_as = f" (same as {os.path.basename(plan.sources[original])})"
+                    self.log(f"- Skipped duplicate: {os.path.basename(source)}{same_as}")
+                    if on_record is not None:
+                        report(index, "duplicate", same_as.strip(" ()"))
+                    self.progress(processed, total_files)
+                    continue
+                if status != STATUS_OK and status != STATUS_REPLACE:
+                    processed += 1
+                    self.log(f"✗ Not moving {os.path.basename(source)}: "
+                             f"{plan.destination(index)} {CONFLICT_MESSAGES[status]}")
+                    if on_record is not None:
+                        report(index, "conflict", CONFLICT_MESSAGES[status])
+                    summary["conflicts"] += 1
+                    self.progress(processed, total_files)
+                    continue
+                try:
+                    target_dir, target_dev = self.target_for(folder_path, category)
+                except OSError as e:
+                    processed += 1
+                    self.log(f"✗ Error moving {os.path.basename(source)}: {e}")
+                    if on_record is not None:
+                        report(index, "error", str(e))
+                    summary["errors"] += 1
+                    self.progress(processed, total_files)
+                    continue
+                destination = os.path.join(folder_path, plan.destination(index))
+                yield index, source, destination, category, target_dev
+
+        def iter_journaled_jobs():
+            # Write-ahead: announce each batch before any of its moves start
+            batch = []
+            for job in iter_jobs():
+                batch.append(job)
+                if len(batch) >= JOURNAL_BATCH_SIZE:
+                    journal.record_intents((job[0], job[1], job[2]) for job in batch)
+                    yield from batch
+                    batch = []
+            if batch:
+                journal.record_intents((job[0], job[1], job[2]) for job in batch)
+                yield from batch
+
+        def is_cross_device(job):
+            return job[4] != self.source_dev
+
+        if self.dry_run:
+            journal = None
+        jobs = iter_jobs() if journal is None else iter_journaled_jobs()
+
+        verb = "Would move" if self.dry_run else "Moved"
+        finished = False
+        touched = set()
+        try:
+            for job, error in self.executor.run(jobs, self.move, is_cross_device):
+                index, source, destination, category, _ = job
+                filename = os.path.basename(source)
+                processed += 1
+                if error is None:
+                    target_name = plan.target_names[index]
+                    if index in self.replace_indices:
+                        self.log(f"✓ {verb}: {filename} → {category} (replacing an older file)")
+                        summary["replaced"] += 1
+                        outcome = "replaced"
+                    elif target_name:
+                        self.log(f"✓ {verb}: {filename} → {category} as {target_name}")
+                        summary["renamed"] += 1
+                        outcome = "renamed"
+                    else:
+                        self.log(f"✓ {verb}: {filename} → {category}")
+                        outcome = "moved"
+                    if on_record is not None:
+                        report(index, "dry_run" if self.dry_run else outcome)
+                    if not self.dry_run:
+                        target_dir = os.path.dirname(destination)
+                        self.index.add(target_dir, os.path.basename(destination))
+                        touched.add(target_dir)
+                    summary["files_moved"] += 1
+                    summary["bytes_moved"] += plan.sizes[index]
+                    summary["categories"][category] = summary["categories"].get(category, 0) + 1
+                    if journal is not None:
+                        journal.record_done(index)
+                elif isinstance(error, FileExistsError):
+                    # The destination appeared after planning; it is never overwritten
+                    self.log(f"✗ Not moving {filename}: {plan.destination(index)} "
+                             f"{CONFLICT_MESSAGES[STATUS_EXISTS]}")
+                    if on_record is not None:
+                        report(index, "conflict", CONFLICT_MESSAGES[STATUS_EXISTS])
+                    summary["conflicts"] += 1
+                elif isinstance(error, FileNotFoundError) and not self.fs.lexists(source):
+                    self.log(f"- Skipped (no longer exists): {filename}")
+                    if on_record is not None:
+                        report(index, "skipped", "no longer exists")
+                    summary["skipped"] += 1
+                else:
+                    self.log(f"✗ Error moving {filename}: {error}")
+                    if on_record is not None:
+                        report(index, "error", str(error))
+                    summary["errors"] += 1
+                self.progress(processed, total_files)
+            finished = True
+        finally:
+            if journal is not None:
+                journal.close(finished=finished)
+            for target_dir in touched:
+                self.index.sync(target_dir)
+
+        if dir_state and not self.dry_run:
+            self.save_dir_state(plan)
+        return summary
+
+    def resume(self, journal_path):
+        """Finish an interrupted run recorded in a journal.
+
+        The saved plan is executed again, skipping every move the journal
+        shows as completed or undone, and further moves are appended to the
+        same journal so a later undo covers the whole run.
+        """
+        state = JournalState(journal_path)
+        if state.finished:
+            raise ValueError(f"Run {state.run_id} already finished; nothing to resume")
+        completed = state.completed()
+        self.log(f"Resuming run {state.run_id}: {len(completed)} files already moved")
+        if state.undone:
+            self.log(f"{len(state.undone)} undone files are left where they are")
+        return self.execute(state.load_plan(), recheck=True,
+                            journal=MoveJournal(journal_path, state.sequence),
+                            completed=completed | state.undone)
+
+    def watch(self, folder_path, stop_event=None, journal_dir=None,
+              settle_seconds=DEFAULT_SETTLE_SECONDS, poll_seconds=DEFAULT_POLL_SECONDS,
+              on_batch=None):
+        """Organize files as they arrive until ``stop_event`` is set.
+
+        The folder is organized once, then only newly arrived files (directly
+        inside the folder) are planned and moved, in small batches, once they
+        have finished downloading. ``on_batch(summary)`` is called after
+        every batch, including the initial pass. Only folders on the local
+        file system can be watched.
+        """
+        if not self.fs.local:
+            raise ValueError("watch mode needs a folder on the local file system")
+        on_batch = on_batch or (lambda summary: None)
+        watcher = FolderWatcher(folder_path, settle_seconds=settle_seconds,
+                                poll_seconds=poll_seconds)
+        watcher.open()
+        batches = watcher.batches(stop_event)
+        recursive = self.recursive
+        try:
+            on_batch(self.run(folder_path, journal_dir=journal_dir))
+            # Arrivals are only watched at the top level of the folder
+            self.recursive = False
+            self.log(f"Watching {folder_path} for new files ({watcher.backend})...")
+            for names in batches:
+                plan = self.plan(folder_path, names=names)
+                journal = None
+                if journal_dir and not self.dry_run and len(plan):
+                    journal = MoveJournal.create(plan, journal_dir)
+                on_batch(self.execute(plan, journal=journal))
+        finally:
+            self.recursive = recursive
+            batches.close()
+
+    def run(self, folder_path, journal_dir=None):
+        """Plan and then execute the organization of a folder.
+
+        With ``journal_dir`` the run is journaled there (see journal.py).
+        """
+        plan = self.plan(folder_path)
+        journal = None
+        if journal_dir and not self.dry_run and len(plan):
+            journal = MoveJournal.create(plan, journal_dir)
+        return self.execute(plan, journal=journal)
+
+
+def organize_downloads(path, fs=LOCAL):
+    """Legacy function for backward compatibility; ``fs`` is a backend (see backends.py)."""
+    for filename in fs.listdir(path):
+        file_path = os.path.join(path, filename)
+
+        if PathEntry(path, filename, fs).is_file():
+            ext = os.path.splitext(filename)[1]
+            category = get_category(ext)
+
+            target_dir = os.path.join(path, category)
+            fs.makedirs(target_dir)
+
+            try:
+                fs.move(file_path, os.path.join(target_dir, filename))
+                print(f"Moved: {filename} → {category}")
+            except Exception as e:
+                print(f"Error moving {filename}: {e}")
@@ -0,0 +1,185 @@
+"""Move plans: what an organize run is going to do, before it touches disk.
+
+A plan is stored column-wise (parallel arrays and interned category codes)
+so that planning a folder with a million entries stays compact. Plans can be
+exported to JSON (replayable) or CSV (for spreadsheets) and compared with
+diff() to see what changed between two runs.
+"""
+import os
+import csv
+import json
+import time
+from array import array
+
+# Conflict status of a planned move
+STATUS_OK = "ok"
+STATUS_EXISTS = "exists"          # destination already exists on disk
+STATUS_DUPLICATE = "duplicate"    # another planned file has the same destination
+STATUS_ERROR = "error"            # category folder is unusable (e.g. a file has its name)
+STATUS_IDENTICAL = "identical"    # same content as another planned or existing file; left in place
+STATUS_REPLACE = "replace"        # destination exists but is older and will be overwritten
+STATUSES = (STATUS_OK, STATUS_EXISTS, STATUS_DUPLICATE, STATUS_ERROR, STATUS_IDENTICAL,
+            STATUS_REPLACE)
+
+PLAN_FORMAT_VERSION = 1
+
+
+class MovePlan:
+    """Compact, serializable list of planned moves for one folder.
+
+    Sources are stored relative to ``folder``. The destination of an entry is
+    ``folder/<category>/<target name>``, where the target name is the source
+    file name unless a different one was planned.
+
+    Entries found to have the same content as an earlier entry map to it in
+    ``duplicate_of``; ``duplicate_action`` says how they are handled
+    ("skip", "collect" or "hardlink", see dedupe.py).
+    """
+
+    def __init__(self, folder, created=None):
+        """Create an empty plan for a folder."""
+        self.folder = folder
+        self.created = created if created is not None else time.time()
+        self.category_names = []
+        self._category_codes = {}
+        self.sources = []
+        self.target_names = []
+        self.category_codes = array("I")
+        self.sizes = array("q")
+        self.status_codes = array("B")
+        self.duplicate_of = {}
+        self.duplicate_action = None
+
+    def __len__(self):
+        """Return the number of planned moves."""
+        return len(self.sources)
+
+    def add(self, source, category, size, status=STATUS_OK, target_name=None, duplicate_of=None):
+        """Append a planned move; ``source`` is relative to the plan folder."""
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self.category_names)
+            self.category_names.append(category)
+        self.sources.append(source)
+        self.target_names.append(target_name)
+        self.category_codes.append(code)
+        self.sizes.append(size)
+        self.status_codes.append(STATUSES.index(status))
+        if duplicate_of is not None:
+            self.duplicate_of[len(self.sources) - 1] = duplicate_of
+
+    def category(self, index):
+        """Return the category of an entry."""
+        return self.category_names[self.category_codes[index]]
+
+    def status(self, index):
+        """Return the conflict status of an entry."""
+        return STATUSES[self.status_codes[index]]
+
+    def destination(self, index):
+        """Return the destination of an entry, relative to the plan folder."""
+        name = self.target_names[index] or os.path.basename(self.sources[index])
+        return os.path.join(self.category(index), name)
+
+    def entries(self):
+        """Yield (source, destination, category, size, status) tuples."""
+        for index in range(len(self.sources)):
+            yield (self.sources[index], self.destination(index), self.category(index),
+                   self.sizes[index], self.status(index))
+
+    def counts(self):
+        """Return {"files", "bytes", "categories": {...}, "statuses": {...}}."""
+        categories = [0] * len(self.category_names)
+        for code in self.category_codes:
+            categories[code] += 1
+        statuses = [0] * len(STATUSES)
+        for code in self.status_codes:
+            statuses[code] += 1
+        return {
+            "files": len(self.sources),
+            "bytes": sum(self.sizes),
+            "categories": {name: count for name, count in zip(self.category_names, categories)},
+            "statuses": {name: count for name, count in zip(STATUSES, statuses) if count},
+        }
+
+    def to_json(self, path):
+        """Write the plan as JSON; the file can be replayed with load()."""
+        with open(path, "w", encoding="utf-8") as f:
+            header = {"version": PLAN_FORMAT_VERSION, "folder": self.folder, "created": self.created}
+            if self.duplicate_action:
+                header["duplicate_action"] = self.duplicate_action
+            f.write(json.dumps(header, indent=4)[:-2])
+            f.write(',\n    "entries": [')
+            separator = "\n        "
+            for index, (source, destination, category, size, status) in enumerate(self.entries()):
+                entry = {"source": source, "destination": destination,
+                         "category": category, "size": size, "status": status}
+                original = self.duplicate_of.get(index)
+                if original is not None:
+                    entry["duplicate_of"] = self.sources[original]
+                f.write(separator)
+                f.write(json.dumps(entry))
+                separator = ",\n        "
+            f.write("\n    ]\n}\n")
+
+    def to_csv(self, path):
+        """Write the plan as CSV with absolute source and destination paths."""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["source", "destination", "category", "size", "status", "duplicate_of"])
+            folder = self.folder
+            for index, (source, destination, category, size, status) in enumerate(self.entries()):
+                original = self.duplicate_of.get(index)
+                writer.writerow([os.path.join(folder, source), os.path.join(folder, destination),
+                                 category, size, status,
+                                 "" if original is None else os.path.join(folder, self.sources[original])])
+
+    def export(self, path):
+        """Write the plan as CSV if the path ends in .csv, otherwise as JSON."""
+        if path.lower().endswith(".csv"):
+            self.to_csv(path)
+        else:
+            self.to_json(path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a plan previously written with to_json()."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != PLAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported plan format version: {data.get('version')}")
+        plan = cls(data["folder"], data.get("created"))
+        plan.duplicate_action = data.get("duplicate_action")
+        originals = {}
+        for entry in data["entries"]:
+            source = entry["source"]
+            name = os.path.basename(entry["destination"])
+            plan.add(source, entry["category"], entry.get("size", 0), entry.get("status", STATUS_OK),
+                     None if name == os.path.basename(source) else name)
+            if "duplicate_of" in entry:
+                originals[len(plan) - 1] = entry["duplicate_of"]
+        if originals:
+            index_of = {source: index for index, source in enumerate(plan.sources)}
+            plan.duplicate_of = {index: index_of[source] for index, source in originals.items()
+                                 if source in index_of}
+        return plan
+
+    def diff(self, other):
+        """Compare this plan with a newer one.
+
+        Returns {"added": [...], "removed": [...], "changed": [...]} where
+        added/removed are source paths and changed holds
+        (source, old destination, new destination) for sources whose
+        destination or status differ.
+        """
+        mine = {source: index for index, source in enumerate(self.sources)}
+        added = []
+        changed = []
+        for index, source in enumerate(other.sources):
+            old = mine.pop(source, None)
+            if old is None:
+                added.append(source)
+            elif (self.destination(old) != other.destination(index)
+                  or self.status(old) != other.status(index)):
+                changed.append((source, self.destination(old), other.destination(index)))
+        return {"added": added, "removed": sorted(mine), "changed": changed}
@@ -0,0 +1,283 @@
+"""Ordered classification rules from the categories JSON.
+
+Besides the {category: [extensions]} entries, a categories file may hold a
+"rules" list. Rules are tried in order after the extension lookup, and the
+first rule whose conditions all hold decides where a file goes:
+
+    "rules": [
+        {"name": "invoice*", "destination": "INVOICES"},
+        {"categories": ["IMAGES"], "destination": "{category}/{year}/{month}"},
+        {"extensions": [".iso", ".img"], "min_size": "1GB", "destination": "DISK_IMAGES"},
+        {"subfolder": "Screenshots*", "max_age_days": 7, "destination": "RECENT"}
+    ]
+
+Every condition is optional:
+
+* ``name``: glob, or list of globs, matched against the whole file name
+* ``regex``: regular expression searched for in the file name
+* ``extensions``: the file name ends with one of these
+* ``categories``: the file's extension (or content) category is one of these
+* ``min_size`` / ``max_size``: in bytes, or a string such as "10MB"
+* ``min_age_days`` / ``max_age_days``: days since the file was modified
+* ``subfolder``: glob matched against the folder holding the file, relative
+  to the organized folder with "/" separators ("" at the top)
+
+Names, globs and extensions ignore case. ``destination`` is a folder below
+the organized folder; it may use {category} (the extension category) and
+{year}, {month} and {day} of the modification time, except in its first
+component, which is the category folder.
+
+The rules are compiled once into a RuleMatcher. Rules are bucketed by the
+categories and extensions they apply to, so a file only looks at rules that
+can match it; all name patterns are merged into one regex that rules most
+files out with a single search; and size and age limits are number ranges
+checked against the stat result os.scandir already has.
+"""
+import re
+import time
+import fnmatch
+
+# Key of the rule list in a categories file
+RULES_KEY = "rules"
+
+_SIZE_PATTERN = re.compile(r"\s*(\d+(?:\.\d*)?|\.\d+)\s*([kmgt]?)i?b?\s*", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+_DATE_FIELDS = ("{year}", "{month}", "{day}")
+_RULE_KEYS = {"name", "regex", "extensions", "categories", "min_size", "max_size",
+              "min_age_days", "max_age_days", "subfolder", "destination"}
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+class RuleError(ValueError):
+    """A rule in the categories file cannot be used."""
+
+
+def parse_size(value):
+    """Return a size in bytes from a number or a string such as "1.5 GB"."""
+    if isinstance(value, bool):
+        raise RuleError(f"invalid size {value!r}")
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _SIZE_PATTERN.fullmatch(str(value))
+    if match is None:
+        raise RuleError(f"invalid size {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+def _as_list(spec, key):
+    """Return a rule field that may be a string or a list of strings as a list."""
+    value = spec[key]
+    values = [value] if isinstance(value, str) else value
+    if not isinstance(values, list) or not all(isinstance(item, str) for item in values):
+        raise RuleError(f"{key} must be a string or a list of strings")
+    return values
+
+
+def _glob_regex(patterns):
+    """Return one anchored regex source matching any of the globs."""
+    return "|".join(f"^{fnmatch.translate(pattern)}" for pattern in patterns)
+
+
+class Rule:
+    """One compiled rule; see the module docstring for the fields."""
+
+    __slots__ = ("index", "patterns", "source", "extensions", "categories", "min_size",
+                 "max_size", "min_age", "max_age", "subfolder", "destination", "dated",
+                 "needs_stat", "folder")
+
+    def __init__(self, index, spec):
+        """Compile a rule dict; raises RuleError if it is malformed."""
+        if not isinstance(spec, dict):
+            raise RuleError("must be an object")
+        unknown = set(spec) - _RULE_KEYS
+        if unknown:
+            raise RuleError(f"unknown field {', '.join(sorted(unknown))}")
+        self.index = index
+
+        sources = []
+        if "name" in spec:
+            sources.append(_glob_regex(_as_list(spec, "name")))
+        if "regex" in spec:
+            sources.append(spec["regex"])
+        self.source = "|".join(f"(?:{source})" for source in sources) if sources else None
+        self.patterns = None
+        if sources:
+            try:
+                # name and regex must both hold, so each is searched on its own
+                self.patterns = [re.compile(source, re.IGNORECASE) for source in sources]
+            except re.error as e:
+                raise RuleError(f"invalid regex: {e}")
+
+        self.extensions = None
+        if "extensions" in spec:
+            self.extensions = tuple(
+                extension if extension.startswith(".") else "." + extension
+                for extension in (item.strip().lower() for item in _as_list(spec, "extensions"))
+                if extension)
+        self.categories = None
+        if "categories" in spec:
+            self.categories = frozenset(_as_list(spec, "categories"))
+
+        self.min_size = parse_size(spec["min_size"]) if "min_size" in spec else None
+        self.max_size = parse_size(spec["max_size"]) if "max_size" in spec else None
+        try:
+            self.min_age = float(spec["min_age_days"]) * DAY_SECONDS if "min_age_days" in spec else None
+            self.max_age = float(spec["max_age_days"]) * DAY_SECONDS if "max_age_days" in spec else None
+        except (TypeError, ValueError):
+            raise RuleError("ages must be numbers of days")
+
+        self.subfolder = None
+        if "subfolder" in spec:
+            self.subfolder = re.compile(_glob_regex(_as_list(spec, "subfolder")), re.IGNORECASE)
+
+        destination = spec.get("destination")
+        if not isinstance(destination, str) or not destination.strip("/\\ "):
+            raise RuleError("destination is missing")
+        parts = [part for part in destination.replace("\\", "/").split("/") if part]
+        if any(part in (".", "..") for part in parts) or ":" in parts[0]:
+            raise RuleError(f"destination {destination!r} must stay inside the organized folder")
+        if any(field in parts[0] for field in _DATE_FIELDS):
+            raise RuleError(f"destination {destination!r} cannot start with a date")
+        self.destination = "/".join(parts)
+        try:
+            self.destination.format(category="C", year="Y", month="M", day="D")
+        except (KeyError, IndexError, ValueError) as e:
+            raise RuleError(f"destination {destination!r} has an unknown field {e}")
+        self.dated = any(field in self.destination for field in _DATE_FIELDS)
+        # Top-level folder the rule moves files into, if it is fixed
+        self.folder = None if "{" in parts[0] else parts[0]
+        self.needs_stat = (self.dated or self.min_size is not None or self.max_size is not None
+                           or self.min_age is not None or self.max_age is not None)
+
+    def destination_for(self, category, st):
+        """Return the destination folder of a file matched by this rule."""
+        if self.dated:
+            date = time.localtime(st.st_mtime)
+            return self.destination.format(category=category, year=str(date.tm_year),
+                                           month=f"{date.tm_mon:02d}", day=f"{date.tm_mday:02d}")
+        if "{" in self.destination:
+            return self.destination.format(category=category)
+        return self.destination
+
+
+class RuleMatcher:
+    """All rules of a categories file compiled into one matcher.
+
+    Rules that cannot be compiled are left out and described in ``errors``.
+    """
+
+    def __init__(self, specs):
+        """Compile the rules."""
+        self.rules = []
+        self.errors = []
+        if not isinstance(specs, list):
+            self.errors.append(f"{RULES_KEY} must be a list")
+            specs = []
+        for number, spec in enumerate(specs, 1):
+            try:
+                self.rules.append(Rule(len(self.rules), spec))
+            except RuleError as e:
+                self.errors.append(f"rule {number}: {e}")
+
+        # One search that fails means no name pattern can match
+        sources = [rule.source for rule in self.rules if rule.source is not None]
+        try:
+            self.names = re.compile("|".join(f"(?:{source})" for source in sources),
+                                    re.IGNORECASE) if sources else None
+        except re.error:
+            # Backreferences and inline flags do not survive merging
+            self.names = None
+
+        # Rules bucketed by the category or extension they need; the rest apply to every file
+        generic = []
+        by_category = {}
+        by_extension = {}
+        for rule in self.rules:
+            if rule.categories is not None:
+                for category in rule.categories:
+                    by_category.setdefault(category, []).append(rule)
+            elif rule.extensions is not None:
+                for extension in rule.extensions:
+                    by_extension.setdefault(extension, []).append(rule)
+            else:
+                generic.append(rule)
+        self.generic = tuple(generic)
+        self.by_category = {category: self._merge(rules, generic)
+                            for category, rules in by_category.items()}
+        self.by_extension = {extension: tuple(rules) for extension, rules in by_extension.items()}
+        self.max_parts = max((extension.count(".") for extension in by_extension), default=0)
+        self.merged = {}
+        self.folders = {rule.folder for rule in self.rules if rule.folder is not None}
+
+    def __len__(self):
+        return len(self.rules)
+
+    @staticmethod
+    def _merge(*groups):
+        """Return the rules of several groups in their original order."""
+        return tuple(sorted({rule.index: rule for group in groups for rule in group}.values(),
+                            key=lambda rule: rule.index))
+
+    def candidates(self, lower_name, category):
+        """Return the rules that may match a file, in order."""
+        rules = self.by_category.get(category, self.generic)
+        if self.max_parts:
+            pos = len(lower_name)
+            for _ in range(self.max_parts):
+                pos = lower_name.rfind(".", 0, pos)
+                if pos <= 0:
+                    break
+                extension = lower_name[pos:]
+                if extension in self.by_extension:
+                    key = (category, extension)
+                    merged = self.merged.get(key)
+                    if merged is None:
+                        merged = self.merged[key] = self._merge(rules, self.by_extension[extension])
+                    rules = merged
+        return rules
+
+    def match(self, entry, category, subfolder="", now=None):
+        """Return the destination folder of the first matching rule, or None.
+
+        ``entry`` is a DirEntry-like object and ``category`` the category
+        of its extension (or content). Its stat result is only used if a
+        candidate rule needs the size, age or date.
+        """
+        name = entry.name
+        lower_name = name.lower()
+        rules = self.candidates(lower_name, category)
+        if not rules:
+            return None
+        names_possible = None
+        st = None
+        for rule in rules:
+            if rule.extensions is not None and not lower_name.endswith(rule.extensions):
+                continue
+            if rule.patterns is not None:
+                if names_possible is None:
+                    names_possible = self.names is None or self.names.search(name) is not None
+                if not names_possible or any(pattern.search(name) is None
+                                             for pattern in rule.patterns):
+                    continue
+            if rule.subfolder is not None and rule.subfolder.match(subfolder) is None:
+                continue
+            if rule.needs_stat:
+                if st is None:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        return None
+                size = st.st_size
+                if rule.min_size is not None and size < rule.min_size:
+                    continue
+                if rule.max_size is not None and size > rule.max_size:
+                    continue
+                if rule.min_age is not None or rule.max_age is not None:
+                    age = (time.time() if now is None else now) - st.st_mtime
+                    if rule.min_age is not None and age < rule.min_age:
+                        continue
+                    if rule.max_age is not None and age > rule.max_age:
+                        continue
+            return rule.destination_for(category, st)
+        return None
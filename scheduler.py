@@ -0,0 +1,118 @@
+"""Organize many folders in one job, with one I/O queue per storage device.
+
+Folders are grouped by the device they live on (``st_dev``: a disk, a
+partition or a network mount). Every device gets its own queue and its
+own worker threads, so folders on different devices are organized in
+parallel, while folders sharing a device are by default organized one
+after another instead of making a single disk seek between competing
+scans and moves.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Folders organized at the same time on one device
+DEFAULT_DEVICE_WORKERS = 1
+
+# Summary counters added up over all folders of a job
+SUMMED_KEYS = ("total_files", "files_moved", "bytes_moved", "renamed", "replaced", "skipped",
+               "conflicts", "already_done", "duplicates", "errors")
+
+
+def device_of(path):
+    """Return the id of the device a path lives on."""
+    return os.stat(path).st_dev
+
+
+class DeviceScheduler:
+    """Organize several folders with a separate worker pool per device.
+
+    ``make_engine(folder, progress)`` must return a new FileOrganizer for a
+    folder, reporting through the given progress callback; every folder
+    gets its own engine because an engine keeps per-run state. ``device_workers`` is the number
+    of folders organized at once on a device, and ``limits`` ({st_dev:
+    workers}) overrides it for particular devices.
+
+    ``log(message)`` and ``progress(processed, total)`` (summed over all
+    folders) are called from the device threads.
+    """
+
+    def __init__(self, make_engine, device_workers=DEFAULT_DEVICE_WORKERS, limits=None,
+                 log=None, progress=None):
+        """Initialize the scheduler."""
+        self.make_engine = make_engine
+        self.device_workers = max(1, int(device_workers))
+        self.limits = dict(limits or {})
+        self.log = log or (lambda message: None)
+        self.progress = progress or (lambda processed, total: None)
+        self.lock = threading.Lock()
+        self.folder_progress = {}
+
+    def group(self, folders):
+        """Return ({st_dev: [folders]}, {folder: error}) for a list of folders."""
+        groups = {}
+        failed = {}
+        for folder in folders:
+            try:
+                groups.setdefault(device_of(folder), []).append(folder)
+            except OSError as e:
+                failed[folder] = e
+        return groups, failed
+
+    def report_progress(self, folder, processed, total):
+        """Record one folder's progress and report the sum over all folders."""
+        with self.lock:
+            self.folder_progress[folder] = (processed, total)
+            processed = sum(done for done, _ in self.folder_progress.values())
+            total = sum(count for _, count in self.folder_progress.values())
+        self.progress(processed, total)
+
+    def organize(self, folder, journal_dir, stop_event):
+        """Organize one folder on its device's thread and return its summary."""
+        if stop_event is not None and stop_event.is_set():
+            return {"folder": folder, "stopped": True, "errors": 0}
+        try:
+            engine = self.make_engine(
+                folder, lambda processed, total: self.report_progress(folder, processed, total))
+            return engine.run(folder, journal_dir)
+        except Exception as e:
+            # One failing folder must not stop the others
+            self.log(f"✗ Could not organize {folder}: {e}")
+            return {"folder": folder, "error": str(e), "errors": 1}
+
+    def run(self, folders, journal_dir=None, stop_event=None):
+        """Organize every folder and return a combined summary.
+
+        The summary holds the totals of SUMMED_KEYS, the number of devices
+        and, under "folders", the summary of each folder in the given order.
+        Setting ``stop_event`` lets running folders finish but starts no new
+        ones.
+        """
+        folders = list(dict.fromkeys(os.path.abspath(folder) for folder in folders))
+        groups, failed = self.group(folders)
+        self.folder_progress = {}
+        self.log(f"Organizing {len(folders)} folders on {len(groups)} devices...")
+
+        summaries = {folder: {"folder": folder, "error": str(error), "errors": 1}
+                     for folder, error in failed.items()}
+        for folder, error in failed.items():
+            self.log(f"✗ Could not organize {folder}: {error}")
+        pools = []
+        futures = {}
+        try:
+            for device, device_folders in groups.items():
+                workers = min(len(device_folders), max(1, int(self.limits.get(device, self.device_workers))))
+                pool = ThreadPoolExecutor(workers, thread_name_prefix=f"springclean-dev{device}")
+                pools.append(pool)
+                for folder in device_folders:
+                    futures[folder] = pool.submit(self.organize, folder, journal_dir, stop_event)
+            for folder, future in futures.items():
+                summaries[folder] = future.result()
+        finally:
+            for pool in pools:
+                pool.shutdown(wait=True)
+
+        combined = {"folders": [summaries[folder] for folder in folders], "devices": len(groups)}
+        for key in SUMMED_KEYS:
+            combined[key] = sum(summary.get(key, 0) for summary in combined["folders"])
+        return combined
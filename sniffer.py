@@ -0,0 +1,190 @@
+"""Identify files by their content when the name has no known extension.
+
+Only the first ``SNIFF_BYTES`` of a file are read, with a single read call,
+and matched against well-known magic signatures. The result is an extension
+(".pdf", ".png", ...) which the organizer maps to a category through the
+active category index, so custom category files work unchanged.
+
+Results are cached by (device, inode, size, mtime), which stay the same when
+the organizer renames a file into its category folder, so later runs do not
+read the file again. The cache can be kept on disk between runs.
+"""
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from localfs import LOCAL
+from filecache import FileCache, identity_key
+
+# Bytes read from the start of each file
+SNIFF_BYTES = 4096
+
+# Default number of sniffing threads
+DEFAULT_SNIFF_WORKERS = 4
+
+# Default on-disk cache, next to config.json
+DEFAULT_SNIFF_CACHE = "sniff_cache.json"
+
+# (offset, signature, extension); the first match wins, so more specific
+# signatures come before the more general ones sharing a prefix
+MAGIC_SIGNATURES = (
+    (0, b"%PDF-", ".pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", ".png"),
+    (0, b"\xff\xd8\xff", ".jpg"),
+    (0, b"GIF87a", ".gif"),
+    (0, b"GIF89a", ".gif"),
+    (0, b"II*\x00", ".tiff"),
+    (0, b"MM\x00*", ".tiff"),
+    (0, b"\x00\x00\x01\x00", ".ico"),
+    (8, b"WEBP", ".webp"),
+    (8, b"WAVE", ".wav"),
+    (8, b"AVI ", ".avi"),
+    (4, b"ftypheic", ".heic"),
+    (4, b"ftypqt", ".mov"),
+    (4, b"ftypM4A", ".m4a"),
+    (4, b"ftyp", ".mp4"),
+    (0, b"\x1aE\xdf\xa3", ".mkv"),
+    (0, b"0&\xb2u\x8ef\xcf\x11", ".wmv"),
+    (0, b"ID3", ".mp3"),
+    (0, b"\xff\xfb", ".mp3"),
+    (0, b"\xff\xf3", ".mp3"),
+    (0, b"fLaC", ".flac"),
+    (0, b"OggS", ".ogg"),
+    (0, b"Rar!\x1a\x07", ".rar"),
+    (0, b"7z\xbc\xaf\x27\x1c", ".7z"),
+    (0, b"\x1f\x8b", ".gz"),
+    (0, b"BZh", ".bz2"),
+    (0, b"\xfd7zXZ\x00", ".xz"),
+    (257, b"ustar", ".tar"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", ".doc"),
+    (0, b"{\\rtf", ".rtf"),
+    (0, b"SQLite format 3\x00", ".db"),
+    (0, b"\x7fELF", ".elf"),
+    (0, b"wOFF", ".woff"),
+    (0, b"wOF2", ".woff2"),
+    (0, b"OTTO", ".otf"),
+    (0, b"8BPS", ".psd"),
+)
+
+# Sizes of the known BMP info headers (BITMAPCOREHEADER ... BITMAPV5HEADER)
+_BMP_INFO_SIZES = (12, 40, 52, 56, 64, 108, 124)
+
+# Offset of the PE header's offset in an executable's MZ header
+_PE_OFFSET_FIELD = 0x3C
+
+# Zip based formats, told apart by the member names near the start
+_ZIP_MEMBERS = (
+    (b"mimetypeapplication/epub+zip", ".epub"),
+    (b"word/", ".docx"),
+    (b"xl/", ".xlsx"),
+    (b"ppt/", ".pptx"),
+    (b"AndroidManifest.xml", ".apk"),
+    (b"META-INF/MANIFEST.MF", ".jar"),
+)
+
+# Leading text (after whitespace, case-insensitive) of markup files
+_TEXT_PREFIXES = (
+    (b"<!doctype html", ".html"),
+    (b"<html", ".html"),
+    (b"<svg", ".svg"),
+    (b"<?xml", ".xml"),
+)
+
+
+def _is_bmp(head, size=None):
+    """Return True if a file starting with "BM" has a consistent BMP header.
+
+    The header holds the file size (checked against ``size`` when known),
+    the offset of the pixel data and the size of the info header after it.
+    """
+    if len(head) < 18:
+        return False
+    file_size, reserved, data_offset, info_size = struct.unpack_from("<IIII", head, 2)
+    if info_size not in _BMP_INFO_SIZES or reserved:
+        return False
+    if data_offset < 14 + info_size or file_size < data_offset:
+        return False
+    return size is None or file_size == size
+
+
+def _is_pe(head):
+    """Return True if a file starting with "MZ" points to a "PE\\0\\0" header."""
+    if len(head) < _PE_OFFSET_FIELD + 4:
+        return False
+    offset = struct.unpack_from("<I", head, _PE_OFFSET_FIELD)[0]
+    return head.startswith(b"PE\x00\x00", offset)
+
+
+def sniff_bytes(head, size=None):
+    """Return the extension matching the first bytes of a file, or None.
+
+    ``size`` is the size of the whole file, if known, to check headers
+    that record it.
+    """
+    if head.startswith(b"PK\x03\x04"):
+        for member, extension in _ZIP_MEMBERS:
+            if member in head:
+                return extension
+        return ".zip"
+    for offset, signature, extension in MAGIC_SIGNATURES:
+        if head.startswith(signature, offset):
+            return extension
+    if head.startswith(b"BM"):
+        return ".bmp" if _is_bmp(head, size) else None
+    if head.startswith(b"MZ"):
+        return ".exe" if _is_pe(head) else None
+    if not head or b"\x00" in head:
+        return None
+    text = head.lstrip().lower()
+    for prefix, extension in _TEXT_PREFIXES:
+        if text.startswith(prefix):
+            return extension
+    # Other text has no signature; it may be anything from a log to source
+    # code, so it is left for the extension lookup to decide
+    return None
+
+
+def sniff_file(path, fs=LOCAL, size=None):
+    """Read the start of a file and return its extension by content, or None."""
+    return sniff_bytes(fs.head(path, SNIFF_BYTES), size)
+
+
+class ContentSniffer:
+    """Sniff files on a thread pool so planning never waits on their reads."""
+
+    def __init__(self, workers=DEFAULT_SNIFF_WORKERS, cache_path=None, fs=None):
+        """Start the pool and load the cache; files are read through ``fs``."""
+        self.fs = fs or LOCAL
+        self.cache = FileCache(cache_path)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, int(workers)),
+                                       thread_name_prefix="springclean-sniff")
+        self.sniffed = 0
+        self.cached = 0
+        self._lock = threading.Lock()
+
+    def submit(self, entry):
+        """Start identifying a DirEntry; returns a future of its extension (or None)."""
+        return self.pool.submit(self._identify, entry)
+
+    def _identify(self, entry):
+        """Return the content extension of an entry, from the cache when possible."""
+        try:
+            key = identity_key(entry)
+            extension = self.cache.get(key)
+            if extension is not None:
+                # "" records a file that matched nothing
+                with self._lock:
+                    self.cached += 1
+                return extension or None
+            extension = sniff_file(entry.path, self.fs, entry.stat().st_size)
+        except OSError:
+            return None
+        with self._lock:
+            self.cache.put(key, extension or "")
+            self.sniffed += 1
+        return extension
+
+    def close(self):
+        """Wait for pending work, stop the pool and save the cache."""
+        self.pool.shutdown()
+        self.cache.save()
@@ -0,0 +1,19 @@
+"""Shared fixtures; the modules live next to SpringClean.py, not in a package."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import organizer  # noqa: E402
+
+
+@pytest.fixture
+def categories(monkeypatch):
+    """Return a function activating a categories dict for one test."""
+    def activate(categories):
+        monkeypatch.setattr(organizer, "FILE_CATEGORIES", organizer.FILE_CATEGORIES)
+        monkeypatch.setattr(organizer, "CATEGORY_INDEX", organizer.CATEGORY_INDEX)
+        return organizer.set_file_categories(categories)
+    return activate
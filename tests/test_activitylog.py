@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from activitylog import LOG_NAME, ActivityLog
+
+
+def write_lines(log, count, start=0):
+    # One record per batch, so the size check runs after every record
+    for number in range(start, start + count):
+        log.write({"event": "message", "number": number})
+        log.flush()
+
+
+def numbers(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["number"] for line in f]
+
+
+def test_rotates_at_size_limit(tmp_path):
+    log = ActivityLog(str(tmp_path), max_bytes=200, backups=2)
+    line_size = len(json.dumps({"time": "2026-10-17T09:30:12.125", "event": "message",
+                                "number": 0})) + 1
+    per_file = -(-200 // line_size)
+    write_lines(log, per_file - 1)
+    assert not os.path.exists(log.path + ".1")
+    # The write that reaches the limit rotates the file
+    write_lines(log, 1, start=per_file - 1)
+    assert not os.path.exists(log.path)
+    assert numbers(log.path + ".1") == list(range(per_file))
+    write_lines(log, 1, start=per_file)
+    log.close()
+    assert numbers(log.path) == [per_file]
+
+
+def test_keeps_at_most_backups_files(tmp_path):
+    log = ActivityLog(str(tmp_path), max_bytes=200, backups=2)
+    write_lines(log, 40)
+    log.close()
+    assert sorted(os.listdir(tmp_path)) == [LOG_NAME, LOG_NAME + ".1", LOG_NAME + ".2"]
+    for path in log.paths():
+        assert os.path.getsize(path) < 200 + 100
+    # Oldest first and contiguous: only the oldest records were dropped
+    history = [number for path in log.paths() for number in numbers(path)]
+    assert history == list(range(history[0], 40))
+    assert history[0] > 0
+
+
+def test_export_joins_history_oldest_first(tmp_path):
+    log = ActivityLog(str(tmp_path / "logs"), max_bytes=200, backups=5)
+    write_lines(log, 12)
+    exported = tmp_path / "history.jsonl"
+    log.export(str(exported))
+    log.close()
+    assert numbers(exported) == list(range(12))
+
+
+def test_no_backups_drops_full_log(tmp_path):
+    log = ActivityLog(str(tmp_path), max_bytes=200, backups=0)
+    write_lines(log, 10)
+    log.close()
+    assert os.listdir(tmp_path) in ([], [LOG_NAME])
+    assert all(os.path.getsize(path) < 200 for path in log.paths())
+
+
+def test_unserializable_record_raises_in_caller(tmp_path):
+    log = ActivityLog(str(tmp_path))
+    with pytest.raises(TypeError):
+        log.write({"event": "file", "source": object()})
+    log.close()
+    assert not os.path.exists(log.path)
+
+
+def test_write_error_is_reported_once(tmp_path):
+    blocker = tmp_path / "logs"
+    blocker.write_text("not a folder")
+    errors = []
+    log = ActivityLog(str(blocker), on_error=errors.append)
+    write_lines(log, 3)
+    log.close()
+    assert len(errors) == 1 and errors[0].startswith("✗ Could not write log")
+    assert log.errors >= 3
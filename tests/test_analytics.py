@@ -0,0 +1,65 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import analytics
+from analytics import FolderInventory
+from organizer import FileOrganizer
+
+
+def fake_entry(name, size, mtime):
+    st = SimpleNamespace(st_size=size, st_mtime=mtime)
+    return SimpleNamespace(name=name, path="/data/" + name, stat=lambda: st)
+
+
+def test_numpy_and_plain_aggregates_match():
+    pytest.importorskip("numpy")
+    rng = random.Random(7)
+    now = 1_800_000_000
+    inventory = FolderInventory("/data", top=5)
+    for number in range(5000):
+        category = rng.choice(["IMAGES", "DOCUMENTS", "OTHERS", "OTHERS"])
+        extension = rng.choice([".jpg", ".pdf", ".xyz", ".tar.gz", ""])
+        inventory.add(fake_entry(f"f{number}{extension}", rng.randrange(1 << 40),
+                                 now - rng.randrange(10 * 365 * 86400)), category)
+    # One file exactly on a bucket boundary, one from the future
+    inventory.add(fake_entry("edge.xyz", 1, now - 7 * 86400), "OTHERS")
+    inventory.add(fake_entry("late.xyz", 1, now + 60), "OTHERS")
+    assert inventory._aggregate_numpy(now) == inventory._aggregate_arrays(now)
+
+
+def test_numpy_and_plain_reports_match(monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(11)
+    inventory = FolderInventory("/data", top=3)
+    for number in range(500):
+        inventory.add(fake_entry(f"f{number}{rng.choice(['.pdf', '.xyz', ''])}",
+                                 rng.randrange(1 << 20), rng.randrange(1 << 30)),
+                      rng.choice(["DOCUMENTS", "OTHERS"]))
+    with_numpy = inventory.report(now=1 << 30)
+    monkeypatch.setattr(analytics, "numpy", None)
+    assert inventory.report(now=1 << 30) == with_numpy
+
+
+def test_report_without_numpy(monkeypatch):
+    monkeypatch.setattr(analytics, "numpy", None)
+    inventory = FolderInventory("/data")
+    inventory.add(fake_entry("a.pdf", 10, 0), "DOCUMENTS")
+    inventory.add(fake_entry("b.xyz", 5, 0), "OTHERS")
+    report = inventory.report(now=0)
+    assert report["bytes"] == 15
+    assert [row["name"] for row in report["others"]] == [".xyz"]
+
+
+def test_inventory_uses_compound_extensions_and_rules(tmp_path, categories):
+    categories({"ARCHIVES": [".tar.gz"], "DOCUMENTS": [".pdf"],
+                "rules": [{"name": ["invoice*"], "destination": "INVOICES"}]})
+    for name in ("backup.tar.gz", "notes.old.gz", "invoice-1.pdf", "paper.pdf"):
+        (tmp_path / name).write_bytes(b"x")
+    inventory = FileOrganizer().inventory(str(tmp_path))
+    assert sorted(inventory.extension_names) == [".gz", ".pdf", ".tar.gz"]
+    report = inventory.report()
+    assert {row["name"]: row["files"] for row in report["categories"]} == {
+        "ARCHIVES": 1, "DOCUMENTS": 1, "INVOICES": 1, "OTHERS": 1}
+    assert [row["name"] for row in report["others"]] == [".gz"]
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+import archiver
+from archiver import ARCHIVE_FOLDER, ColdFileArchiver, extract, read_manifest
+
+NOW = 1_700_000_000
+OLD = NOW - 400 * 86400
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "downloads"
+    (folder / "DOCUMENTS" / "taxes").mkdir(parents=True)
+    files = {"DOCUMENTS/report.pdf": b"report " * 1000,
+             "DOCUMENTS/taxes/2022.pdf": b"taxes " * 1000,
+             "DOCUMENTS/recent.pdf": b"recent"}
+    for name, data in files.items():
+        path = folder / name
+        path.write_bytes(data)
+        mtime = NOW - 86400 if name.endswith("recent.pdf") else OLD
+        os.utime(path, (mtime, mtime))
+    return folder
+
+
+def archive(folder, archive_format="zip", **options):
+    summary = ColdFileArchiver(days=365, archive_format=archive_format, **options).run(
+        str(folder), ["DOCUMENTS"], now=NOW)
+    archives = sorted((folder / ARCHIVE_FOLDER / "DOCUMENTS").glob("*" + archive_format))
+    return summary, archives
+
+
+@pytest.mark.parametrize("archive_format", archiver.ARCHIVE_FORMATS)
+def test_cold_files_are_archived_then_removed(folder, archive_format):
+    if not archiver.format_available(archive_format):
+        pytest.skip(f"{archive_format} is not available")
+    summary, archives = archive(folder, archive_format)
+    assert summary["files_archived"] == 2
+    assert summary["errors"] == 0
+    assert os.listdir(folder / "DOCUMENTS") == ["recent.pdf"]
+    assert len(archives) == 1
+    assert not list(archives[0].parent.glob("*" + archiver.PART_SUFFIX))
+
+    manifest = read_manifest(str(archives[0]))
+    assert sorted(entry["name"] for entry in manifest["files"]) == ["report.pdf", "taxes/2022.pdf"]
+    restored = extract(str(archives[0]), "taxes/2022.pdf")
+    assert restored == str(folder / "DOCUMENTS" / "taxes" / "2022.pdf")
+    assert (folder / "DOCUMENTS" / "taxes" / "2022.pdf").read_bytes() == b"taxes " * 1000
+    assert os.stat(restored).st_mtime == OLD
+    with pytest.raises(FileExistsError):
+        extract(str(archives[0]), "taxes/2022.pdf")
+
+
+def test_dry_run_removes_nothing(folder):
+    summary, archives = archive(folder, dry_run=True)
+    assert summary["files_archived"] == 2
+    assert archives == []
+    assert (folder / "DOCUMENTS" / "report.pdf").exists()
+
+
+def test_file_changed_while_archiving_is_kept(folder, monkeypatch):
+    add = archiver._ZipBundle.add
+
+    def add_then_change(self, name, source, st):
+        result = add(self, name, source, st)
+        if name == "report.pdf":
+            with open(source.name, "ab") as f:
+                f.write(b"more")
+        return result
+
+    monkeypatch.setattr(archiver._ZipBundle, "add", add_then_change)
+    summary, archives = archive(folder)
+    assert summary["files_archived"] == 1
+    assert summary["kept"] == 1
+    assert (folder / "DOCUMENTS" / "report.pdf").read_bytes().endswith(b"more")
+    assert not (folder / "DOCUMENTS" / "taxes").exists()
+
+
+def test_failed_verification_keeps_originals(folder, monkeypatch):
+    monkeypatch.setattr(archiver, "iter_member", lambda *args: iter([b"corrupt"]))
+    summary, archives = archive(folder)
+    assert summary["files_archived"] == 0
+    assert summary["errors"] == 2
+    assert archives == []
+    assert os.listdir(folder / ARCHIVE_FOLDER / "DOCUMENTS") == []
+    assert (folder / "DOCUMENTS" / "report.pdf").read_bytes() == b"report " * 1000
+    assert (folder / "DOCUMENTS" / "taxes" / "2022.pdf").exists()
@@ -0,0 +1,130 @@
+import io
+import os
+import errno
+import random
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backends import ArchiveBackend, MemoryBackend
+from organizer import FileOrganizer
+
+rng = random.Random(3)
+FILES = {
+    "report.pdf": rng.randbytes((1 << 20) + 17),
+    "photo.jpg": rng.randbytes(1000),
+    "music/song.mp3": rng.randbytes(300_000),
+    "music/live/encore.mp3": b"",
+}
+
+
+def make_archive(path, kind):
+    if kind == "zip":
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, data in FILES.items():
+                archive.writestr(name, data)
+            archive.writestr("../escape.pdf", b"outside")
+        return
+    with tarfile.open(path, "w:gz" if kind == "tar.gz" else "w") as archive:
+        for name, data in FILES.items() | {"../escape.pdf": b"outside"}.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+@pytest.mark.parametrize("kind", ["zip", "tar", "tar.gz"])
+def test_organize_from_an_archive_is_byte_identical(tmp_path, kind):
+    archive_path = tmp_path / f"input.{kind}"
+    make_archive(archive_path, kind)
+    before = archive_path.read_bytes()
+    folder = tmp_path / "out"
+    fs = ArchiveBackend(str(archive_path), str(folder))
+    try:
+        engine = FileOrganizer(recursive=True, fs=fs, verify="size")
+        summary = engine.execute(engine.plan(str(folder)))
+    finally:
+        fs.close()
+    assert summary["files_moved"] == len(FILES)
+    assert summary["errors"] == 0
+    assert (folder / "DOCUMENTS" / "report.pdf").read_bytes() == FILES["report.pdf"]
+    assert (folder / "IMAGES" / "photo.jpg").read_bytes() == FILES["photo.jpg"]
+    assert (folder / "AUDIO" / "song.mp3").read_bytes() == FILES["music/song.mp3"]
+    assert (folder / "AUDIO" / "encore.mp3").read_bytes() == b""
+    assert not (tmp_path / "escape.pdf").exists()
+    assert archive_path.read_bytes() == before
+
+
+def test_tar_members_stream_concurrently(tmp_path):
+    archive_path = tmp_path / "input.tar"
+    make_archive(archive_path, "tar")
+    fs = ArchiveBackend(str(archive_path), str(tmp_path / "out"))
+
+    def read(name):
+        with fs.open(str(tmp_path / "out" / name)) as stream:
+            chunks = []
+            while True:
+                chunk = stream.read(4096)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+
+    names = list(FILES) * 5
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            for name, data in zip(names, pool.map(read, names)):
+                assert data == FILES[name]
+    finally:
+        fs.close()
+
+
+def test_archive_files_cannot_be_removed(tmp_path):
+    archive_path = tmp_path / "input.zip"
+    make_archive(archive_path, "zip")
+    fs = ArchiveBackend(str(archive_path), str(tmp_path / "out"))
+    try:
+        assert sorted(fs.listdir(str(tmp_path / "out"))) == ["music", "photo.jpg", "report.pdf"]
+        with pytest.raises(OSError) as raised:
+            fs.unlink(str(tmp_path / "out" / "photo.jpg"))
+        assert raised.value.errno == errno.EROFS
+    finally:
+        fs.close()
+
+
+def memory_tree(count=300, **options):
+    fs = MemoryBackend(**options)
+    for index in range(count):
+        extension = (".pdf", ".jpg", ".mp3", ".xyz")[index % 4]
+        fs.add_file(f"/downloads/file_{index}{extension}", size=index)
+    return fs
+
+
+def test_organize_in_memory():
+    fs = memory_tree()
+    engine = FileOrganizer(fs=fs)
+    summary = engine.execute(engine.plan("/downloads"))
+    assert summary["files_moved"] == 300
+    assert summary["bytes_moved"] == sum(range(300))
+    assert sorted(fs.listdir("/downloads")) == ["AUDIO", "DOCUMENTS", "IMAGES", "OTHERS"]
+    assert len(fs.listdir("/downloads/OTHERS")) == 75
+    assert fs.stat("/downloads/AUDIO/file_2.mp3").st_size == 2
+
+
+def test_failed_moves_in_memory_leave_the_files():
+    fs = memory_tree(40, failure_rate=1, fail_on=("move",))
+    engine = FileOrganizer(fs=fs)
+    summary = engine.execute(engine.plan("/downloads"))
+    assert summary["errors"] == 40
+    assert len([name for name in fs.listdir("/downloads") if "." in name]) == 40
+
+
+def test_memory_moves_never_overwrite():
+    fs = MemoryBackend()
+    fs.add_file("/a/one.txt", data=b"one")
+    fs.add_file("/a/two.txt", data=b"two")
+    with pytest.raises(FileExistsError):
+        fs.move("/a/one.txt", "/a/two.txt")
+    fs.move("/a/one.txt", "/a/two.txt", replace=True)
+    assert fs.head("/a/two.txt", 10) == b"one"
+    assert not fs.lexists("/a/one.txt")
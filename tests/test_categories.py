@@ -0,0 +1,52 @@
+import pytest
+
+from organizer import CategoryIndex, FileOrganizer
+
+CATEGORIES = {
+    "ARCHIVES": [".tar.gz", ".gz", ".zip"],
+    "DOCUMENTS": [".PDF", "txt"],
+    "BACKUPS": [".old.tar.gz", ".zip"],
+}
+
+
+@pytest.mark.parametrize("filename, category, extension", [
+    ("backup.tar.gz", "ARCHIVES", ".tar.gz"),
+    ("BACKUP.TAR.GZ", "ARCHIVES", ".tar.gz"),
+    ("notes.gz", "ARCHIVES", ".gz"),
+    ("my.notes.gz", "ARCHIVES", ".gz"),
+    ("site.old.tar.gz", "BACKUPS", ".old.tar.gz"),
+    ("report.pdf", "DOCUMENTS", ".pdf"),
+    ("readme.txt", "DOCUMENTS", ".txt"),
+    ("bundle.zip", "ARCHIVES", ".zip"),
+    ("photo.xyz", "OTHERS", ".xyz"),
+    ("Makefile", "OTHERS", ""),
+    (".gz", "OTHERS", ""),
+    (".hidden.tar.gz", "ARCHIVES", ".tar.gz"),
+])
+def test_longest_suffix_wins(filename, category, extension):
+    index = CategoryIndex(CATEGORIES)
+    assert index.category_for(filename) == category
+    assert index.extension_for(filename) == extension
+
+
+def test_single_suffix_index():
+    index = CategoryIndex({"ARCHIVES": [".gz"]})
+    assert index.max_parts == 1
+    assert index.category_for("backup.tar.gz") == "ARCHIVES"
+    assert index.category_for("backup.tar") == "OTHERS"
+
+
+def test_first_category_wins_a_clash():
+    index = CategoryIndex(CATEGORIES)
+    assert index.lookup(".zip") == "ARCHIVES"
+    assert index.conflicts == {".zip": ["ARCHIVES", "BACKUPS"]}
+    assert index.describe_conflicts() == [".zip is claimed by ARCHIVES, BACKUPS (using ARCHIVES)"]
+
+
+def test_organize_sorts_compound_extensions(tmp_path, categories):
+    categories({"ARCHIVES": [".tar.gz"], "COMPRESSED": [".gz"]})
+    for name in ("backup.tar.gz", "notes.gz"):
+        (tmp_path / name).write_bytes(b"x")
+    plan = FileOrganizer().plan(str(tmp_path))
+    assert {source: plan.category(index) for index, source in enumerate(plan.sources)} == {
+        "backup.tar.gz": "ARCHIVES", "notes.gz": "COMPRESSED"}
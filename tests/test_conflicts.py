@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from backends import MemoryBackend
+from organizer import FileOrganizer
+
+OLD = 1_000_000
+NEW = 2_000_000
+
+
+def write(path, data, mtime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+
+
+def organize(folder, conflicts, **options):
+    engine = FileOrganizer(conflicts=conflicts, **options)
+    return engine.execute(engine.plan(str(folder)))
+
+
+@pytest.fixture
+def folder(tmp_path):
+    return tmp_path / "downloads"
+
+
+def test_newer_file_replaces_older(folder):
+    write(folder / "DOCUMENTS" / "report.pdf", b"old", OLD)
+    write(folder / "report.pdf", b"new version", NEW)
+    summary = organize(folder, "overwrite-if-newer")
+    assert summary["replaced"] == 1
+    assert summary["errors"] == 0
+    assert (folder / "DOCUMENTS" / "report.pdf").read_bytes() == b"new version"
+    assert os.listdir(folder / "DOCUMENTS") == ["report.pdf"]
+    assert not (folder / "report.pdf").exists()
+
+
+def test_older_file_does_not_replace_newer(folder):
+    write(folder / "DOCUMENTS" / "report.pdf", b"new version", NEW)
+    write(folder / "report.pdf", b"old", OLD)
+    summary = organize(folder, "overwrite-if-newer")
+    assert summary["replaced"] == 0
+    assert summary["conflicts"] == 1
+    assert (folder / "DOCUMENTS" / "report.pdf").read_bytes() == b"new version"
+    assert (folder / "report.pdf").read_bytes() == b"old"
+
+
+def test_dry_run_replaces_nothing(folder):
+    write(folder / "DOCUMENTS" / "report.pdf", b"old", OLD)
+    write(folder / "report.pdf", b"new version", NEW)
+    organize(folder, "overwrite-if-newer", dry_run=True)
+    assert (folder / "DOCUMENTS" / "report.pdf").read_bytes() == b"old"
+    assert (folder / "report.pdf").read_bytes() == b"new version"
+
+
+def test_files_of_one_run_are_numbered_instead_of_overwritten(folder):
+    write(folder / "report.pdf", b"first", OLD)
+    write(folder / "sub" / "report.pdf", b"second", NEW)
+    summary = organize(folder, "overwrite-if-newer", recursive=True)
+    assert summary["replaced"] == 0
+    documents = folder / "DOCUMENTS"
+    assert sorted(os.listdir(documents)) == ["report (1).pdf", "report.pdf"]
+    assert {(documents / name).read_bytes() for name in os.listdir(documents)} == {
+        b"first", b"second"}
+
+
+def test_replace_on_another_backend():
+    fs = MemoryBackend()
+    fs.add_file("/downloads/DOCUMENTS/report.pdf", mtime=OLD, data=b"old")
+    fs.add_file("/downloads/report.pdf", mtime=NEW, data=b"new version")
+    engine = FileOrganizer(conflicts="overwrite-if-newer", fs=fs)
+    summary = engine.execute(engine.plan("/downloads"))
+    assert summary["replaced"] == 1
+    assert fs.head("/downloads/DOCUMENTS/report.pdf", 100) == b"new version"
+    assert not fs.lexists("/downloads/report.pdf")
+
+
+def test_suffix_keeps_both(folder):
+    write(folder / "DOCUMENTS" / "report.pdf", b"old", OLD)
+    write(folder / "report.pdf", b"new version", NEW)
+    summary = organize(folder, "suffix")
+    assert summary["renamed"] == 1
+    assert (folder / "DOCUMENTS" / "report.pdf").read_bytes() == b"old"
+    assert (folder / "DOCUMENTS" / "report (1).pdf").read_bytes() == b"new version"
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from backends import MemoryBackend
+from dedupe import DUPLICATES_FOLDER, HASH_BLOCK_SIZE, DuplicateFinder
+from organizer import FileOrganizer
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "downloads"
+    folder.mkdir()
+    (folder / "report.pdf").write_bytes(b"same content")
+    (folder / "report (1).pdf").write_bytes(b"same content")
+    # Same size, other content
+    (folder / "letter.pdf").write_bytes(b"other conten")
+    return folder
+
+
+def organize(folder, duplicates, **options):
+    engine = FileOrganizer(duplicates=duplicates, **options)
+    return engine.execute(engine.plan(str(folder)))
+
+
+def test_skip_leaves_duplicates_in_place(folder):
+    summary = organize(folder, "skip")
+    assert summary["files_moved"] == 2
+    assert sorted(os.listdir(folder / "DOCUMENTS")) == ["letter.pdf", "report.pdf"]
+    assert (folder / "report (1).pdf").read_bytes() == b"same content"
+
+
+def test_collect_moves_duplicates_aside(folder):
+    organize(folder, "collect")
+    assert sorted(os.listdir(folder / "DOCUMENTS")) == ["letter.pdf", "report.pdf"]
+    assert os.listdir(folder / DUPLICATES_FOLDER) == ["report (1).pdf"]
+    assert sorted(os.listdir(folder)) == ["DOCUMENTS", DUPLICATES_FOLDER]
+
+
+def test_hardlink_replaces_duplicates_by_links(folder):
+    summary = organize(folder, "hardlink")
+    assert summary["errors"] == 0
+    documents = folder / "DOCUMENTS"
+    assert sorted(os.listdir(documents)) == ["letter.pdf", "report (1).pdf", "report.pdf"]
+    original = (documents / "report.pdf").stat()
+    duplicate = (documents / "report (1).pdf").stat()
+    assert original.st_ino == duplicate.st_ino
+    assert original.st_nlink == 2
+    assert (documents / "letter.pdf").stat().st_nlink == 1
+    assert sorted(os.listdir(folder)) == ["DOCUMENTS"]
+
+
+def test_hardlink_on_another_backend():
+    fs = MemoryBackend()
+    fs.add_file("/downloads/a.pdf", data=b"x" * 10)
+    fs.add_file("/downloads/b.pdf", data=b"x" * 10)
+    engine = FileOrganizer(duplicates="hardlink", fs=fs)
+    summary = engine.execute(engine.plan("/downloads"))
+    assert summary["errors"] == 0
+    assert fs.stat("/downloads/DOCUMENTS/a.pdf").st_ino == fs.stat("/downloads/DOCUMENTS/b.pdf").st_ino
+    assert fs.listdir("/downloads") == ["DOCUMENTS"]
+
+
+def test_files_differing_only_in_the_middle_are_not_duplicates(tmp_path):
+    size = 3 * HASH_BLOCK_SIZE
+    first = tmp_path / "a.bin"
+    second = tmp_path / "b.bin"
+    first.write_bytes(b"\0" * size)
+    second.write_bytes(b"\0" * (size // 2) + b"\1" + b"\0" * (size - size // 2 - 1))
+    finder = DuplicateFinder(workers=2)
+    try:
+        entries = sorted(os.scandir(tmp_path), key=lambda entry: entry.name)
+        assert finder.find(entries) == {}
+    finally:
+        finder.close()
@@ -0,0 +1,79 @@
+import os
+from collections import Counter
+
+from destinations import DestinationIndex
+from localfs import LOCAL
+from organizer import FileOrganizer
+
+
+class CountingFS:
+    """Local backend that counts stat() and listdir() calls per path."""
+
+    def __init__(self):
+        self.stats = Counter()
+        self.listings = Counter()
+
+    def __getattr__(self, name):
+        return getattr(LOCAL, name)
+
+    def stat(self, path, follow_symlinks=True):
+        self.stats[path] += 1
+        return LOCAL.stat(path, follow_symlinks=follow_symlinks)
+
+    def listdir(self, path):
+        self.listings[path] += 1
+        return LOCAL.listdir(path)
+
+
+def test_synced_folder_is_checked_once_per_batch(tmp_path):
+    fs = CountingFS()
+    index = DestinationIndex(fs)
+    folder = str(tmp_path)
+    (tmp_path / "a.pdf").write_text("a")
+    assert index.names(folder) == {"a.pdf"}
+    index.sync(folder)
+    fs.stats.clear()
+
+    index.revalidate()
+    for _ in range(100):
+        assert index.names(folder) == {"a.pdf"}
+    assert fs.stats[folder] == 1
+    assert fs.listings[folder] == 1
+
+
+def test_outside_change_is_seen_after_revalidate(tmp_path):
+    fs = CountingFS()
+    index = DestinationIndex(fs)
+    folder = str(tmp_path)
+    index.names(folder)
+    index.sync(folder)
+    index.revalidate()
+    index.names(folder)
+    (tmp_path / "b.pdf").write_text("b")
+    os.utime(folder, ns=(0, 0))
+    # Not checked again within the batch
+    assert index.names(folder) == set()
+    index.revalidate()
+    assert index.names(folder) == {"b.pdf"}
+    assert fs.listings[folder] == 2
+
+
+def test_plan_stats_each_destination_once(tmp_path):
+    fs = CountingFS()
+    engine = FileOrganizer(fs=fs)
+    (tmp_path / "DOCUMENTS").mkdir()
+    (tmp_path / "DOCUMENTS" / "old.pdf").write_text("old")
+    for number in range(50):
+        (tmp_path / f"{number}.pdf").write_text("x")
+    engine.run(str(tmp_path))
+    documents = str(tmp_path / "DOCUMENTS")
+    for number in range(50, 100):
+        (tmp_path / f"{number}.pdf").write_text("x")
+    fs.stats.clear()
+    fs.listings.clear()
+    plan = engine.plan(str(tmp_path))
+    assert len(plan) == 50
+    assert fs.stats[documents] == 1
+    assert fs.listings[documents] == 0
+    assert engine.execute(plan)["files_moved"] == 50
+    assert len(os.listdir(documents)) == 101
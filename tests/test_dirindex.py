@@ -0,0 +1,36 @@
+import dirindex
+from organizer import FileOrganizer
+
+
+def organize(folder, index_path):
+    engine = FileOrganizer(recursive=True, dir_index=str(index_path))
+    return engine.execute(engine.plan(str(folder)))
+
+
+def test_unchanged_folders_are_not_listed(tmp_path, monkeypatch):
+    monkeypatch.setattr(dirindex, "RACY_SECONDS", 0)
+    folder = tmp_path / "tree"
+    (folder / "a" / "b").mkdir(parents=True)
+    (folder / "a" / "report.pdf").write_text("x")
+    assert organize(folder, tmp_path / "index.sqlite")["files_moved"] == 1
+
+    summary = organize(folder, tmp_path / "index.sqlite")
+    assert summary["folders_scanned"] == 0
+    assert summary["folders_unchanged"] == 3
+
+
+def test_conflicts_are_retried_once_the_name_is_free(tmp_path, monkeypatch):
+    monkeypatch.setattr(dirindex, "RACY_SECONDS", 0)
+    folder = tmp_path / "tree"
+    (folder / "sub").mkdir(parents=True)
+    (folder / "DOCUMENTS").mkdir()
+    (folder / "DOCUMENTS" / "report.pdf").write_text("old")
+    (folder / "sub" / "report.pdf").write_text("new")
+    assert organize(folder, tmp_path / "index.sqlite")["conflicts"] == 1
+
+    # Neither freeing the name nor editing the file changes the folder's mtime
+    (folder / "DOCUMENTS" / "report.pdf").unlink()
+    (folder / "sub" / "report.pdf").write_text("newer")
+    summary = organize(folder, tmp_path / "index.sqlite")
+    assert summary["files_moved"] == 1
+    assert (folder / "DOCUMENTS" / "report.pdf").read_text() == "newer"
@@ -0,0 +1,130 @@
+import json
+import os
+
+import pytest
+
+from journal import JournalState, MoveJournal, find_unfinished, undo_run
+from mover import move_file
+from organizer import FileOrganizer
+
+
+def organize(folder, tmp_path, **options):
+    engine = FileOrganizer(**options)
+    plan = engine.plan(str(folder))
+    journal = MoveJournal.create(plan, str(tmp_path / "journals"))
+    return journal.path, engine.execute(plan, journal=journal)
+
+
+def test_undo_restores_the_whole_run(tmp_path):
+    folder = tmp_path / "downloads"
+    folder.mkdir()
+    for name in ("a.pdf", "b.jpg", "c.mp3"):
+        (folder / name).write_text(name)
+    journal_path, summary = organize(folder, tmp_path)
+    assert summary["files_moved"] == 3
+
+    summary = undo_run(journal_path)
+    assert summary["files_restored"] == 3
+    assert sorted(os.listdir(folder)) == ["a.pdf", "b.jpg", "c.mp3"]
+    assert (folder / "b.jpg").read_text() == "b.jpg"
+
+
+def test_undo_last_follows_completion_order(tmp_path):
+    journal_path = str(tmp_path / "run.journal")
+    folder = tmp_path / "downloads"
+    (folder / "DOCUMENTS").mkdir(parents=True)
+    for index in range(3):
+        (folder / "DOCUMENTS" / f"{index}.pdf").write_text("x")
+    journal = MoveJournal(journal_path)
+    journal._write({"type": "begin", "run": "run", "folder": str(folder),
+                    "plan": "missing.plan.json"})
+    journal.record_intents((index, str(folder / f"{index}.pdf"),
+                            str(folder / "DOCUMENTS" / f"{index}.pdf")) for index in range(3))
+    # Parallel moves finish out of plan order
+    for index in (2, 0, 1):
+        journal.record_done(index)
+    journal.close()
+    assert JournalState(journal_path).finished_last({0, 1, 2}) == [1, 0, 2]
+
+    summary = undo_run(journal_path, last=2)
+    assert summary["files_restored"] == 2
+    assert sorted(os.listdir(folder)) == ["0.pdf", "1.pdf", "DOCUMENTS"]
+
+
+def test_resumed_journal_continues_the_numbering(tmp_path):
+    journal_path = str(tmp_path / "run.journal")
+    journal = MoveJournal(journal_path)
+    journal.record_done(4)
+    journal.record_done(3)
+    journal.close(finished=False)
+    state = JournalState(journal_path)
+    journal = MoveJournal(journal_path, state.sequence)
+    journal.record_done(0)
+    journal.close()
+    with open(journal_path, encoding="utf-8") as f:
+        sequences = [record["sequence"] for record in map(json.loads, f)
+                     if record["type"] == "done"]
+    assert sequences == [0, 2]
+    assert JournalState(journal_path).finished_last({0, 3, 4}) == [0, 3, 4]
+
+
+def test_undo_keeps_files_that_replaced_an_older_one(tmp_path):
+    folder = tmp_path / "downloads"
+    (folder / "DOCUMENTS").mkdir(parents=True)
+    (folder / "DOCUMENTS" / "report.pdf").write_text("old")
+    os.utime(folder / "DOCUMENTS" / "report.pdf", (1000, 1000))
+    (folder / "report.pdf").write_text("new")
+    (folder / "other.pdf").write_text("other")
+    journal_path, summary = organize(folder, tmp_path, conflicts="overwrite-if-newer")
+    assert summary["replaced"] == 1
+
+    summary = undo_run(journal_path)
+    assert summary["files_restored"] == 1
+    assert summary["not_restorable"] == 1
+    assert (folder / "DOCUMENTS" / "report.pdf").read_text() == "new"
+    assert not (folder / "report.pdf").exists()
+    assert (folder / "other.pdf").read_text() == "other"
+
+
+def interrupted_run(tmp_path):
+    """Plan four files, move only a.pdf and b.jpg, and stop without an end record."""
+    folder = tmp_path / "downloads"
+    folder.mkdir()
+    for name in ("a.pdf", "b.jpg", "c.mp3", "d.pdf"):
+        (folder / name).write_text(name)
+    plan = FileOrganizer().plan(str(folder))
+    journal = MoveJournal.create(plan, str(tmp_path / "journals"))
+    moves = [(index, str(folder / plan.sources[index]), str(folder / plan.destination(index)))
+             for index in range(len(plan)) if plan.sources[index] in ("a.pdf", "b.jpg")]
+    journal.record_intents(moves)
+    for index, source, destination in moves:
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        move_file(source, destination)
+        journal.record_done(index)
+    journal.close(finished=False)
+    return folder, journal.path
+
+
+def test_resume_after_partial_undo_skips_undone_moves(tmp_path):
+    folder, journal_path = interrupted_run(tmp_path)
+    summary = undo_run(journal_path, categories=["images"])
+    assert summary["files_restored"] == 1
+    assert find_unfinished(str(tmp_path / "journals")) == [journal_path]
+
+    summary = FileOrganizer().resume(journal_path)
+    assert summary["files_moved"] == 2
+    assert summary["already_done"] == 2
+    assert sorted(os.listdir(folder)) == ["AUDIO", "DOCUMENTS", "b.jpg"]
+    assert sorted(os.listdir(folder / "DOCUMENTS")) == ["a.pdf", "d.pdf"]
+    assert find_unfinished(str(tmp_path / "journals")) == []
+
+
+def test_full_undo_ends_an_interrupted_run(tmp_path):
+    folder, journal_path = interrupted_run(tmp_path)
+    summary = undo_run(journal_path)
+    assert summary["files_restored"] == 2
+    assert sorted(os.listdir(folder)) == ["a.pdf", "b.jpg", "c.mp3", "d.pdf"]
+    assert find_unfinished(str(tmp_path / "journals")) == []
+    with pytest.raises(ValueError, match="already finished"):
+        FileOrganizer().resume(journal_path)
+    assert sorted(os.listdir(folder)) == ["a.pdf", "b.jpg", "c.mp3", "d.pdf"]
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from metrics import Histogram
+from netshare import SimulatedLatency
+from organizer import FileOrganizer
+
+LATENCY = 0.02
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "downloads"
+    (folder / "sub").mkdir(parents=True)
+    for index in range(5):
+        (folder / f"file_{index}.pdf").write_bytes(b"x")
+        (folder / "sub" / f"nested_{index}.jpg").write_bytes(b"x")
+    return folder
+
+
+@pytest.mark.parametrize("recursive", [False, True])
+def test_scan_stage_includes_the_listing(folder, recursive):
+    engine = FileOrganizer(metrics=True, recursive=recursive, dry_run=True)
+    with SimulatedLatency(str(folder), LATENCY):
+        plan = engine.plan(str(folder))
+    assert len(plan) == (10 if recursive else 5)
+    stages = engine.metrics.to_dict()["stages"]
+    # Every folder is listed once, each listing a round trip
+    assert stages["scan"]["wall"] >= LATENCY * (2 if recursive else 1)
+    assert stages["scan"]["wall"] / stages["plan"]["wall"] > 0.1
+
+
+def test_percentiles_never_exceed_the_maximum():
+    histogram = Histogram()
+    for seconds in (0.001, 0.0011, 0.0012):
+        histogram.observe(seconds)
+    assert histogram.percentile(0.99) <= 0.0012
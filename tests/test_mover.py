@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+import mover
+from mover import REPLACE_SUFFIX, VerificationError, copy_file_data, move_file
+
+# Different st_dev hints send move_file down the cross-device copy path
+SOURCE_DEV, TARGET_DEV = 1, 2
+
+
+def write(path, data, mtime=None):
+    path.write_bytes(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.mark.parametrize("verify", ["none", "size", "hash"])
+def test_cross_device_move_copies_and_removes_the_source(tmp_path, verify):
+    data = os.urandom(3 * mover.COPY_CHUNK_SIZE + 17)
+    src = write(tmp_path / "a.bin", data, mtime=1_000_000)
+    dst = tmp_path / "b.bin"
+    seen = []
+    move_file(str(src), str(dst), SOURCE_DEV, TARGET_DEV, verify=verify,
+              progress=lambda copied, total: seen.append((copied, total)))
+    assert not src.exists()
+    assert dst.read_bytes() == data
+    assert dst.stat().st_mtime == 1_000_000
+    assert seen[-1] == (len(data), len(data))
+
+
+@pytest.mark.parametrize("verify", ["size", "hash"])
+def test_failed_verification_keeps_the_source(tmp_path, monkeypatch, verify):
+    src = write(tmp_path / "a.bin", b"original data")
+    dst = tmp_path / "b.bin"
+
+    def corrupt(src, dst, progress=None, exclusive=False):
+        copy_file_data(src, dst, progress, exclusive)
+        with open(dst, "r+b") as f:
+            f.write(b"X" if verify == "hash" else b"original data and more")
+
+    monkeypatch.setattr(mover, "copy_file_data", corrupt)
+    with pytest.raises(VerificationError):
+        move_file(str(src), str(dst), SOURCE_DEV, TARGET_DEV, verify=verify)
+    assert src.read_bytes() == b"original data"
+    assert not dst.exists()
+
+
+def test_cross_device_move_never_overwrites(tmp_path):
+    src = write(tmp_path / "a.bin", b"new")
+    dst = write(tmp_path / "b.bin", b"someone else's")
+    with pytest.raises(FileExistsError):
+        move_file(str(src), str(dst), SOURCE_DEV, TARGET_DEV, verify="hash")
+    assert src.read_bytes() == b"new"
+    assert dst.read_bytes() == b"someone else's"
+
+
+def test_failed_replacing_copy_keeps_the_old_file(tmp_path, monkeypatch):
+    src = write(tmp_path / "a.bin", b"new")
+    dst = write(tmp_path / "b.bin", b"old")
+
+    def fail(src, dst, mode):
+        raise VerificationError(5, "content mismatch after copy", dst)
+
+    monkeypatch.setattr(mover, "verify_copy", fail)
+    with pytest.raises(VerificationError):
+        move_file(str(src), str(dst), SOURCE_DEV, TARGET_DEV, verify="hash", replace=True)
+    assert src.read_bytes() == b"new"
+    assert dst.read_bytes() == b"old"
+    assert not os.path.exists(str(dst) + REPLACE_SUFFIX)
+
+    monkeypatch.undo()
+    move_file(str(src), str(dst), SOURCE_DEV, TARGET_DEV, verify="hash", replace=True)
+    assert not src.exists()
+    assert dst.read_bytes() == b"new"
+
+
+def test_same_device_move_never_overwrites(tmp_path):
+    src = write(tmp_path / "a.bin", b"new")
+    dst = write(tmp_path / "b.bin", b"old")
+    with pytest.raises(FileExistsError):
+        move_file(str(src), str(dst))
+    assert src.read_bytes() == b"new"
+    assert dst.read_bytes() == b"old"
@@ -0,0 +1,109 @@
+import os
+import errno
+import threading
+
+import pytest
+
+import netshare
+from netshare import BACKOFF, AdaptiveLimit, AsyncPipeline, SimulatedLatency
+from organizer import FileOrganizer
+
+LATENCY = 0.005
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "share"
+    folder.mkdir()
+    for index in range(30):
+        extension = (".pdf", ".jpg", ".mp3")[index % 3]
+        (folder / f"file_{index}{extension}").write_bytes(b"x" * index)
+    return folder
+
+
+def test_network_mode_organizes_through_a_slow_share(folder):
+    engine = FileOrganizer(network=True, max_in_flight=8)
+    with SimulatedLatency(str(folder), LATENCY, capacity=4) as share:
+        summary = engine.execute(engine.plan(str(folder)))
+    assert share.calls > 0
+    assert summary["files_moved"] == 30
+    assert summary["errors"] == 0
+    assert sorted(os.listdir(folder)) == ["AUDIO", "DOCUMENTS", "IMAGES"]
+    assert all(len(os.listdir(folder / category)) == 10 for category in os.listdir(folder))
+
+
+def test_simulated_latency_restores_os(folder):
+    stat = os.stat
+    with SimulatedLatency(str(folder), LATENCY):
+        assert os.stat is not stat
+    assert os.stat is stat
+
+
+def test_calls_in_flight_stay_within_the_limit(folder):
+    names = sorted(os.listdir(folder))
+    lock = threading.Lock()
+    running = 0
+    most = 0
+
+    def stat(name):
+        nonlocal running, most
+        with lock:
+            running += 1
+            most = max(most, running)
+        try:
+            return os.stat(os.path.join(folder, name))
+        finally:
+            with lock:
+                running -= 1
+
+    pipeline = AsyncPipeline(max_in_flight=4)
+    with SimulatedLatency(str(folder), LATENCY):
+        results = list(pipeline.run(names, stat))
+    assert sorted(job for job, _ in results) == names
+    assert all(error is None for _, error in results)
+    assert 1 < most <= 4
+
+
+def test_errors_are_yielded_with_their_job(folder):
+    names = sorted(os.listdir(folder)) + ["missing.pdf"]
+    pipeline = AsyncPipeline(max_in_flight=4)
+    with SimulatedLatency(str(folder), LATENCY):
+        results = dict(pipeline.run(names, lambda name: os.stat(os.path.join(folder, name))))
+    assert isinstance(results.pop("missing.pdf"), FileNotFoundError)
+    assert set(results.values()) == {None}
+
+
+def test_limit_backs_off_on_an_overloaded_share(folder):
+    names = sorted(os.listdir(folder)) * 4
+    pipeline = AsyncPipeline(max_in_flight=16)
+    # Two calls are served at once, so the others queue and take longer
+    with SimulatedLatency(str(folder), LATENCY, capacity=2):
+        results = list(pipeline.run(names, lambda name: os.stat(os.path.join(folder, name))))
+    assert len(results) == len(names)
+    assert not pipeline.limit.slow_start
+    assert pipeline.limit.current < 16
+
+
+def test_limit_grows_per_call_until_the_maximum():
+    limit = AdaptiveLimit(initial=2, maximum=5)
+    for _ in range(10):
+        limit.record(0.01)
+    assert limit.current == 5
+
+
+def test_limit_backs_off_once_per_round_trip():
+    limit = AdaptiveLimit(initial=10, maximum=10)
+    limit.since_backoff = 10
+    limit.record(0.01)
+    limit.record(0.01, overloaded=True)
+    assert limit.value == 10 * BACKOFF
+    # Further overloads of the same round trip do not cut it again
+    limit.record(0.01, overloaded=True)
+    assert limit.value == 10 * BACKOFF
+    assert not limit.slow_start
+
+
+def test_overload_errors():
+    assert netshare.is_overload(OSError(errno.EBUSY, "busy"))
+    assert not netshare.is_overload(OSError(errno.ENOENT, "missing"))
+    assert not netshare.is_overload(None)
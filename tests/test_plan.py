@@ -0,0 +1,85 @@
+import csv
+import json
+import os
+
+import pytest
+
+from organizer import FileOrganizer
+from plan import (STATUS_EXISTS, STATUS_IDENTICAL, STATUS_OK, STATUS_REPLACE, MovePlan)
+
+
+def sample_plan(folder="/data"):
+    plan = MovePlan(folder, created=1234.5)
+    plan.duplicate_action = "collect"
+    plan.add("report.pdf", "DOCUMENTS", 10)
+    plan.add("sub/report.pdf", "DOCUMENTS", 10, STATUS_OK, "report (1).pdf")
+    plan.add("photo.jpg", "IMAGES", 2000, STATUS_REPLACE)
+    plan.add("copy.pdf", "DOCUMENTS", 10, STATUS_IDENTICAL, duplicate_of=0)
+    plan.add("taken.mp3", "AUDIO", 5, STATUS_EXISTS)
+    return plan
+
+
+def test_json_round_trip(tmp_path):
+    plan = sample_plan()
+    path = str(tmp_path / "plan.json")
+    plan.export(path)
+    loaded = MovePlan.load(path)
+    assert loaded.folder == "/data"
+    assert loaded.created == 1234.5
+    assert loaded.duplicate_action == "collect"
+    assert list(loaded.entries()) == list(plan.entries())
+    assert loaded.target_names == plan.target_names
+    assert loaded.duplicate_of == {3: 0}
+    assert loaded.counts() == plan.counts()
+    assert loaded.diff(plan) == {"added": [], "removed": [], "changed": []}
+
+
+def test_csv_export(tmp_path):
+    path = str(tmp_path / "plan.CSV")
+    sample_plan().export(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5
+    assert rows[1]["source"] == os.path.join("/data", "sub/report.pdf")
+    assert rows[1]["destination"] == os.path.join("/data", "DOCUMENTS", "report (1).pdf")
+    assert rows[2]["status"] == STATUS_REPLACE
+    assert rows[3]["duplicate_of"] == os.path.join("/data", "report.pdf")
+    assert rows[0]["duplicate_of"] == ""
+
+
+def test_unknown_version_is_rejected(tmp_path):
+    path = tmp_path / "plan.json"
+    path.write_text(json.dumps({"version": 99, "folder": "/data", "entries": []}))
+    with pytest.raises(ValueError, match="version"):
+        MovePlan.load(str(path))
+
+
+def test_diff():
+    old = sample_plan()
+    new = MovePlan("/data")
+    new.add("report.pdf", "DOCUMENTS", 10)
+    new.add("photo.jpg", "IMAGES", 2000, STATUS_OK)
+    new.add("copy.pdf", "ARCHIVES", 10)
+    new.add("new.txt", "DOCUMENTS", 1)
+    new.add("taken.mp3", "AUDIO", 5, STATUS_EXISTS)
+    assert old.diff(new) == {
+        "added": ["new.txt"],
+        "removed": ["sub/report.pdf"],
+        "changed": [("photo.jpg", os.path.join("IMAGES", "photo.jpg"),
+                     os.path.join("IMAGES", "photo.jpg")),
+                    ("copy.pdf", os.path.join("DOCUMENTS", "copy.pdf"),
+                     os.path.join("ARCHIVES", "copy.pdf"))],
+    }
+
+
+def test_saved_plan_replays(tmp_path):
+    folder = tmp_path / "downloads"
+    folder.mkdir()
+    for name in ("a.pdf", "b.jpg", "c.mp3"):
+        (folder / name).write_bytes(b"x")
+    path = str(tmp_path / "plan.json")
+    FileOrganizer(dry_run=True).plan(str(folder)).to_json(path)
+    assert sorted(os.listdir(folder)) == ["a.pdf", "b.jpg", "c.mp3"]
+    summary = FileOrganizer().execute(MovePlan.load(path), recheck=True)
+    assert summary["files_moved"] == 3
+    assert sorted(os.listdir(folder)) == ["AUDIO", "DOCUMENTS", "IMAGES"]
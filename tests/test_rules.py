@@ -0,0 +1,108 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from rules import Rule, RuleError, RuleMatcher, parse_size
+from organizer import FileOrganizer
+
+NOW = 1_800_000_000
+DAY = 86400
+
+
+def entry(name, size=0, mtime=NOW):
+    st = SimpleNamespace(st_size=size, st_mtime=mtime)
+    return SimpleNamespace(name=name, path="/data/" + name, stat=lambda: st)
+
+
+def test_first_matching_rule_wins():
+    matcher = RuleMatcher([
+        {"name": "invoice*", "destination": "INVOICES"},
+        {"regex": r"\d{4}", "destination": "NUMBERED"},
+        {"extensions": [".pdf"], "destination": "PDFS"},
+    ])
+    assert matcher.match(entry("Invoice_2024.pdf"), "DOCUMENTS", now=NOW) == "INVOICES"
+    assert matcher.match(entry("scan_2024.pdf"), "DOCUMENTS", now=NOW) == "NUMBERED"
+    assert matcher.match(entry("scan.PDF"), "DOCUMENTS", now=NOW) == "PDFS"
+    assert matcher.match(entry("scan.txt"), "DOCUMENTS", now=NOW) is None
+
+
+def test_category_and_extension_rules_keep_their_order():
+    matcher = RuleMatcher([
+        {"extensions": [".tar.gz"], "destination": "TARBALLS"},
+        {"categories": ["COMPRESSED"], "destination": "ARCHIVES"},
+    ])
+    assert matcher.match(entry("src.tar.gz"), "COMPRESSED", now=NOW) == "TARBALLS"
+    assert matcher.match(entry("src.zip"), "COMPRESSED", now=NOW) == "ARCHIVES"
+    assert matcher.match(entry("src.gz"), "IMAGES", now=NOW) is None
+
+
+def test_size_and_age_conditions():
+    matcher = RuleMatcher([
+        {"min_size": "1 MB", "max_age_days": 7, "destination": "BIG_AND_NEW"},
+        {"max_size": 10, "destination": "TINY"},
+        {"min_age_days": 30, "destination": "OLD"},
+    ])
+    assert matcher.match(entry("a", 2 << 20, NOW - DAY), "OTHERS", now=NOW) == "BIG_AND_NEW"
+    assert matcher.match(entry("a", 2 << 20, NOW - 8 * DAY), "OTHERS", now=NOW) is None
+    assert matcher.match(entry("a", 5, NOW - 8 * DAY), "OTHERS", now=NOW) == "TINY"
+    assert matcher.match(entry("a", 500, NOW - 31 * DAY), "OTHERS", now=NOW) == "OLD"
+
+
+@pytest.mark.parametrize("value, size", [(10, 10), ("10", 10), ("1.5KB", 1536), ("2 GiB", 2 << 30)])
+def test_parse_size(value, size):
+    assert parse_size(value) == size
+
+
+def test_date_and_subfolder_destinations():
+    matcher = RuleMatcher([
+        {"subfolder": "Screenshots*", "destination": "SCREENSHOTS/{year}"},
+        {"categories": ["IMAGES"], "destination": "{category}/{year}/{month}/{day}"},
+    ])
+    mtime = time.mktime((2024, 3, 5, 12, 0, 0, 0, 0, -1))
+    photo = entry("photo.jpg", mtime=mtime)
+    assert matcher.match(photo, "IMAGES", "screenshots/2024", now=NOW) == "SCREENSHOTS/2024"
+    assert matcher.match(photo, "IMAGES", "", now=NOW) == "IMAGES/2024/03/05"
+    assert matcher.folders == {"SCREENSHOTS"}
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"regex": "([a-z", "destination": "X"}, "invalid regex"),
+    ({"name": "*.pdf"}, "destination is missing"),
+    ({"name": "*.pdf", "destination": "{year}/X"}, "cannot start with a date"),
+    ({"name": "*.pdf", "destination": "X/{week}"}, "unknown field"),
+    ({"name": "*.pdf", "destination": "../X"}, "inside the organized folder"),
+    ({"min_size": "big", "destination": "X"}, "invalid size"),
+    ({"max_age_days": "old", "destination": "X"}, "numbers of days"),
+    ({"colour": "red", "destination": "X"}, "unknown field colour"),
+])
+def test_invalid_rules_are_rejected(spec, message):
+    with pytest.raises(RuleError, match=message):
+        Rule(0, spec)
+
+
+def test_invalid_rules_are_left_out():
+    matcher = RuleMatcher([{"regex": "(", "destination": "X"}, {"name": "*", "destination": "ALL"}])
+    assert len(matcher) == 1
+    assert matcher.errors[0].startswith("rule 1: invalid regex")
+    assert matcher.match(entry("a.txt"), "DOCUMENTS", now=NOW) == "ALL"
+
+
+def test_organize_with_rules(tmp_path, categories):
+    categories({"DOCUMENTS": [".pdf"], "rules": [
+        {"name": "invoice*", "destination": "INVOICES/{year}"},
+        {"subfolder": "work", "destination": "WORK"},
+    ]})
+    folder = tmp_path / "downloads"
+    (folder / "work").mkdir(parents=True)
+    (folder / "invoice_1.pdf").write_bytes(b"x")
+    (folder / "work" / "plan.pdf").write_bytes(b"x")
+    (folder / "other.pdf").write_bytes(b"x")
+    year = time.strftime("%Y", time.localtime(os.stat(folder / "invoice_1.pdf").st_mtime))
+    engine = FileOrganizer(recursive=True)
+    summary = engine.execute(engine.plan(str(folder)))
+    assert summary["errors"] == 0
+    assert (folder / "INVOICES" / year / "invoice_1.pdf").exists()
+    assert (folder / "WORK" / "plan.pdf").exists()
+    assert (folder / "DOCUMENTS" / "other.pdf").exists()
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+
+import pytest
+
+import scheduler
+from organizer import FileOrganizer
+from scheduler import DeviceScheduler
+
+
+class FakeEngine:
+    """Engine that records how many folders of each device run at once."""
+
+    def __init__(self, tracker, folder, progress):
+        self.tracker = tracker
+        self.folder = folder
+        self.progress = progress
+
+    def run(self, folder, journal_dir=None):
+        device = self.tracker.devices[folder]
+        with self.tracker.lock:
+            running = self.tracker.running
+            running[device] = running.get(device, 0) + 1
+            self.tracker.peak[device] = max(self.tracker.peak.get(device, 0), running[device])
+            self.tracker.overall = max(self.tracker.overall, sum(running.values()))
+            self.tracker.order.append(folder)
+        time.sleep(0.05)
+        self.progress(1, 1)
+        with self.tracker.lock:
+            running[device] -= 1
+        return {"folder": folder, "files_moved": 1, "bytes_moved": 10, "errors": 0}
+
+
+class Tracker:
+    def __init__(self, devices):
+        self.devices = devices
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+        self.overall = 0
+        self.order = []
+
+    def make_engine(self, folder, progress):
+        return FakeEngine(self, folder, progress)
+
+
+@pytest.fixture
+def devices(monkeypatch):
+    """Map /disk<N>/... folders to device N."""
+    layout = {os.path.abspath(f"/disk{device}/f{number}"): device
+              for device in (1, 2, 3) for number in range(3)}
+
+    def device_of(path):
+        if path not in layout:
+            raise FileNotFoundError(2, "No such file or directory", path)
+        return layout[path]
+
+    monkeypatch.setattr(scheduler, "device_of", device_of)
+    return layout
+
+
+def test_groups_folders_by_device(devices):
+    groups, failed = DeviceScheduler(None).group(list(devices) + ["/missing"])
+    assert sorted(groups) == [1, 2, 3]
+    assert groups[2] == [os.path.abspath(f"/disk2/f{number}") for number in range(3)]
+    assert list(failed) == ["/missing"]
+
+
+def test_one_folder_per_device_at_a_time(devices):
+    tracker = Tracker(devices)
+    summary = DeviceScheduler(tracker.make_engine).run(list(devices))
+    assert tracker.peak == {1: 1, 2: 1, 3: 1}
+    # Different devices are organized side by side
+    assert tracker.overall > 1
+    assert summary["devices"] == 3
+    assert summary["files_moved"] == 9
+    assert summary["bytes_moved"] == 90
+    assert [result["folder"] for result in summary["folders"]] == list(devices)
+
+
+def test_device_limits(devices):
+    tracker = Tracker(devices)
+    DeviceScheduler(tracker.make_engine, device_workers=2, limits={3: 3}).run(list(devices))
+    assert tracker.peak == {1: 2, 2: 2, 3: 3}
+
+
+def test_progress_is_summed_over_folders(devices):
+    tracker = Tracker(devices)
+    reports = []
+    DeviceScheduler(tracker.make_engine, progress=lambda done, total: reports.append(
+        (done, total))).run(list(devices))
+    assert reports[-1] == (9, 9)
+
+
+def test_failing_folder_does_not_stop_the_others(devices):
+    tracker = Tracker(devices)
+    broken = os.path.abspath("/disk1/f1")
+
+    def make_engine(folder, progress):
+        if folder == broken:
+            raise RuntimeError("boom")
+        return tracker.make_engine(folder, progress)
+
+    messages = []
+    summary = DeviceScheduler(make_engine, log=messages.append).run(
+        list(devices) + ["/missing"])
+    assert summary["errors"] == 2
+    assert summary["files_moved"] == 8
+    assert f"✗ Could not organize {broken}: boom" in messages
+    assert summary["folders"][-1]["folder"] == os.path.abspath("/missing")
+
+
+def test_stop_event_starts_no_new_folders(devices):
+    tracker = Tracker(devices)
+    stop = threading.Event()
+    stop.set()
+    summary = DeviceScheduler(tracker.make_engine).run(list(devices), stop_event=stop)
+    assert tracker.order == []
+    assert all(result.get("stopped") for result in summary["folders"])
+
+
+def test_organizes_real_folders(tmp_path):
+    folders = []
+    for name in ("a", "b"):
+        folder = tmp_path / name
+        folder.mkdir()
+        (folder / "doc.pdf").write_bytes(b"x" * 3)
+        folders.append(str(folder))
+    summary = DeviceScheduler(lambda folder, progress: FileOrganizer(progress=progress)).run(
+        folders)
+    assert summary["devices"] == 1
+    assert summary["files_moved"] == 2
+    assert summary["bytes_moved"] == 6
+    assert all(os.path.exists(os.path.join(folder, "DOCUMENTS", "doc.pdf")) for folder in folders)
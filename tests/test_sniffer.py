@@ -0,0 +1,75 @@
+import struct
+
+import pytest
+
+from backends import MemoryBackend
+from sniffer import ContentSniffer, sniff_bytes, sniff_file
+
+
+def bmp(size=70, info_size=40, data_offset=54):
+    return b"BM" + struct.pack("<IIII", size, 0, data_offset, info_size) + b"\0" * 40
+
+
+def exe(pe_offset=0x80, signature=b"PE\0\0"):
+    head = bytearray(b"MZ" + b"\0" * 0x100)
+    struct.pack_into("<I", head, 0x3C, pe_offset)
+    head[pe_offset:pe_offset + 4] = signature
+    return bytes(head)
+
+
+@pytest.mark.parametrize("head, extension", [
+    (b"%PDF-1.7\n", ".pdf"),
+    (b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR", ".png"),
+    (b"\xff\xd8\xff\xe0\0\x10JFIF", ".jpg"),
+    (b"GIF89a\x01\0", ".gif"),
+    (b"RIFF\0\0\0\0WEBPVP8 ", ".webp"),
+    (b"\0\0\0\x18ftypmp42", ".mp4"),
+    (b"\0\0\0\x18ftypheic", ".heic"),
+    (b"PK\x03\x04" + b"\0" * 26 + b"word/document.xml", ".docx"),
+    (b"PK\x03\x04" + b"\0" * 26 + b"readme.txt", ".zip"),
+    (b"\0" * 257 + b"ustar\x0000", ".tar"),
+    (b"\x1f\x8b\x08\0", ".gz"),
+    (bmp(), ".bmp"),
+    (exe(), ".exe"),
+    (b"  \n<!DOCTYPE html><html>", ".html"),
+    (b"<svg xmlns='http://www.w3.org/2000/svg'>", ".svg"),
+    (b"<?xml version='1.0'?>", ".xml"),
+])
+def test_known_signatures(head, extension):
+    assert sniff_bytes(head) == extension
+
+
+@pytest.mark.parametrize("head", [
+    b"",
+    b"Dear team,\nthe meeting moved to Monday.\n",
+    b"def main():\n    return 0\n",
+    b"BMW service invoice, March\n",
+    b"MZ is not a program here, just text. " * 4,
+    exe(signature=b"NE\0\0"),
+    bmp(info_size=41),
+    bmp(data_offset=10),
+    b"\x00\x01\x02\x03 random binary",
+])
+def test_unrecognized_content(head):
+    assert sniff_bytes(head) is None
+
+
+def test_bmp_size_is_checked_when_known():
+    assert sniff_bytes(bmp(size=70), size=70) == ".bmp"
+    assert sniff_bytes(bmp(size=70), size=71) is None
+
+
+def test_sniff_through_a_backend_and_cache():
+    fs = MemoryBackend()
+    fs.add_file("/in/photo", data=b"\xff\xd8\xff\xe0" + b"\0" * 100)
+    fs.add_file("/in/notes", data=b"just some text\n")
+    assert sniff_file("/in/photo", fs) == ".jpg"
+    sniffer = ContentSniffer(workers=2, fs=fs)
+    try:
+        entries = {entry.name: entry for entry in fs.scandir("/in")}
+        assert sniffer.submit(entries["photo"]).result() == ".jpg"
+        assert sniffer.submit(entries["notes"]).result() is None
+        assert sniffer.submit(entries["photo"]).result() == ".jpg"
+    finally:
+        sniffer.close()
+    assert (sniffer.sniffed, sniffer.cached) == (2, 1)
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from backends import MemoryBackend
+from walker import ParallelWalker
+
+
+def os_walk_files(root, max_depth=None):
+    root = str(root)
+    found = set()
+    for path, dirs, files in os.walk(root):
+        depth = 0 if path == root else os.path.relpath(path, root).count(os.sep) + 1
+        if max_depth is not None and depth >= max_depth:
+            dirs.clear()
+        found.update(os.path.join(path, name) for name in files)
+    return found
+
+
+def walk(root, **options):
+    return {entry.path for entry in ParallelWalker(**options).walk(str(root))}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    for a in range(4):
+        for b in range(3):
+            folder = root / f"a{a}" / f"b{b}" / "c"
+            folder.mkdir(parents=True)
+            (folder / "deep.txt").write_text("x")
+            (folder.parent / f"mid{b}.pdf").write_text("x")
+        (root / f"a{a}" / "top.jpg").write_text("x")
+    (root / "root.txt").write_text("x")
+    return root
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_same_files_as_os_walk(tree, workers):
+    assert walk(tree, workers=workers) == os_walk_files(tree)
+
+
+@pytest.mark.parametrize("max_depth", [0, 1, 2])
+def test_depth_limit(tree, max_depth):
+    found = walk(tree, max_depth=max_depth)
+    assert found == os_walk_files(tree, max_depth)
+    assert all(os.path.relpath(path, tree).count(os.sep) <= max_depth for path in found)
+
+
+def test_symlink_loops_are_not_followed(tree):
+    os.symlink(tree, tree / "a0" / "loop")
+    os.symlink(tree / "a1", tree / "a2" / "b0" / "to_a1")
+    assert walk(tree, workers=4) == os_walk_files(tree)
+
+
+def test_full_queue_walks_overflow_depth_first(tree):
+    # With room for a single queued folder nearly every subfolder overflows
+    assert walk(tree, workers=3, max_pending=1) == os_walk_files(tree)
+
+
+def test_wide_tree_with_a_full_queue():
+    fs = MemoryBackend()
+    for index in range(2000):
+        fs.add_file(f"/wide/dir{index}/sub/file{index}.txt", 1)
+    walker = ParallelWalker(workers=4, max_pending=8, fs=fs)
+    found = {entry.path for entry in walker.walk("/wide")}
+    assert found == {f"/wide/dir{index}/sub/file{index}.txt" for index in range(2000)}
+    assert walker.dirs_scanned == 4001
+
+
+def test_excludes_and_skipped_folders(tree):
+    found = walk(tree, exclude=["*.pdf"], skip_dirs=[str(tree / "a3")])
+    expected = {path for path in os_walk_files(tree)
+                if not path.endswith(".pdf") and not path.startswith(str(tree / "a3") + os.sep)}
+    assert found == expected
+
+
+def test_stopping_early_releases_the_workers(tree):
+    walker = ParallelWalker(workers=4, buffer_batches=1)
+    iterator = walker.walk(str(tree))
+    next(iterator)
+    iterator.close()
+    assert walker._stop
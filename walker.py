@@ -0,0 +1,275 @@
+"""Parallel directory walker used by the recursive organize mode."""
+import os
+import re
+import queue
+import fnmatch
+import threading
+from collections import deque
+
+from localfs import LOCAL
+
+# Default number of directory scanning threads
+DEFAULT_WALK_WORKERS = 8
+
+# Files are handed to the consumer in batches of this size
+_BATCH_SIZE = 256
+
+
+def compile_excludes(patterns):
+    """Compile glob patterns (matched against entry names) into one regex.
+
+    Returns None when there is nothing to exclude.
+    """
+    patterns = [pattern for pattern in patterns if pattern]
+    if not patterns:
+        return None
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    return re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns), flags)
+
+
+class ParallelWalker:
+    """Walk a directory tree on several threads and stream its files.
+
+    Every worker keeps its own deque of directories to scan. It pushes the
+    subdirectories it finds onto its own end and pops from there (depth
+    first), while idle workers steal from the opposite end of the other
+    deques, which hands them large, shallow subtrees.
+
+    Memory stays bounded on very wide trees: once ``max_pending``
+    directories are queued, a worker enters each new subdirectory as soon
+    as it is found (depth first), so it holds one open listing per level
+    of the tree however many subdirectories a folder has. Files are passed
+    to the consumer through a bounded queue so a slow consumer pauses the
+    walk.
+
+    Directories named in ``skip_dirs`` (absolute paths), directories deeper
+    than ``max_depth`` (the root is depth 0), names matching ``exclude``
+    globs and, with ``same_device``, other mounted file systems are not
+    entered. Symlinked directories are never followed. Folders are listed
+    through the ``fs`` backend (see backends.py).
+
+    With a ``dir_state`` (a dirindex.DirectoryIndex), every folder is
+    stat'ed first and one whose mtime is unchanged is not listed; its known
+    subfolders are visited instead. Every folder that is listed is
+    recorded in ``dir_state.listed``.
+    """
+
+    def __init__(self, workers=DEFAULT_WALK_WORKERS, max_depth=None, exclude=(),
+                 skip_dirs=(), same_device=True, max_pending=10000, buffer_batches=64, fs=None,
+                 dir_state=None):
+        """Initialize the walker."""
+        self.fs = fs or LOCAL
+        self.workers = max(1, int(workers))
+        self.max_depth = max_depth
+        self.exclude = compile_excludes(exclude)
+        self.skip_dirs = {os.path.normcase(os.path.abspath(path)) for path in skip_dirs}
+        self.same_device = same_device
+        self.max_pending = max_pending
+        self.buffer_batches = buffer_batches
+        self.dir_state = dir_state
+        self.errors = []
+        self.dirs_scanned = 0
+        self.files_found = 0
+
+    def walk(self, root):
+        """Yield a DirEntry for every file below root."""
+        root = os.path.abspath(root)
+        self.errors = []
+        self.dirs_scanned = 0
+        self.files_found = 0
+        self._root_dev = self.fs.stat(root).st_dev if self.same_device else None
+        self._results = queue.Queue(maxsize=self.buffer_batches)
+        self._deques = [deque() for _ in range(self.workers)]
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 1
+        self._stop = False
+        self._deques[0].append((root, 0))
+
+        threads = [threading.Thread(target=self._worker, args=(index,), daemon=True,
+                                    name=f"springclean-walk-{index}")
+                   for index in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        finished = 0
+        try:
+            while finished < self.workers:
+                batch = self._results.get()
+                if batch is None:
+                    finished += 1
+                    continue
+                for entry in batch:
+                    self.files_found += 1
+                    yield entry
+        finally:
+            # Consumer stopped early or walk is done: release blocked workers
+            with self._idle:
+                self._stop = True
+                self._idle.notify_all()
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    self._results.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+
+    def _take(self, index):
+        """Pop work from our own deque, or steal the oldest item of another."""
+        own = self._deques[index]
+        try:
+            return own.pop()
+        except IndexError:
+            pass
+        for offset in range(1, self.workers):
+            try:
+                return self._deques[(index + offset) % self.workers].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _worker(self, index):
+        """Scan directories until the whole tree is done."""
+        try:
+            while True:
+                item = self._take(index)
+                if item is None:
+                    with self._idle:
+                        if self._pending == 0 or self._stop:
+                            return
+                        self._idle.wait(0.05)
+                    continue
+                batch = []
+                # Listings in progress, one per level: subdirectories found while
+                # the queue is full are walked right away by this worker
+                stack = [self._scan(*item, batch)]
+                try:
+                    while stack and not self._stop:
+                        subdir = next(stack[-1], None)
+                        if subdir is None:
+                            stack.pop()
+                        elif not self._push(subdir, index):
+                            stack.append(self._scan(*subdir, batch))
+                    if batch:
+                        self._emit(batch)
+                finally:
+                    for listing in stack:
+                        listing.close()
+                    with self._idle:
+                        self._pending -= 1
+                        if self._pending == 0:
+                            self._idle.notify_all()
+        finally:
+            self._results.put(None)
+
+    def _emit(self, batch):
+        """Hand a batch of files to the consumer, waiting while it is busy."""
+        while not self._stop:
+            try:
+                self._results.put(list(batch), timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        batch.clear()
+
+    def _scan(self, path, depth, batch):
+        """List one directory, adding its files to ``batch``; yield the subdirectories to enter."""
+        if self._stop:
+            return
+        if self.dir_state is not None:
+            yield from self._scan_changed(path, depth, batch)
+            return
+        try:
+            iterator = self.fs.scandir(path)
+        except OSError as e:
+            self.errors.append((path, e))
+            return
+        with self._lock:
+            self.dirs_scanned += 1
+        exclude = self.exclude
+        descend = self.max_depth is None or depth < self.max_depth
+        with iterator:
+            for entry in iterator:
+                if exclude is not None and exclude.match(entry.name):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if descend and self._should_enter(entry):
+                            yield entry.path, depth + 1
+                    elif entry.is_file():
+                        batch.append(entry)
+                        if len(batch) >= _BATCH_SIZE:
+                            self._emit(batch)
+                except OSError as e:
+                    self.errors.append((entry.path, e))
+
+    def _scan_changed(self, path, depth, batch):
+        """Like _scan, but list a directory only if it changed since the state was saved."""
+        try:
+            st = self.fs.stat(path)
+        except OSError as e:
+            self.errors.append((path, e))
+            return
+        if self._root_dev is not None and st.st_dev != self._root_dev:
+            return
+        descend = self.max_depth is None or depth < self.max_depth
+        subdirs = self.dir_state.unchanged(path, st.st_mtime_ns)
+        if subdirs is not None:
+            if descend:
+                exclude = self.exclude
+                for name in subdirs:
+                    subdir = os.path.join(path, name)
+                    if exclude is not None and exclude.match(name):
+                        continue
+                    if os.path.normcase(subdir) not in self.skip_dirs:
+                        yield subdir, depth + 1
+            return
+        try:
+            iterator = self.fs.scandir(path)
+        except OSError as e:
+            self.errors.append((path, e))
+            return
+        with self._lock:
+            self.dirs_scanned += 1
+        exclude = self.exclude
+        subdirs = []
+        files = 0
+        with iterator:
+            for entry in iterator:
+                if exclude is not None and exclude.match(entry.name):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                        if descend and self._should_enter(entry):
+                            yield entry.path, depth + 1
+                    elif entry.is_file():
+                        files += 1
+                        batch.append(entry)
+                        if len(batch) >= _BATCH_SIZE:
+                            self._emit(batch)
+                except OSError as e:
+                    self.errors.append((entry.path, e))
+        with self._lock:
+            self.dir_state.listed[path] = [st.st_mtime_ns, subdirs, files]
+
+    def _should_enter(self, entry):
+        """Return True if the walker should descend into a directory entry."""
+        if os.path.normcase(entry.path) in self.skip_dirs:
+            return False
+        if self._root_dev is not None:
+            dev = entry.stat(follow_symlinks=False).st_dev
+            if not dev:
+                # DirEntry.stat() leaves the device out on Windows
+                dev = self.fs.stat(entry.path, follow_symlinks=False).st_dev
+            return dev == self._root_dev
+        return True
+
+    def _push(self, item, index):
+        """Queue a (path, depth) subdirectory for any worker; return False if the queue is full."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            self._deques[index].append(item)
+            self._idle.notify()
+            return True
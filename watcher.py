@@ -0,0 +1,244 @@
+"""Watch a folder and report files once they have finished arriving.
+
+On Linux the watcher blocks on inotify (through ctypes, no extra package),
+so an idle folder costs no CPU at all. Elsewhere it polls the folder's
+mtime and only lists the folder when that changes.
+
+A new file is reported only once it looks complete: partial-download names
+(.crdownload, .part, ...) are ignored until the browser renames them. With
+inotify, a file is complete once the program writing it closes it
+(IN_CLOSE_WRITE) or it is moved in whole, however long the writer pauses in
+between. Without close events (polling, or after the inotify queue
+overflowed) the file's size and mtime must stay the same for
+``settle_seconds`` instead.
+"""
+import os
+import sys
+import stat
+import time
+import errno
+import select
+import struct
+
+# Default debounce and polling intervals (seconds)
+DEFAULT_SETTLE_SECONDS = 2.0
+DEFAULT_POLL_SECONDS = 5.0
+
+# Names used by browsers and download managers while a file is incomplete
+PARTIAL_SUFFIXES = (".crdownload", ".part", ".partial", ".download", ".opdownload",
+                    ".tmp", ".temp", ".!ut", ".!qb", ".aria2")
+PARTIAL_PREFIXES = ("~$", ".~lock.")
+
+# inotify constants (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_partial(name):
+    """Return True if a file name marks an incomplete download or lock file."""
+    lower = name.lower()
+    return lower.endswith(PARTIAL_SUFFIXES) or lower.startswith(PARTIAL_PREFIXES)
+
+
+class _InotifySource:
+    """Report names created, written or moved into a folder using Linux inotify."""
+
+    def __init__(self, folder_path):
+        """Start watching the folder; raises OSError if inotify is unavailable."""
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE_SELF | _IN_MOVE_SELF
+        if libc.inotify_add_watch(self._fd, os.fsencode(folder_path), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, "inotify_add_watch failed", folder_path)
+
+    def wait(self, timeout):
+        """Block up to timeout seconds (None = forever) and return new names.
+
+        Returns {name: complete}, where complete is True once the file was
+        closed after writing or moved in, and False if it was only created
+        so far. Returns None when the events overflowed and the caller must
+        rescan.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return {}
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return {}
+        names = {}
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            if mask & _IN_Q_OVERFLOW:
+                return None
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED):
+                raise FileNotFoundError(errno.ENOENT, "watched folder went away")
+            if length:
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                names[name] = (names.get(name, False)
+                               or bool(mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO)))
+            offset += length
+        return names
+
+    def close(self):
+        """Stop watching."""
+        os.close(self._fd)
+
+
+class _PollingSource:
+    """Report new names by polling the folder's mtime."""
+
+    def __init__(self, folder_path, poll_seconds):
+        """Remember the current contents of the folder."""
+        self.folder_path = folder_path
+        self.poll_seconds = poll_seconds
+        self._mtime = None
+        self._known = set()
+        self._refresh()
+
+    def _refresh(self):
+        """List the folder if its mtime changed; return names not seen before.
+
+        Polling cannot tell whether a file is still open, so every name is
+        returned as {name: None}: complete once it stops changing.
+        """
+        mtime = os.stat(self.folder_path).st_mtime_ns
+        if mtime == self._mtime:
+            return {}
+        self._mtime = mtime
+        current = set(os.listdir(self.folder_path))
+        new = current - self._known
+        self._known = current
+        return dict.fromkeys(new)
+
+    def wait(self, timeout):
+        """Sleep until the next poll (or timeout) and return new names like _refresh()."""
+        delay = self.poll_seconds if timeout is None else min(timeout, self.poll_seconds)
+        time.sleep(delay)
+        return self._refresh()
+
+    def close(self):
+        """Nothing to release."""
+
+
+class FolderWatcher:
+    """Yield batches of newly arrived, fully written files in a folder."""
+
+    def __init__(self, folder_path, settle_seconds=DEFAULT_SETTLE_SECONDS,
+                 poll_seconds=DEFAULT_POLL_SECONDS, use_inotify=True):
+        """Initialize the watcher."""
+        self.folder_path = folder_path
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.backend = None
+        self._source = None
+
+    def open(self):
+        """Start watching now; files arriving from here on will be reported.
+
+        Uses inotify if possible and falls back to polling otherwise.
+        batches() calls this itself if needed.
+        """
+        if self._source is not None:
+            return
+        if self.use_inotify:
+            try:
+                self._source = _InotifySource(self.folder_path)
+                self.backend = "inotify"
+                return
+            except (OSError, AttributeError):
+                pass
+        self._source = _PollingSource(self.folder_path, self.poll_seconds)
+        self.backend = "polling"
+
+    def _observe(self, name):
+        """Return (size, mtime_ns, written here) of a regular file, or None if not applicable.
+
+        Symbolic links and hard links to files elsewhere are created whole,
+        without any write in this folder to wait for.
+        """
+        path = os.path.join(self.folder_path, name)
+        try:
+            st = os.lstat(path)
+            linked = stat.S_ISLNK(st.st_mode) or st.st_nlink > 1
+            if stat.S_ISLNK(st.st_mode):
+                st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return st.st_size, st.st_mtime_ns, not linked
+
+    def batches(self, stop_event=None):
+        """Yield lists of file names that have arrived and stopped changing.
+
+        Runs until ``stop_event`` (a threading.Event) is set.
+        """
+        self.open()
+        source = self._source
+        # name -> (last observation, time it was last seen changing, complete)
+        # where complete is True once closed after writing, False while
+        # waiting for that, and None if only settling tells
+        pending = {}
+        try:
+            while stop_event is None or not stop_event.is_set():
+                # Only wake up often while something is settling; otherwise
+                # block on the source, waking every poll interval to notice
+                # stop requests
+                settling = any(complete is None for _, _, complete in pending.values())
+                timeout = (min(self.settle_seconds, self.poll_seconds) if settling
+                           else self.poll_seconds)
+                names = source.wait(timeout)
+                if names is None:
+                    # Close events were lost, so only settling tells
+                    names = dict.fromkeys(os.listdir(self.folder_path))
+                now = time.monotonic()
+                for name, complete in names.items():
+                    if is_partial(name):
+                        continue
+                    if name not in pending:
+                        pending[name] = (None, now, complete)
+                    elif complete:
+                        pending[name] = pending[name][:2] + (True,)
+
+                ready = []
+                for name, (previous, changed_at, complete) in list(pending.items()):
+                    current = self._observe(name)
+                    if current is None:
+                        # Gone, renamed or not a regular file
+                        del pending[name]
+                    elif complete or (complete is False and not current[2]):
+                        # Closed after writing, or linked in whole
+                        del pending[name]
+                        ready.append(name)
+                    elif complete is False:
+                        # Still open for writing; its close event will come
+                        pending[name] = (current, changed_at, complete)
+                    elif current != previous:
+                        pending[name] = (current, now, complete)
+                    elif now - changed_at >= self.settle_seconds:
+                        del pending[name]
+                        ready.append(name)
+                if ready:
+                    yield ready
+        finally:
+            source.close()
+            self._source = None